@@ -0,0 +1,65 @@
+# benchmarks/bench_bulk_status.py
+# Per-complaint cost of closing complaints one update_complaint_status call
+# at a time versus one bulk_update_status call.
+#
+#     python benchmarks/bench_bulk_status.py [--rows 20000] [--batch 500]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import PRIORITIES, Database
+
+CATEGORIES = ["Academic", "Infrastructure", "Hostel", "Library", "Canteen", "Transport", "Other"]
+
+
+def seed(db, rows):
+    with db.pool.writer() as conn:
+        conn.executemany(
+            """INSERT INTO complaints (user_id, name, roll_no, department, course, gender,
+                                       complaint, category, priority, status)
+               VALUES (1, ?, ?, 'CSE', 'B.Tech', 'Male', ?, ?, ?, 'Resolved')""",
+            [(f"Student {i}", f"R{i:05d}", f"complaint number {i} about the hostel",
+              random.choice(CATEGORIES), random.choice(PRIORITIES)) for i in range(rows)])
+        conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Single vs bulk status updates")
+    parser.add_argument("--rows", type=int, default=20000, help="complaints in the database")
+    parser.add_argument("--batch", type=int, default=500, help="complaints to close per method")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db = Database(path)
+    seed(db, args.rows)
+    ids = random.sample(range(1, args.rows + 1), args.batch * 2)
+    single_ids, bulk_ids = ids[:args.batch], ids[args.batch:]
+
+    start = time.perf_counter()
+    for complaint_id in single_ids:
+        db.update_complaint_status(complaint_id, "Closed", 1)
+    single = time.perf_counter() - start
+
+    start = time.perf_counter()
+    changed = db.bulk_update_status(bulk_ids, "Closed", 1)
+    bulk = time.perf_counter() - start
+    assert len(changed) == args.batch
+
+    with db.pool.reader() as conn:
+        history = conn.execute("SELECT COUNT(*) FROM status_history").fetchone()[0]
+    db.close()
+
+    print(f"Closing {args.batch} of {args.rows:,} complaints ({history} history rows written):")
+    print(f"  one call each   {single:7.3f}s  {single / args.batch * 1000:7.3f} ms per complaint")
+    print(f"  bulk, one commit {bulk:6.3f}s  {bulk / args.batch * 1000:7.3f} ms per complaint "
+          f"({single / bulk:.0f}x faster)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+# benchmarks/bench_concurrency.py
+# Read throughput while a writer keeps submitting complaints, for the
+# rollback journal and for WAL.
+#
+#     python benchmarks/bench_concurrency.py [--rows 20000] [--seconds 5] [--readers 4]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from connection import ConnectionConfig
+from database import Database
+
+CATEGORIES = ["Academic", "Infrastructure", "Hostel", "Library", "Canteen", "Transport", "Other"]
+STATUSES = ["Pending", "In Progress", "Resolved", "Rejected"]
+PRIORITIES = ["Low", "Medium", "High", "Critical"]
+
+
+def seed(db, rows):
+    with db.pool.writer() as conn:
+        conn.executemany(
+            """INSERT INTO complaints (user_id, name, roll_no, department, course, gender,
+                                       complaint, category, priority, status)
+               VALUES (1, ?, ?, 'CSE', 'B.Tech', 'Male', ?, ?, ?, ?)""",
+            [(f"Student {i}", f"R{i:05d}", f"complaint number {i} about the campus",
+              random.choice(CATEGORIES), random.choice(PRIORITIES), random.choice(STATUSES))
+             for i in range(rows)])
+        conn.commit()
+
+
+def run(journal_mode, rows, seconds, readers):
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "bench.db")
+    db = Database(path, ConnectionConfig(journal_mode=journal_mode, readers=readers))
+    seed(db, rows)
+
+    stop = threading.Event()
+    reads = [0] * readers
+    writes = [0]
+    errors = []
+
+    def reader(slot):
+        filters = [None, "Pending", "Resolved"]
+        while not stop.is_set():
+            try:
+                next(db.iter_complaints_page(limit=50, status_filter=random.choice(filters)), None)
+                db.get_statistics()
+                reads[slot] += 1
+            except Exception as e:
+                errors.append(e)
+
+    def writer():
+        while not stop.is_set():
+            try:
+                db.add_complaint(1, "Writer", "W0001", "CSE", "B.Tech", "Male",
+                                 "submitted during the benchmark", random.choice(CATEGORIES), "Medium")
+                writes[0] += 1
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads.append(threading.Thread(target=writer))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    db.close()
+
+    return {
+        "journal_mode": journal_mode,
+        "reads_per_sec": sum(reads) / seconds,
+        "writes_per_sec": writes[0] / seconds,
+        "errors": len(errors),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare read throughput under writes for DELETE vs WAL")
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'journal':<8} {'reads/s':>10} {'writes/s':>10} {'errors':>7}")
+    for mode in ("DELETE", "WAL"):
+        result = run(mode, args.rows, args.seconds, args.readers)
+        print(f"{result['journal_mode']:<8} {result['reads_per_sec']:>10.0f} "
+              f"{result['writes_per_sec']:>10.0f} {result['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# benchmarks/bench_duplicates.py
+# Duplicate lookup latency with many complaints open: Database.find_duplicates
+# (LSH band keys, then signatures of the candidates only) against comparing
+# the new complaint's signature with every open complaint's.
+#
+#     python benchmarks/bench_duplicates.py [--open 100000] [--queries 500]
+#
+# The complaints are generated from the campus_data.py templates with a
+# place, a detail and a few words of their own, so most are distinct and
+# some templates come up often, as in a real term.
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from campus_data import COMPLAINT_TEXT, DEPARTMENTS
+from database import Database
+from duplicates import DUPLICATE_THRESHOLD, signature, similarity, unpack_signature
+
+BLOCKS = ["A", "B", "C", "D", "E", "North", "South", "Girls", "Boys", "PG"]
+DETAILS = ["since last week", "every evening", "after the rain", "during exams", "for the third time",
+           "since the start of term", "on weekends", "in the mornings", "after the power cut", "all day"]
+SYLLABLES = ["ka", "ri", "mo", "te", "su", "la", "ven", "dor", "pi", "nu", "sha", "gar", "bel", "tor", "mi"]
+
+
+def complaint_text(rng, vocabulary):
+    category = rng.choice(list(COMPLAINT_TEXT))
+    share, subjects, problems = COMPLAINT_TEXT[category]
+    extra = " ".join(rng.sample(vocabulary, 3))
+    return category, (f"{rng.choice(subjects).capitalize()} in {rng.choice(BLOCKS)} block room "
+                      f"{rng.randrange(100, 500)} {rng.choice(problems)} {rng.choice(DETAILS)}, {extra}.")
+
+
+def reworded(rng, text):
+    """The same complaint as another student might write it"""
+    words = text.rstrip(".").split()
+    words.pop(rng.randrange(len(words)))
+    return "Please check, " + " ".join(words) + " again"
+
+
+def seed(db, count, rng, vocabulary):
+    texts = []
+
+    def records():
+        for i in range(count):
+            category, text = complaint_text(rng, vocabulary)
+            texts.append(text)
+            yield {"user_id": 1, "name": f"Student {i}", "roll_no": f"R{i:06d}",
+                   "department": rng.choice(DEPARTMENTS), "course": "B.Tech", "gender": "Other",
+                   "complaint": text, "category": category, "priority": "Medium",
+                   "status": rng.choice(["Open", "In Progress"])}
+
+    db.bulk_add_complaints(records(), default_user_id=1, defer_indexes=True)
+    return texts
+
+
+def naive_duplicates(text, signatures):
+    """Every open complaint's signature compared with the new one"""
+    sig = signature(text)
+    return {complaint_id for complaint_id, other in signatures if similarity(sig, other) >= DUPLICATE_THRESHOLD}
+
+
+def percentile(timings, fraction):
+    ordered = sorted(timings)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Duplicate lookup latency with many complaints open")
+    parser.add_argument("--open", type=int, default=100_000, help="open complaints to seed")
+    parser.add_argument("--queries", type=int, default=500, help="lookups to time")
+    parser.add_argument("--naive-queries", type=int, default=20, help="full comparisons to time")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = sorted({"".join(rng.choices(SYLLABLES, k=3)) for _ in range(5000)})
+    path = os.path.join(tempfile.mkdtemp(), "duplicates.db")
+    db = Database(path)
+    start = time.perf_counter()
+    texts = seed(db, args.open, rng, vocabulary)
+    seeded = time.perf_counter() - start
+    with db.pool.reader() as conn:
+        signatures = [(complaint_id, unpack_signature(blob))
+                      for complaint_id, blob in conn.execute("SELECT complaint_id, signature FROM complaint_minhash")]
+    print(f"{args.open:,} open complaints seeded and indexed in {seeded:.1f}s, {len(signatures):,} signatures")
+
+    # Half the lookups reword a complaint that is open, half are new
+    queries = [reworded(rng, rng.choice(texts)) if i % 2 == 0 else complaint_text(rng, vocabulary)[1]
+               for i in range(args.queries)]
+    timings = []
+    found = 0
+    for text in queries:
+        start = time.perf_counter()
+        matches = db.find_duplicates(text)
+        timings.append((time.perf_counter() - start) * 1000)
+        found += bool(matches)
+
+    naive = []
+    recalled = 0
+    expected = 0
+    for text in queries[:args.naive_queries]:
+        start = time.perf_counter()
+        exact = naive_duplicates(text, signatures)
+        naive.append((time.perf_counter() - start) * 1000)
+        if exact:
+            expected += 1
+            recalled += bool({match.id for match in db.find_duplicates(text, limit=50)} & exact)
+
+    print(f"  {'find_duplicates (LSH)':<28} median {statistics.median(timings):8.2f} ms  "
+          f"p99 {percentile(timings, 0.99):8.2f} ms  {found}/{len(queries)} lookups matched")
+    print(f"  {'full signature comparison':<28} median {statistics.median(naive):8.2f} ms  "
+          f"p99 {percentile(naive, 0.99):8.2f} ms")
+    if expected:
+        print(f"  LSH found a match for {recalled}/{expected} lookups that have one above {DUPLICATE_THRESHOLD}")
+    db.close()
+    os.remove(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
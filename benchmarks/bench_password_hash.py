@@ -0,0 +1,127 @@
+# benchmarks/bench_password_hash.py
+# Pick password hash costs for a target login time on this machine, then
+# check how a burst of simultaneous logins behaves with them.
+#
+#     python benchmarks/bench_password_hash.py [--target-ms 100] [--storm 50]
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from passwords import PasswordHasher
+
+
+def time_hash(hasher, repeats=3):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        hasher.hash("correct horse battery staple")
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def calibrate_scrypt(target):
+    """Largest power-of-two n (r=8, p=1) whose hash stays within the target"""
+    n, best = 2 ** 12, None
+    while n <= 2 ** 20:
+        seconds = time_hash(PasswordHasher("scrypt", scrypt_params={"n": n, "r": 8, "p": 1}))
+        print(f"  scrypt n={n:<8} {seconds * 1000:7.1f} ms  ({128 * n * 8 // 2 ** 20} MiB)")
+        if seconds > target:
+            break
+        best = n
+        n *= 2
+    return best
+
+
+def calibrate_pbkdf2(target):
+    """Iterations scaled from a short run; the cost is linear in iterations"""
+    probe = 100_000
+    seconds = time_hash(PasswordHasher("pbkdf2_sha256", pbkdf2_iterations=probe))
+    iterations = max(int(probe * target / seconds) // 10_000 * 10_000, 10_000)
+    check = time_hash(PasswordHasher("pbkdf2_sha256", pbkdf2_iterations=iterations))
+    print(f"  pbkdf2 {probe:,} iterations {seconds * 1000:.1f} ms -> "
+          f"{iterations:,} iterations {check * 1000:.1f} ms")
+    return iterations
+
+
+def login_storm(hasher, logins, max_concurrent):
+    """Verify `logins` passwords at once; returns per-login latencies and the
+    longest pause seen by a thread that stands in for the UI loop.
+    """
+    stored = hasher.hash("secret")
+    hasher = PasswordHasher(hasher.algorithm, hasher.scrypt_params, hasher.pbkdf2_iterations,
+                            max_concurrent=max_concurrent)
+    latencies = []
+    lock = threading.Lock()
+    done = threading.Event()
+    gaps = [0.0]
+
+    def ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            time.sleep(0.005)
+            now = time.perf_counter()
+            gaps[0] = max(gaps[0], now - last - 0.005)
+            last = now
+
+    def login():
+        start = time.perf_counter()
+        hasher.verify("secret", stored)
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    tick = threading.Thread(target=ticker)
+    tick.start()
+    threads = [threading.Thread(target=login) for _ in range(logins)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    done.set()
+    tick.join()
+    return sorted(latencies), elapsed, gaps[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrate password hash costs")
+    parser.add_argument("--target-ms", type=float, default=100, help="time one login hash may take")
+    parser.add_argument("--storm", type=int, default=50, help="simultaneous logins to simulate")
+    parser.add_argument("--max-concurrent", type=int, default=os.cpu_count() or 2,
+                        help="hashes allowed to run at once")
+    args = parser.parse_args()
+    target = args.target_ms / 1000
+
+    print(f"Calibrating for {args.target_ms:.0f} ms per hash:")
+    n = calibrate_scrypt(target)
+    iterations = calibrate_pbkdf2(target)
+
+    if n is not None:
+        hasher = PasswordHasher("scrypt", scrypt_params={"n": n, "r": 8, "p": 1})
+    else:
+        hasher = PasswordHasher("pbkdf2_sha256", pbkdf2_iterations=iterations)
+
+    latencies, elapsed, gap = login_storm(hasher, args.storm, args.max_concurrent)
+    print(f"\n{args.storm} simultaneous logins with {hasher.algorithm}, at most {args.max_concurrent} at once:")
+    print(f"  all done in {elapsed:.2f}s ({args.storm / elapsed:.1f} logins/s)")
+    print(f"  latency median {statistics.median(latencies) * 1000:.0f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f} ms, "
+          f"max {latencies[-1] * 1000:.0f} ms")
+    print(f"  longest stall of another thread: {gap * 1000:.1f} ms")
+
+    print("\nSuggested settings for passwords.py:")
+    if n is not None:
+        print(f'  SCRYPT_PARAMS = {{"n": 2 ** {n.bit_length() - 1}, "r": 8, "p": 1}}')
+    else:
+        print(f"  scrypt: even n=4096 is slower than {args.target_ms:.0f} ms; use PBKDF2")
+    print(f"  PBKDF2_ITERATIONS = {iterations:_}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
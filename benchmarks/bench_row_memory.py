@@ -0,0 +1,69 @@
+# benchmarks/bench_row_memory.py
+# Memory and fetch time of a full complaint listing as plain tuples (the old
+# 12-column SELECT) versus the slotted ComplaintSummary rows.
+#
+#     python benchmarks/bench_row_memory.py [--rows 100000]
+import argparse
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+CATEGORIES = ["Academic", "Infrastructure", "Hostel", "Library", "Canteen", "Transport", "Other"]
+PRIORITIES = ["Low", "Medium", "High", "Critical"]
+STATUSES = ["Open", "In Progress", "Resolved", "Closed"]
+
+OLD_LISTING = """SELECT c.id, c.name, c.roll_no, c.department, c.course, c.gender, c.complaint,
+                        c.category, c.priority, c.status, c.submitted_at, c.user_id
+                 FROM complaints c ORDER BY c.submitted_at DESC"""
+
+
+def records(rows):
+    for i in range(rows):
+        yield {"user_id": 1, "name": f"Student {i}", "roll_no": f"R{i:06d}", "department": "Computer Science",
+               "course": "B.Tech", "gender": "Female",
+               "complaint": f"Complaint {i}: " + "the hostel wifi drops every evening " * 4,
+               "category": random.choice(CATEGORIES), "priority": random.choice(PRIORITIES),
+               "status": random.choice(STATUSES)}
+
+
+def measure(label, load):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    rows = load()
+    seconds = time.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<34} {len(rows):>8,} rows {size / 2**20:>8.1f} MiB {size / len(rows):>7.0f} B/row "
+          f"{seconds:>7.2f}s")
+    del rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare tuple rows with slotted row records")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db = Database(path)
+    db.bulk_add_complaints(records(args.rows), defer_indexes=True)
+
+    def old_tuples():
+        with db.pool.reader() as conn:
+            return conn.execute(OLD_LISTING).fetchall()
+
+    measure("tuples, old 12-column listing", old_tuples)
+    measure("ComplaintSummary records", db.get_all_complaints)
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# benchmarks/bench_server_load.py
+# Load test for server.py: starts a local server on a scratch copy of a
+# seeded database and runs simulated office clients against it, each
+# through its own RemoteDatabase, with a mix of list reads, statistics,
+# new complaints and status changes.
+#
+#     python benchmarks/bench_server_load.py [--clients 16] [--seconds 10] [--rows 20000]
+import argparse
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from database import PRIORITIES, STATUSES, Database
+from remote_database import RemoteDatabase
+
+CATEGORIES = ["Academic", "Infrastructure", "Hostel", "Library", "Canteen", "Transport", "Other"]
+
+# Operation mix: (name, weight)
+MIX = [("list_page", 60), ("search", 10), ("statistics", 10), ("add_complaint", 10), ("update_status", 10)]
+
+
+def seed(path, rows, students):
+    db = Database(path)
+    for i in range(students):
+        db.register_user(f"load{i}", "secret1", "Student", f"Load Student {i}", f"load{i}@example.com", "CSE", f"L{i:04d}")
+    with db.pool.writer() as conn:
+        conn.executemany(
+            """INSERT INTO complaints (user_id, name, roll_no, department, course, gender,
+                                       complaint, category, priority, status)
+               VALUES (1, ?, ?, 'CSE', 'B.Tech', 'Male', ?, ?, ?, ?)""",
+            [(f"Student {i}", f"R{i:05d}", f"complaint number {i} about the campus wifi and water",
+              random.choice(CATEGORIES), random.choice(PRIORITIES), random.choice(STATUSES))
+             for i in range(rows)])
+        conn.commit()
+    db.rebuild_statistics()
+    db.close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            RemoteDatabase(url, timeout=2).latest_change_seq()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def client(url, index, stop, results, lock):
+    teacher = RemoteDatabase(url)
+    admin = teacher.authenticate_user("admin", "admin123", "Teacher")
+    student_db = RemoteDatabase(url)
+    student = student_db.authenticate_user(f"load{index}", "secret1", "Student")
+    names = [name for name, weight in MIX]
+    weights = [weight for name, weight in MIX]
+    timings = {name: [] for name in names}
+    errors = 0
+
+    while not stop.is_set():
+        op = random.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            if op == "list_page":
+                pages = teacher.iter_complaints_page(limit=50, status_filter=random.choice(STATUSES))
+                page = next(pages, [])
+            elif op == "search":
+                teacher.search_complaints(random.choice(["wifi", "water", "campus"]), limit=50)
+            elif op == "statistics":
+                teacher.get_statistics(include_archive=True)
+            elif op == "add_complaint":
+                student_db.add_complaint(student.id, student.full_name, student.roll_no, "CSE", "B.Tech",
+                                         "Female", "the projector in room 4 is broken",
+                                         random.choice(CATEGORIES), random.choice(PRIORITIES))
+            else:
+                complaint_id = random.randint(1, 1000)
+                try:
+                    teacher.update_complaint_status(complaint_id, random.choice(STATUSES), admin.id)
+                except ValueError:
+                    pass  # deleted or archived
+        except Exception:
+            errors += 1
+            continue
+        timings[op].append(time.perf_counter() - start)
+
+    with lock:
+        for name, values in timings.items():
+            results.setdefault(name, []).extend(values)
+        results.setdefault("errors", []).append(errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the HTTP service")
+    parser.add_argument("--clients", type=int, default=16, help="simultaneous clients")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rows", type=int, default=20000, help="complaints to seed")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, "load.db")
+    print(f"Seeding {args.rows:,} complaints and {args.clients} students...")
+    seed(path, args.rows, args.clients)
+
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    server = subprocess.Popen([sys.executable, os.path.join(ROOT, "server.py"), "--db", path,
+                               "--port", str(port), "--quiet"])
+    try:
+        wait_until_up(url)
+        stop = threading.Event()
+        lock = threading.Lock()
+        results = {}
+        threads = [threading.Thread(target=client, args=(url, i, stop, results, lock))
+                   for i in range(args.clients)]
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait()
+
+    errors = sum(results.pop("errors", []))
+    total = sum(len(values) for values in results.values())
+    print(f"\n{args.clients} clients, {args.seconds:.0f}s: {total:,} requests "
+          f"({total / args.seconds:,.0f}/s), {errors} errors")
+    print(f"{'operation':<15}{'count':>8}{'median ms':>11}{'p95 ms':>9}{'p99 ms':>9}")
+    for name, values in results.items():
+        if not values:
+            continue
+        values.sort()
+        print(f"{name:<15}{len(values):>8}{statistics.median(values) * 1000:>11.1f}"
+              f"{values[int(len(values) * 0.95) - 1] * 1000:>9.1f}"
+              f"{values[int(len(values) * 0.99) - 1] * 1000:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
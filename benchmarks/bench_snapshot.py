@@ -0,0 +1,122 @@
+# benchmarks/bench_snapshot.py
+# Loading a columnar snapshot and cross-tabbing it, against the same
+# GROUP BY run in SQLite.
+#
+# Without --db the snapshot is built straight from synthetic rows, so a
+# million complaints take seconds to set up rather than a seeded database:
+#
+#     python benchmarks/bench_snapshot.py [--complaints 1000000]
+#     python benchmarks/bench_snapshot.py --db tmp/campus-bench/campus-1m-seed1-v5.db
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from campus_data import COMPLAINT_TEXT, DEPARTMENTS, GENDERS
+from database import PRIORITIES, STATUSES, Database
+from snapshot import SNAPSHOT_TABLES, Snapshot, TableBuilder, io_size, np, write_snapshot
+
+CATEGORIES = list(COMPLAINT_TEXT)
+GROUP_KEYS = ["department", "category", "month", "priority"]
+
+# Complaints are spread over the two years up to now
+SPAN_SECONDS = 2 * 365 * 86400
+
+SQL_GROUP_BY = """SELECT department, IFNULL(category, ''), strftime('%Y-%m', submitted_at), priority, COUNT(*)
+                  FROM complaints GROUP BY 1, 2, 3, 4"""
+
+
+def synthetic_snapshot(path, complaints, seed):
+    rng = random.Random(seed)
+    now = int(time.time())
+    tables = {name: TableBuilder(columns) for name, columns in SNAPSHOT_TABLES.items()}
+    batch = []
+    for complaint_id in range(1, complaints + 1):
+        submitted = now - rng.randrange(SPAN_SECONDS)
+        status = rng.choice(STATUSES)
+        finished = status in ("Resolved", "Closed")
+        batch.append((complaint_id, rng.randrange(1, 5000), submitted, submitted, rng.choice(DEPARTMENTS),
+                      rng.choice(CATEGORIES), rng.choice(PRIORITIES), status, "B.Tech", rng.choice(GENDERS),
+                      0, rng.expovariate(1 / 86400) if status != "Open" else None,
+                      rng.expovariate(1 / 400000) if finished else None))
+        if len(batch) == 50_000:
+            tables["complaints"].append(batch)
+            batch = []
+    tables["complaints"].append(batch)
+    write_snapshot(path, tables, {"synthetic": True})
+    return tables["complaints"].rows
+
+
+def timed(call, repeat, table=None):
+    best = None
+    for _ in range(repeat):
+        if table is not None:
+            # Time the calendar and label work too, not just the cached keys
+            table.keys.clear()
+        start = time.perf_counter()
+        result = call()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snapshot load, group-by and pivot timings")
+    parser.add_argument("--complaints", type=int, default=1_000_000, help="synthetic complaints without --db")
+    parser.add_argument("--db", help="export the snapshot from this database instead")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per measurement; the best is reported")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "snapshot.npz")
+    start = time.perf_counter()
+    if args.db:
+        db = Database(args.db)
+        rows = db.export_snapshot(path)["complaints"]
+        db.close()
+        source = f"exported from {args.db}"
+    else:
+        rows = synthetic_snapshot(path, args.complaints, args.seed)
+        source = "synthetic"
+    print(f"{rows:,} complaints ({source}) in {time.perf_counter() - start:.1f}s, "
+          f"{io_size(path) / 1e6:.1f} MB on disk; aggregating with {'NumPy' if np is not None else 'plain Python'}")
+
+    load, snapshot = timed(lambda: Snapshot.load(path), args.repeat)
+    complaints = snapshot.complaints
+    cases = [
+        ("load", load, None),
+        ("group_by " + " x ".join(GROUP_KEYS),
+         *timed(lambda: complaints.group_by(GROUP_KEYS), args.repeat, complaints)),
+        ("pivot department x month",
+         *timed(lambda: complaints.pivot("department", "month"), args.repeat, complaints)),
+        ("pivot category x priority, mean resolution",
+         *timed(lambda: complaints.pivot("category", "priority", "resolution_seconds", "mean"), args.repeat,
+                complaints)),
+        ("group_by status x week where Hostel",
+         *timed(lambda: complaints.group_by(["status", "week"], where={"category": "Hostel"}), args.repeat,
+                complaints)),
+    ]
+    if args.db:
+        conn = sqlite3.connect(args.db)
+        cases.append(("SQLite GROUP BY " + " x ".join(GROUP_KEYS),
+                      *timed(lambda: conn.execute(SQL_GROUP_BY).fetchall(), 1)))
+        conn.close()
+
+    for name, elapsed, result in cases:
+        if isinstance(result, tuple):
+            groups = f"{len(result[0])} x {len(result[1])} cells"
+        else:
+            groups = f"{len(result):,} groups" if result is not None else ""
+        print(f"  {name:<58} {elapsed * 1000:9.1f} ms  {groups}")
+    os.remove(path)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
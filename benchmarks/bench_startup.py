@@ -0,0 +1,122 @@
+# benchmarks/bench_startup.py
+# Startup timings of the desktop app: cold start (imports and main window),
+# time to the login screen and time from login to the first complaint rows.
+# Every run is a fresh interpreter, so imports are measured cold. Needs a
+# display.
+#
+#     python benchmarks/bench_startup.py [--runs 5] [--db college_complaints.db]
+#     python benchmarks/bench_startup.py --role Student --username s1 --password secret
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The seeded teacher account; students have to be named with --username
+ACCOUNTS = {"Teacher": ("admin", "admin123"), "Student": (None, None)}
+
+
+def wait_for(app, ready, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while not ready():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("timed out waiting for the window")
+        app.update()
+        time.sleep(0.001)
+
+
+def watch_first_rows(role, shown):
+    """Record the time when the view first renders its complaint rows"""
+    if role == "Teacher":
+        from views.teacher_view import TeacherView as view_class
+        name = "show_first_page"
+    else:
+        from views.student_view import StudentView as view_class
+        name = "show_complaints"
+    original = getattr(view_class, name)
+
+    def show(self, *args):
+        original(self, *args)
+        shown.append(time.perf_counter())
+    setattr(view_class, name, show)
+
+
+def measure_once(db_path, role, username, password):
+    """Time one start in this process and print the timings as JSON"""
+    start = time.perf_counter()
+    os.chdir(os.path.dirname(os.path.abspath(db_path)))
+    sys.path.insert(0, ROOT)
+
+    from main import ComplaintManagementApp
+    app = ComplaintManagementApp()
+    cold_start = time.perf_counter() - start
+
+    wait_for(app, lambda: app.current_view.winfo_ismapped())
+    login_screen = time.perf_counter() - start
+
+    user = app.db.authenticate_user(username, password, role)
+    if user is None:
+        raise SystemExit(f"cannot log in as {username!r} ({role})")
+
+    # The view module is imported here only to watch for its rows, so the
+    # import is not part of first_row; on_login_success pays it otherwise
+    shown = []
+    watch_first_rows(role, shown)
+    login = time.perf_counter()
+    app.on_login_success(user, role)
+    if role == "Student":
+        app.current_view.tabview.set("My Complaints")
+        app.current_view.tabview.build("My Complaints")
+    wait_for(app, lambda: shown)
+    first_row = shown[0] - login
+
+    app.on_closing()
+    print(json.dumps({"cold_start": cold_start, "login_screen": login_screen, "first_row": first_row}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app startup times")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes to time")
+    parser.add_argument("--role", choices=sorted(ACCOUNTS), default="Teacher")
+    parser.add_argument("--username", help="account to log in with (default: admin for Teacher)")
+    parser.add_argument("--password")
+    parser.add_argument("--db", default=os.path.join(ROOT, "college_complaints.db"),
+                        help="database file; the app opens college_complaints.db in its directory")
+    parser.add_argument("--once", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    username, password = ACCOUNTS[args.role]
+    username = args.username or username
+    password = args.password or password
+    if username is None or password is None:
+        parser.error(f"--username and --password are needed for role {args.role}")
+
+    if args.once:
+        measure_once(args.db, args.role, username, password)
+        return 0
+
+    results = {"cold_start": [], "login_screen": [], "first_row": []}
+    for run in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--once", "--role", args.role,
+             "--username", username, "--password", password, "--db", args.db],
+            check=True, capture_output=True, text=True).stdout
+        timings = json.loads(output.strip().splitlines()[-1])
+        for name, seconds in timings.items():
+            results[name].append(seconds)
+        print(f"run {run + 1}: " + ", ".join(f"{name} {seconds * 1000:.0f} ms"
+                                             for name, seconds in timings.items()))
+
+    print(f"\n{args.role}, {args.runs} runs (median / min / max):")
+    for name, values in results.items():
+        print(f"  {name:<13} {statistics.median(values) * 1000:7.0f} ms "
+              f"{min(values) * 1000:7.0f} ms {max(values) * 1000:7.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
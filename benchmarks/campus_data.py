@@ -0,0 +1,210 @@
+# benchmarks/campus_data.py
+# Synthetic campus data for the benchmarks: students and teachers, complaints
+# with believable text spread over two academic years, teacher responses and
+# a status history that matches each complaint's current status.
+#
+#     python benchmarks/campus_data.py bench.db --complaints 100000 [--seed 1]
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+# Every generated account has this password
+PASSWORD = "campus123"
+
+DEPARTMENTS = ["Computer Science", "Electronics", "Mechanical", "Civil", "Electrical", "Chemical",
+               "Physics", "Mathematics", "Business Administration", "Biotechnology"]
+COURSES = ["B.Tech", "M.Tech", "B.Sc", "M.Sc", "BBA", "MBA", "PhD"]
+GENDERS = ["Male", "Female", "Other"]
+FIRST_NAMES = ["Aarav", "Vivaan", "Aditya", "Ishaan", "Ananya", "Diya", "Saanvi", "Priya", "Rohan", "Kabir",
+               "Meera", "Harman", "Simran", "Arjun", "Neha", "Rahul", "Sneha", "Karan", "Pooja", "Vikram"]
+LAST_NAMES = ["Sharma", "Verma", "Singh", "Kaur", "Patel", "Gupta", "Reddy", "Nair", "Iyer", "Das",
+              "Mehta", "Joshi", "Rao", "Khan", "Bose", "Chopra", "Malhotra", "Pillai", "Sinha", "Yadav"]
+
+# Category -> (share of complaints, subjects, problems)
+COMPLAINT_TEXT = {
+    "Academic": (0.22, ["the mid-semester exam", "the lab assessment", "my attendance record", "the timetable",
+                        "the assignment deadline", "the elective registration"],
+                 ["was graded incorrectly", "clashes with another course", "was not updated",
+                  "was announced too late", "is missing from the portal"]),
+    "Infrastructure": (0.20, ["the projector in room 204", "the lab computers", "the classroom fans",
+                              "the wifi in block C", "the lift in the main building", "the washroom taps"],
+                       ["is broken", "has not worked for a week", "keeps failing", "needs urgent repair",
+                        "is very slow"]),
+    "Hostel": (0.16, ["the hostel water supply", "the room furniture", "the mess timings", "the hot water",
+                      "the hostel wifi", "the laundry service"],
+               ["is unreliable", "has been out since Monday", "is not maintained", "is overcharged",
+                "stops at night"]),
+    "Library": (0.08, ["the reference section", "the book return desk", "the reading room AC",
+                       "the journal subscription", "the library hours"],
+                ["is understaffed", "is not working", "has expired", "should be extended during exams"]),
+    "Canteen": (0.12, ["the canteen food", "the drinking water cooler", "the canteen prices",
+                       "the seating area", "the hygiene in the kitchen"],
+                ["is of poor quality", "is not clean", "has gone up again", "is overcrowded at lunch"]),
+    "Transport": (0.10, ["the college bus on route 7", "the bus pass renewal", "the parking area",
+                         "the evening shuttle"],
+                  ["is always late", "takes too long", "is full every day", "was cancelled without notice"]),
+    "Harassment": (0.02, ["a senior student", "a group in the hostel corridor", "messages on the class group"],
+                   ["has been threatening me", "keeps making remarks", "needs to be looked into confidentially"]),
+    "Administration": (0.05, ["the fee receipt", "the scholarship payment", "my ID card",
+                              "the bonafide certificate"],
+                       ["has not been issued", "is delayed by a month", "has wrong details"]),
+    "Other": (0.05, ["the sports ground", "the medical room", "the cultural fest budget", "the notice board"],
+              ["needs attention", "is not open on time", "was not shared with students"]),
+}
+
+PRIORITY_WEIGHTS = {"Low": 0.30, "Medium": 0.40, "High": 0.22, "Critical": 0.08}
+RESPONSES = ["We have forwarded this to the concerned department.",
+             "A technician has been assigned and will visit tomorrow.",
+             "Thank you for reporting, this has been fixed now.",
+             "Please meet the warden's office with your ID card.",
+             "The issue is under review by the committee.",
+             "This has been escalated to the administration."]
+
+
+def complaint_status(age_days, rng):
+    """Older complaints are more likely to be finished"""
+    finished = min(0.95, age_days / 60)
+    roll = rng.random()
+    if roll < finished * 0.6:
+        return "Closed"
+    if roll < finished:
+        return "Resolved"
+    if roll < finished + (1 - finished) * 0.4:
+        return "In Progress"
+    return "Open"
+
+
+def status_path(status):
+    return {"Open": [], "In Progress": ["In Progress"], "Resolved": ["In Progress", "Resolved"],
+            "Closed": ["In Progress", "Resolved", "Closed"]}[status]
+
+
+def seed_database(path, complaints, seed=1, progress=None):
+    """Fill a new database at `path`; returns a dict of counts and logins.
+
+    Complaints go through Database.bulk_add_complaints with deferred
+    indexes, the same path a large import takes. Users, responses and
+    history are written with executemany, and every account shares one
+    password hash so seeding does not spend its time in scrypt.
+    """
+    rng = random.Random(seed)
+    now = datetime.now().replace(microsecond=0)
+    students = max(50, complaints // 10)
+    teachers = max(5, complaints // 1000)
+    started = time.perf_counter()
+
+    db = Database(path)
+    password_hash = db.hash_password(PASSWORD)
+    with db.pool.writer() as conn:
+        conn.executemany(
+            """INSERT INTO users (username, password_hash, role, full_name, email, department, roll_no)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            [(f"{role.lower()}{i}", password_hash, role,
+              f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", f"{role.lower()}{i}@campus.example",
+              rng.choice(DEPARTMENTS), f"{2020 + i % 6}CS{i:06d}" if role == "Student" else None)
+             for role, count in (("Student", students), ("Teacher", teachers)) for i in range(count)])
+        conn.commit()
+        student_rows = conn.execute("SELECT id, full_name, roll_no, department FROM users "
+                                    "WHERE role='Student'").fetchall()
+        teacher_ids = [row[0] for row in conn.execute("SELECT id FROM users WHERE role='Teacher'")]
+
+    categories = list(COMPLAINT_TEXT)
+    category_weights = [COMPLAINT_TEXT[name][0] for name in categories]
+    priorities = list(PRIORITY_WEIGHTS)
+    priority_weights = list(PRIORITY_WEIGHTS.values())
+
+    def records():
+        for i in range(complaints):
+            user_id, name, roll_no, department = rng.choice(student_rows)
+            category = rng.choices(categories, category_weights)[0]
+            share, subjects, problems = COMPLAINT_TEXT[category]
+            age = rng.random() * 730
+            yield {"user_id": user_id, "name": name, "roll_no": roll_no, "department": department,
+                   "course": rng.choice(COURSES), "gender": rng.choice(GENDERS),
+                   "complaint": f"{rng.choice(subjects).capitalize()} {rng.choice(problems)}. "
+                                f"Reported by {name} ({roll_no}), please look into it.",
+                   "category": category, "priority": rng.choices(priorities, priority_weights)[0],
+                   "status": complaint_status(age, rng),
+                   "submitted_at": (now - timedelta(days=age)).isoformat(sep=" ")}
+
+    report = db.bulk_add_complaints(records(), defer_indexes=True,
+                                    progress=(lambda r: progress("complaints", r.inserted)) if progress else None)
+
+    # Responses and status history for every complaint that has moved on,
+    # with updated_at at the last change so the archive job has work to do
+    responses = 0
+    history = 0
+    with db.pool.reader() as conn:
+        rows = conn.execute("SELECT id, status, submitted_at FROM complaints WHERE status != 'Open'").fetchall()
+    for start in range(0, len(rows), 10000):
+        response_rows = []
+        history_rows = []
+        updated_rows = []
+        for complaint_id, status, submitted_at in rows[start:start + 10000]:
+            at = datetime.fromisoformat(submitted_at)
+            teacher = rng.choice(teacher_ids)
+            old = "Open"
+            for new in status_path(status):
+                at += timedelta(hours=rng.uniform(2, 96))
+                history_rows.append((complaint_id, old, new, teacher, at.strftime("%Y-%m-%d %H:%M:%S")))
+                old = new
+                if new in ("In Progress", "Resolved"):
+                    response_rows.append((complaint_id, teacher, rng.choice(RESPONSES),
+                                          at.strftime("%Y-%m-%d %H:%M:%S")))
+            updated_rows.append((at.strftime("%Y-%m-%d %H:%M:%S"), complaint_id))
+        with db.pool.writer() as conn:
+            conn.executemany("""INSERT INTO complaint_responses (complaint_id, responder_id, response, responded_at)
+                                VALUES (?, ?, ?, ?)""", response_rows)
+            conn.executemany("""INSERT INTO status_history (complaint_id, old_status, new_status, changed_by, changed_at)
+                                VALUES (?, ?, ?, ?, ?)""", history_rows)
+            conn.executemany("UPDATE complaints SET updated_at=? WHERE id=?", updated_rows)
+            conn.commit()
+        responses += len(response_rows)
+        history += len(history_rows)
+        if progress:
+            progress("history", start + len(rows[start:start + 10000]))
+    with db.pool.writer() as conn:
+        conn.execute("UPDATE complaints SET updated_at=submitted_at WHERE status='Open'")
+        conn.commit()
+
+    db.prune_change_log()
+    db.close()
+    return {"complaints": report.inserted, "students": students, "teachers": teachers,
+            "responses": responses, "history": history, "seconds": time.perf_counter() - started,
+            "student_login": ("student0", PASSWORD), "teacher_login": ("teacher0", PASSWORD)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create a database filled with synthetic campus data")
+    parser.add_argument("path", help="database file to create")
+    parser.add_argument("--complaints", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1, help="random seed, the same seed gives the same data")
+    args = parser.parse_args()
+    if os.path.exists(args.path):
+        parser.error(f"{args.path} already exists")
+
+    stages = []
+
+    def progress(stage, done):
+        if stages and stages[-1] != stage:
+            print(file=sys.stderr)
+        stages.append(stage)
+        print(f"\r{stage}: {done:,}", end="", file=sys.stderr)
+
+    counts = seed_database(args.path, args.complaints, args.seed, progress)
+    print(f"\nCreated {args.path}: {counts['complaints']:,} complaints, {counts['students']:,} students, "
+          f"{counts['teachers']:,} teachers, {counts['responses']:,} responses, {counts['history']:,} "
+          f"status changes in {counts['seconds']:.1f}s (password for every account: {PASSWORD})",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
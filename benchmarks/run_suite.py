@@ -0,0 +1,451 @@
+# benchmarks/run_suite.py
+# Benchmark suite: seeds campus databases at several scales (campus_data.py),
+# times every public Database method and headless builds of the teacher and
+# student list renderers, and writes the timings as JSON so runs from
+# different commits can be compared.
+#
+#     python benchmarks/run_suite.py --scales 1k,10k --output before.json
+#     python benchmarks/run_suite.py --scales 1k,10k --output after.json --compare before.json
+#     python benchmarks/run_suite.py --compare before.json --results after.json
+#
+# Seeded databases are kept in --data-dir and reused; every run works on a
+# fresh copy, so the write cases never change the cached data.
+import argparse
+import inspect
+import itertools
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from campus_data import PASSWORD, seed_database
+from database import SCHEMA_VERSION, STATUSES, Database
+from snapshot import Snapshot
+
+SCALES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+# Methods that are not timed on their own, and where their cost shows up
+TIMED_ELSEWHERE = {
+    "init_db": "open_database",
+    "migrate": "open_database",
+    "init_search_index": "open_database",
+    "init_archive": "open_database",
+    "close": "open_database",
+}
+
+# Version of the JSON layout written by --output
+RESULTS_FORMAT = 1
+
+
+class StubWidget:
+    """Stands in for a CTk widget: keeps configure() options, draws nothing"""
+
+    def __init__(self):
+        self.options = {}
+        self.checked = 0
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    def get(self):
+        return self.checked
+
+    def select(self):
+        self.checked = 1
+
+    def deselect(self):
+        self.checked = 0
+
+    def pack(self, **options):
+        pass
+
+    def pack_forget(self):
+        pass
+
+
+class StubRow:
+    """A list row or card whose child widgets are StubWidgets made on first use"""
+
+    def __getattr__(self, name):
+        widget = StubWidget()
+        setattr(self, name, widget)
+        return widget
+
+    def destroy(self):
+        pass
+
+
+def headless_views():
+    """TeacherView and StudentView instances without a window, or None when
+    customtkinter cannot be imported. Only the methods that query and fill
+    in rows are used on them; widget creation is replaced by StubRow.
+    """
+    try:
+        from views.student_view import StudentView
+        from views.teacher_view import TeacherView
+    except ImportError:
+        return None
+    teacher = object.__new__(TeacherView)
+    teacher.selected = set()
+    teacher.duplicate_links = {}
+    teacher.group_duplicates = StubWidget()
+    teacher.group_duplicates.select()
+    student = object.__new__(StudentView)
+    student.complaint_cards = {}
+    student.loading_label = StubWidget()
+    student.empty_label = StubWidget()
+
+    def create_card(comp, before=None):
+        card = StubRow()
+        student.update_complaint_card(card, comp)
+        return card
+
+    student.create_complaint_card = create_card
+    return teacher, student
+
+
+def render_teacher_page(view, db, filters, wanted=1):
+    """What the teacher list does for a new filter: read the rows, then
+    fill in one recycled row widget per row shown"""
+    pages, rows, has_more, links = view.read_pages(db, filters, wanted)
+    view.duplicate_links = {link.complaint_id: link for link in links}
+    rows = view.visible(rows)
+    row = StubRow()
+    for comp in rows:
+        view.update_complaint_row(row, comp)
+    return rows
+
+
+def public_methods():
+    return sorted(name for name, member in inspect.getmembers(Database, inspect.isfunction)
+                  if not name.startswith("_"))
+
+
+def build_cases(db, path, scratch, complaints, rng):
+    """(name, call, setup, once) for every timed operation, reads before
+    writes and archiving last. call(setup()) is timed; setup is not.
+    Names are the Database method, with a [variant] where there are several.
+    """
+    ids = itertools.cycle(rng.sample(range(1, complaints + 1), min(complaints, 500)))
+    batch = rng.sample(range(1, complaints + 1), min(complaints, 500))
+    statuses = itertools.cycle(STATUSES)
+    counter = itertools.count()
+    student = db.authenticate_user("student0", PASSWORD, "Student")
+    teacher = db.authenticate_user("teacher0", PASSWORD, "Teacher")
+    seq = db.latest_change_seq()
+    recent = (datetime.now() - timedelta(weeks=12)).date()
+
+    def new_complaint():
+        return db.add_complaint(student.id, student.full_name, student.roll_no, student.department, "B.Tech",
+                                "Female", "The projector in room 204 is broken again", "Infrastructure", "High")
+
+    def import_records(count=1000):
+        return [{"user_id": student.id, "name": student.full_name, "roll_no": student.roll_no,
+                 "department": student.department, "course": "B.Tech", "gender": "Male",
+                 "complaint": f"Imported complaint {next(counter)} about the hostel wifi",
+                 "category": "Hostel", "priority": "Medium", "status": "Open"} for _ in range(count)]
+
+    def first(iterator):
+        return next(iter(iterator), None)
+
+    def clear_results():
+        db.results.invalidate()
+
+    snapshot_path = os.path.join(scratch, "snapshot.npz")
+    snapshots = {}
+
+    def snapshot_complaints():
+        """The complaints table of a snapshot, exported and loaded once"""
+        if "complaints" not in snapshots:
+            if not os.path.exists(snapshot_path):
+                db.export_snapshot(snapshot_path)
+            snapshots["complaints"] = Snapshot.load(snapshot_path).complaints
+        return snapshots["complaints"]
+
+    cases = [
+        ("open_database", lambda _: Database(path).close(), None, False),
+        ("hash_password", lambda _: db.hash_password(PASSWORD), None, False),
+        ("authenticate_user", lambda _: db.authenticate_user("student1", PASSWORD, "Student"), None, False),
+        ("get_user_by_id", lambda _: db.get_user_by_id(student.id), None, False),
+        ("get_categories", lambda _: db.get_categories(), None, False),
+        ("cache_stats", lambda _: db.cache_stats(), None, False),
+        ("result_cache_stats", lambda _: db.result_cache_stats(), None, False),
+        ("latest_change_seq", lambda _: db.latest_change_seq(), None, False),
+        ("get_changes_since", lambda _: db.get_changes_since(max(seq - 100, 0)), None, False),
+        ("get_all_complaints", lambda _: db.get_all_complaints(), None, False),
+        ("get_all_complaints[status]", lambda _: db.get_all_complaints(status_filter="Open"), None, False),
+        ("get_all_complaints[search]", lambda _: db.get_all_complaints(search="projector"), None, False),
+        ("iter_complaints_page", lambda _: first(db.iter_complaints_page(limit=100)), None, False),
+        ("iter_complaints_page[filtered]",
+         lambda _: first(db.iter_complaints_page(limit=100, status_filter="Open", category_filter="Hostel")),
+         None, False),
+        ("get_complaint_ids", lambda _: db.get_complaint_ids(status_filter="Open"), clear_results, False),
+        ("get_complaint_ids[cached]", lambda _: db.get_complaint_ids(status_filter="Open"), None, False),
+        ("get_complaint_ids[search]", lambda _: db.get_complaint_ids(search="wifi"), clear_results, False),
+        ("search_complaints", lambda _: db.search_complaints("projector", limit=100), None, False),
+        ("count_complaints", lambda _: db.count_complaints(), None, False),
+        ("count_complaints[search]", lambda _: db.count_complaints("wifi"), None, False),
+        ("get_complaint_row", lambda _: db.get_complaint_row(next(ids)), None, False),
+        ("get_complaint_rows", lambda _: db.get_complaint_rows(batch[:100]), None, False),
+        ("get_complaint_by_id", lambda _: db.get_complaint_by_id(next(ids)), None, False),
+        ("load_complaint_bundle", lambda _: db.load_complaint_bundle(next(ids)), None, False),
+        ("get_responses", lambda _: db.get_responses(next(ids)), None, False),
+        ("get_status_history", lambda _: db.get_status_history(next(ids)), None, False),
+        ("get_user_complaints", lambda _: db.get_user_complaints(student.id, include_archive=True), None, False),
+        ("iter_export_batches", lambda _: first(db.iter_export_batches()), None, False),
+        ("export_complaints",
+         lambda _: db.export_complaints(os.path.join(scratch, "export.csv"), {"status_filter": "Open"}),
+         None, False),
+        ("get_statistics", lambda _: db.get_statistics(), None, False),
+        ("get_statistics[archive]", lambda _: db.get_statistics(include_archive=True), None, False),
+        ("compute_statistics", lambda _: db.compute_statistics(), None, False),
+        ("verify_statistics", lambda _: db.verify_statistics(), None, False),
+        ("archive_size", lambda _: db.archive_size(), None, False),
+        ("get_sla_statistics", lambda _: db.get_sla_statistics(), None, False),
+        ("get_sla_statistics[since]", lambda _: db.get_sla_statistics(since=recent), None, False),
+        ("compute_sla_statistics", lambda _: db.compute_sla_statistics(), None, False),
+        ("find_duplicates", lambda _: db.find_duplicates("The hostel water supply has been out since Monday"),
+         None, False),
+        ("get_duplicate_links", lambda _: db.get_duplicate_links(batch[:100]), None, False),
+        ("suggest_labels", lambda _: db.suggest_labels("The hostel water supply has been out since Monday"),
+         None, False),
+        ("iter_suggestion_examples", lambda _: first(db.iter_suggestion_examples()), None, False),
+        ("export_snapshot", lambda _: db.export_snapshot(snapshot_path), None, False),
+        ("snapshot.load", lambda _: Snapshot.load(snapshot_path), snapshot_complaints, False),
+        ("snapshot.group_by", lambda table: table.group_by(["department", "category", "month"]),
+         snapshot_complaints, False),
+        ("snapshot.pivot", lambda table: table.pivot(["department"], ["month"]), snapshot_complaints, False),
+        # The [instrumented] variants against the plain ones above are the cost of instrumentation
+        ("enable_instrumentation", lambda _: db.enable_instrumentation(), None, True),
+        ("get_complaint_row[instrumented]", lambda _: db.get_complaint_row(next(ids)), None, False),
+        ("get_complaint_rows[instrumented]", lambda _: db.get_complaint_rows(batch[:100]), None, False),
+        ("suggest_labels[instrumented]",
+         lambda _: db.suggest_labels("The hostel water supply has been out since Monday"), None, False),
+        ("instrumentation_snapshot", lambda _: db.instrumentation_snapshot(), None, False),
+        ("dump_instrumentation",
+         lambda _: db.dump_instrumentation(os.path.join(scratch, "instrumentation.json")), None, False),
+        ("reset_instrumentation", lambda _: db.reset_instrumentation(), None, False),
+        ("disable_instrumentation", lambda _: db.disable_instrumentation(), None, True),
+    ]
+
+    views = headless_views()
+    if views is not None:
+        teacher_view, student_view = views
+        cases += [
+            ("view.teacher_first_page",
+             lambda _: render_teacher_page(teacher_view, db, ("", "All", "All", "All", False)), clear_results, False),
+            ("view.teacher_first_page[cached]",
+             lambda _: render_teacher_page(teacher_view, db, ("", "All", "All", "All", False)), None, False),
+            ("view.teacher_first_page[search]",
+             lambda _: render_teacher_page(teacher_view, db, ("wifi", "Open", "All", "All", False)),
+             clear_results, False),
+            ("view.teacher_refresh_500",
+             lambda _: render_teacher_page(teacher_view, db, ("", "All", "All", "All", False), 500), None, False),
+            ("view.student_cards",
+             lambda _: student_view.show_complaints(db.get_user_complaints(student.id, include_archive=True)),
+             lambda: setattr(student_view, "complaint_cards", {}), False),
+            ("view.student_refresh",
+             lambda _: student_view.show_complaints(db.get_user_complaints(student.id, include_archive=True)),
+             None, False),
+        ]
+
+    cases += [
+        ("register_user",
+         lambda _: db.register_user(f"bench{next(counter)}", PASSWORD, "Student", "Bench Student",
+                                    "bench@campus.example", "Physics", f"B{next(counter):06d}"), None, False),
+        ("add_complaint", lambda _: new_complaint(), None, False),
+        ("add_response", lambda _: db.add_response(next(ids), teacher.id, "Looking into it."), None, False),
+        ("update_complaint_status", lambda _: db.update_complaint_status(next(ids), next(statuses), teacher.id),
+         None, False),
+        ("bulk_update_status", lambda _: db.bulk_update_status(batch, next(statuses), teacher.id), None, False),
+        ("delete_complaint", lambda complaint_id: db.delete_complaint(complaint_id), new_complaint, False),
+        ("add_category", lambda _: db.add_category(f"Bench {next(counter)}"), None, False),
+        ("delete_category", lambda name: db.delete_category(name),
+         lambda: (lambda name: db.add_category(name) and name)(f"Bench {next(counter)}"), False),
+        ("bulk_add_complaints", lambda records: db.bulk_add_complaints(records), import_records, False),
+        ("restore_import_maintenance", lambda _: db.restore_import_maintenance(), None, False),
+        ("rebuild_statistics", lambda _: db.rebuild_statistics(), None, False),
+        ("rebuild_sla_statistics", lambda _: db.rebuild_sla_statistics(), None, False),
+        ("link_duplicates", lambda _: db.link_duplicates(batch[1:3], batch[0]), None, False),
+        ("unlink_duplicates", lambda _: db.unlink_duplicates(batch[1:3]), None, False),
+        ("index_duplicates", lambda _: db.index_duplicates(), None, False),
+        ("rebuild_duplicate_index", lambda _: db.rebuild_duplicate_index(), None, True),
+        ("train_suggestions", lambda _: db.train_suggestions(), None, True),
+        ("prune_change_log", lambda _: db.prune_change_log(), None, False),
+        ("archive_complaints", lambda _: db.archive_complaints(older_than_days=365), None, True),
+    ]
+    return cases
+
+
+def measure(call, setup, repeat, budget):
+    """Run call(setup()) up to `repeat` times, fewer once `budget` seconds
+    have been spent; returns the timings in milliseconds"""
+    timings = []
+    spent = 0.0
+    while len(timings) < repeat and (not timings or spent < budget):
+        prepared = setup() if setup else None
+        start = time.perf_counter()
+        call(prepared)
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed * 1000)
+        spent += elapsed
+    return timings
+
+
+def seeded_database(data_dir, scale, seed):
+    """Path and seed report of the cached database for `scale`, seeding it first if needed"""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"campus-{scale}-seed{seed}-v{SCHEMA_VERSION}.db")
+    report_path = path + ".json"
+    if os.path.exists(path) and os.path.exists(report_path):
+        with open(report_path) as f:
+            return path, json.load(f)
+    for stale in (path, report_path):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+    print(f"Seeding {SCALES[scale]:,} complaints into {path}...", file=sys.stderr)
+    report = seed_database(path, SCALES[scale], seed)
+    report = {key: value for key, value in report.items() if not key.endswith("_login")}
+    with open(report_path, "w") as f:
+        json.dump(report, f)
+    return path, report
+
+
+def run_scale(scale, args):
+    source, seed_report = seeded_database(args.data_dir, scale, args.seed)
+    scratch = tempfile.mkdtemp(prefix=f"campus-bench-{scale}-")
+    path = os.path.join(scratch, "campus.db")
+    shutil.copyfile(source, path)
+
+    db = Database(path)
+    results = {}
+    try:
+        cases = build_cases(db, path, scratch, SCALES[scale], random.Random(args.seed))
+        timed = {name.partition("[")[0] for name, call, setup, once in cases}
+        not_timed = [name for name in public_methods() if name not in timed and name not in TIMED_ELSEWHERE]
+        for name, call, setup, once in cases:
+            if args.only and args.only not in name:
+                continue
+            timings = measure(call, setup, 1 if once else args.repeat, args.budget)
+            results[name] = {"median_ms": round(statistics.median(timings), 4),
+                             "min_ms": round(min(timings), 4), "runs": len(timings)}
+            print(f"  {scale:>4} {name:<36}{results[name]['median_ms']:>11.2f} ms  "
+                  f"(min {results[name]['min_ms']:.2f}, {len(timings)} runs)", file=sys.stderr)
+    finally:
+        db.close()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    for name in not_timed:
+        print(f"  warning: Database.{name} has no benchmark case", file=sys.stderr)
+    return {"complaints": SCALES[scale], "seed": seed_report, "cases": results, "not_timed": not_timed}
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new, threshold, min_ms):
+    """Cases slower than `threshold` times the old median (and by more than
+    `min_ms`, so timer noise on sub-millisecond calls does not count) are
+    regressions. Prints every case that moved either way; returns the
+    regressions as (scale, name, old_ms, new_ms).
+    """
+    regressions = []
+    print(f"\nComparing {old['meta'].get('commit')} -> {new['meta'].get('commit')} "
+          f"(threshold x{threshold:.2f}, ignoring changes under {min_ms} ms)")
+    for scale, new_scale in new["scales"].items():
+        old_cases = old["scales"].get(scale, {}).get("cases", {})
+        for name, result in new_scale["cases"].items():
+            if name not in old_cases:
+                continue
+            before = old_cases[name]["median_ms"]
+            after = result["median_ms"]
+            if abs(after - before) < min_ms:
+                continue
+            if after > before * threshold:
+                regressions.append((scale, name, before, after))
+                label = "SLOWER"
+            elif after * threshold < before:
+                label = "faster"
+            else:
+                continue
+            print(f"  {label:<7}{scale:>5} {name:<36}{before:>10.2f} -> {after:.2f} ms "
+                  f"(x{after / before if before else float('inf'):.2f})")
+    print(f"{len(regressions)} regression(s)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time every Database method on synthetic campus data")
+    parser.add_argument("--scales", default="1k,10k",
+                        help=f"comma separated, from {', '.join(SCALES)} (default 1k,10k)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per case, the median is reported")
+    parser.add_argument("--budget", type=float, default=3.0,
+                        help="seconds a case may take before it stops repeating")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--only", help="run only the cases whose name contains this")
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "campus-bench"),
+                        help="where seeded databases are kept between runs")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--results", help="compare this saved JSON instead of running the suite")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="slowdown factor that counts as a regression (default 1.25)")
+    parser.add_argument("--min-ms", type=float, default=0.5,
+                        help="ignore changes smaller than this many milliseconds")
+    args = parser.parse_args()
+
+    if args.results:
+        if not args.compare:
+            parser.error("--results needs --compare")
+        with open(args.results) as f:
+            results = json.load(f)
+    else:
+        scales = [scale.strip().lower() for scale in args.scales.split(",") if scale.strip()]
+        unknown = [scale for scale in scales if scale not in SCALES]
+        if unknown:
+            parser.error(f"unknown scale(s) {', '.join(unknown)}; choose from {', '.join(SCALES)}")
+        results = {
+            "format": RESULTS_FORMAT,
+            "meta": {"commit": git_commit(), "created": datetime.now().isoformat(timespec="seconds"),
+                     "python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                     "platform": platform.platform(), "cpus": os.cpu_count(),
+                     "repeat": args.repeat, "seed": args.seed},
+            "scales": {},
+        }
+        for scale in scales:
+            results["scales"][scale] = run_scale(scale, args)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"Wrote {args.output}", file=sys.stderr)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("format") != results.get("format"):
+            print("warning: the two result files have different formats", file=sys.stderr)
+        if compare(baseline, results, args.threshold, args.min_ms):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
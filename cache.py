@@ -0,0 +1,61 @@
+# cache.py
+import threading
+from collections import OrderedDict
+
+class LRUCache:
+    """Small thread-safe least-recently-used cache with hit/miss counters.
+
+    Keys are tuples whose first item names the kind of entry, e.g.
+    ("user", 7), so invalidate("user") drops every cached user at once.
+    None is never cached: a lookup that found nothing is retried next time.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, load):
+        """Return the cached value for `key`, calling load() on a miss"""
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+
+        value = load()
+        if value is not None:
+            self.put(key, value)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, kind=None):
+        """Drop every entry of one kind, or everything when kind is None"""
+        with self._lock:
+            if kind is None:
+                self._data.clear()
+                return
+            for key in [k for k in self._data if k[0] == kind]:
+                del self._data[key]
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
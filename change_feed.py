@@ -0,0 +1,96 @@
+# change_feed.py
+from database import CHANGE_FEED_LIMIT
+from records import Change
+
+class ChangeFeed:
+    """Polls the change_log with after() and hands new entries to the views.
+
+    Each poll asks the database thread for the entries after the last seen
+    sequence number, so an idle poll is one primary key lookup and a busy
+    one costs as much as what changed. Subscribers get the list of Change
+    records on the Tk thread. A subscriber that falls more than `limit`
+    entries behind is sent a single 'reload' change instead of the backlog.
+    """
+
+    def __init__(self, db, root, interval_ms=2000, limit=CHANGE_FEED_LIMIT):
+        self.db = db
+        self.root = root
+        self.interval_ms = interval_ms
+        self.limit = limit
+        self.subscribers = []
+        self.last_seq = None
+        self._after_id = None
+        self._stopped = False
+
+        self._start()
+
+    def subscribe(self, callback, owner=None):
+        """Call callback(changes) for new changes until `owner` is destroyed"""
+        self.subscribers.append((callback, owner))
+
+    def unsubscribe(self, callback):
+        self.subscribers = [(cb, owner) for cb, owner in self.subscribers if cb != callback]
+
+    def stop(self):
+        self._stopped = True
+        if self._after_id is not None:
+            self.root.after_cancel(self._after_id)
+            self._after_id = None
+        self.db.cancel("change-feed")
+
+    def _start(self):
+        self._after_id = None
+        # Until this succeeds there is nothing to poll from, so a failure retries it
+        self.db.submit("latest_change_seq", callback=self._started,
+                       errback=lambda error: self._schedule(self._start), key="change-feed")
+
+    def _started(self, seq):
+        self.last_seq = seq
+        self._schedule()
+
+    def _schedule(self, step=None):
+        if not self._stopped:
+            self._after_id = self.root.after(self.interval_ms, step or self._poll)
+
+    def _poll(self):
+        self._after_id = None
+        if not self.subscribers:
+            self._schedule()
+            return
+        self.db.submit("get_changes_since", self.last_seq, self.limit + 1,
+                       callback=self._deliver, errback=self._failed, key="change-feed")
+
+    def _failed(self, error):
+        # A locked or briefly unavailable database: try again next round
+        self._schedule()
+
+    def _deliver(self, changes):
+        if changes:
+            self.last_seq = changes[-1].seq
+            if len(changes) > self.limit:
+                # Too far behind: skip to the newest entry and reload
+                self.last_seq = None
+                self._skip()
+                return
+            self._notify(changes)
+        self._schedule()
+
+    def _skip(self):
+        self._after_id = None
+        self.db.submit("latest_change_seq", callback=self._skipped,
+                       errback=lambda error: self._schedule(self._skip), key="change-feed")
+
+    def _skipped(self, seq):
+        self.last_seq = seq
+        self._notify([Change(seq, "complaints", "reload", 0, None)])
+        self._schedule()
+
+    def _notify(self, changes):
+        for callback, owner in list(self.subscribers):
+            if owner is not None and not owner.winfo_exists():
+                self.unsubscribe(callback)
+                continue
+            try:
+                callback(changes)
+            except Exception as e:
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
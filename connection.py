@@ -0,0 +1,173 @@
+# connection.py
+import functools
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+class ConnectionConfig:
+    """Settings for the SQLite connections a Database opens.
+
+    WAL lets readers keep reading while a write is in progress, but it relies
+    on shared memory between the processes using the file: every client must
+    run on the same machine. For a database file on a network share, use
+    journal_mode="DELETE" (and ideally the HTTP service instead).
+    """
+
+    def __init__(self, journal_mode="WAL", synchronous="NORMAL", mmap_size=256 * 1024 * 1024,
+                 cache_size_kb=64 * 1024, temp_store="MEMORY", busy_timeout_ms=5000,
+                 readers=4, retries=5, retry_delay=0.05):
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+        self.temp_store = temp_store
+        self.busy_timeout_ms = busy_timeout_ms
+        self.readers = readers
+        self.retries = retries
+        self.retry_delay = retry_delay
+
+    def connection_pragmas(self):
+        """Per-connection settings, applied to every connection"""
+        return [
+            f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}",
+            f"PRAGMA mmap_size = {int(self.mmap_size)}",
+            f"PRAGMA cache_size = {-int(self.cache_size_kb)}",
+            f"PRAGMA temp_store = {self.temp_store}",
+        ]
+
+
+def is_busy_error(error):
+    message = str(error).lower()
+    return "database is locked" in message or "database is busy" in message
+
+
+class ConnectionPool:
+    """One serialized writer connection plus a small pool of read-only ones.
+
+    All writes go through writer(), which holds a lock so only one thread
+    writes at a time and rolls back if the block raises. Reads borrow a
+    read-only connection from reader(); with WAL these never wait for the
+    writer. In-memory databases cannot be shared between connections, so
+    there every reader() hands out the writer connection under its lock.
+
+    `attach` maps schema names to further database files that every
+    connection attaches (read-only on the readers). While `monitor` is set
+    (see instrumentation.py), both lend the connection through it.
+    """
+
+    def __init__(self, path, config=None, attach=None):
+        self.path = path
+        self.config = config or ConnectionConfig()
+        self.memory = path == ":memory:" or path.startswith("file::memory:")
+        self.attach = dict(attach or {})
+        self.monitor = None
+
+        self.write_conn = sqlite3.connect(path, check_same_thread=False)
+        self._write_lock = threading.RLock()
+        self._configure(self.write_conn)
+        for schema, attached in self.attach.items():
+            self.write_conn.execute("ATTACH DATABASE ? AS " + schema, (attached,))
+        if not self.memory:
+            for schema in ["main"] + [name for name, attached in self.attach.items() if attached != ":memory:"]:
+                self.write_conn.execute(f"PRAGMA {schema}.journal_mode = {self.config.journal_mode}")
+                self.write_conn.execute(f"PRAGMA {schema}.synchronous = {self.config.synchronous}")
+
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._open_lock = threading.Lock()
+        self._readers = []
+
+    def _configure(self, conn):
+        for pragma in self.config.connection_pragmas():
+            conn.execute(pragma)
+
+    def _open_reader(self):
+        uri = Path(self.path).resolve().as_uri() + "?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        self._configure(conn)
+        for schema, attached in self.attach.items():
+            conn.execute("ATTACH DATABASE ? AS " + schema, (Path(attached).resolve().as_uri() + "?mode=ro",))
+        self._readers.append(conn)
+        return conn
+
+    def _acquire_reader(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._open_lock:
+            if self._opened < self.config.readers:
+                self._opened += 1
+                return self._open_reader()
+        return self._idle.get()
+
+    @contextmanager
+    def reader(self):
+        if self.memory or self.config.readers <= 0:
+            with self._write_lock:
+                monitor = self.monitor
+                if monitor is None:
+                    yield self.write_conn
+                else:
+                    with monitor.lend(self.write_conn) as conn:
+                        yield conn
+            return
+
+        conn = self._acquire_reader()
+        monitor = self.monitor
+        try:
+            if monitor is None:
+                yield conn
+            else:
+                with monitor.lend(conn) as monitored:
+                    yield monitored
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    @contextmanager
+    def writer(self):
+        with self._write_lock:
+            monitor = self.monitor
+            try:
+                if monitor is None:
+                    yield self.write_conn
+                else:
+                    with monitor.lend(self.write_conn) as conn:
+                        yield conn
+            except BaseException:
+                if self.write_conn.in_transaction:
+                    self.write_conn.rollback()
+                raise
+
+    def close(self):
+        with self._write_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers = []
+            self.write_conn.close()
+
+
+def retry_on_busy(method):
+    """Re-run a Database write method when another process holds the lock.
+
+    busy_timeout already makes SQLite wait for the lock; this covers the
+    cases where it gives up immediately (e.g. a deferred read transaction
+    that needs to become a write). The method must be a single transaction
+    that is rolled back on failure, which writer() guarantees.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        config = self.pool.config
+        for attempt in range(config.retries + 1):
+            try:
+                return method(self, *args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if not is_busy_error(e) or attempt == config.retries:
+                    raise
+                time.sleep(config.retry_delay * (2 ** attempt))
+    return wrapper
@@ -1,13 +1,639 @@
 # database.py
+import csv
+import gzip
+import json
+import os
+import random
+import re
 import sqlite3
-import hashlib
+import threading
+import time
+from itertools import groupby
 from datetime import datetime
+from cache import LRUCache
+from connection import ConnectionPool, retry_on_busy
+from duplicates import (DUPLICATE_THRESHOLD, band_keys, pack_signature, signature, similarity,
+                        unpack_signature)
+from instrumentation import SLOW_QUERY_MS, Instrumentation
+from passwords import PasswordHasher
+from records import (Change, ComplaintBundle, ComplaintDetail, ComplaintSummary, DuplicateLink, DuplicateMatch,
+                     LabelSuggestion, Response, StatusChange, StudentComplaint, User)
+from sla import SLA_BUCKET_BOUNDS, SLA_METRICS, QuantileSketch, exact_summary
+from snapshot import SNAPSHOT_TABLES, TableBuilder, write_snapshot
+from suggestions import SUGGESTION_MODELS, evaluate, features, learn_examples, new_models
+
+# Dashboard counters, one row per (dimension, value), kept current by triggers
+# so get_statistics reads a handful of rows instead of scanning complaints.
+# NULL column values are counted under '' because the value is part of the key.
+STATS_DIMENSIONS = ("status", "category", "priority", "department")
+
+
+def _stats_bump(ref, column, delta):
+    dimension = column or "total"
+    value = f"IFNULL({ref}.{column}, '')" if column else "''"
+    return (f"INSERT INTO complaint_stats (dimension, value, count) VALUES ('{dimension}', {value}, {delta}) "
+            f"ON CONFLICT(dimension, value) DO UPDATE SET count = count + {delta};")
+
+
+STATS_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS complaint_stats (
+           dimension TEXT NOT NULL,
+           value TEXT NOT NULL,
+           count INTEGER NOT NULL DEFAULT 0,
+           PRIMARY KEY (dimension, value)) WITHOUT ROWID""",
+    "CREATE TRIGGER IF NOT EXISTS complaint_stats_insert AFTER INSERT ON complaints BEGIN "
+    + " ".join(_stats_bump("new", column, 1) for column in (None,) + STATS_DIMENSIONS) + " END",
+    "CREATE TRIGGER IF NOT EXISTS complaint_stats_delete AFTER DELETE ON complaints BEGIN "
+    + " ".join(_stats_bump("old", column, -1) for column in (None,) + STATS_DIMENSIONS) + " END",
+] + [
+    f"CREATE TRIGGER IF NOT EXISTS complaint_stats_update_{column} AFTER UPDATE OF {column} ON complaints "
+    f"WHEN old.{column} IS NOT new.{column} BEGIN "
+    f"{_stats_bump('old', column, -1)} {_stats_bump('new', column, 1)} END"
+    for column in STATS_DIMENSIONS
+]
+
+STATS_REBUILD = [
+    "DELETE FROM complaint_stats",
+    "INSERT INTO complaint_stats (dimension, value, count) SELECT 'total', '', COUNT(*) FROM complaints",
+] + [
+    f"""INSERT INTO complaint_stats (dimension, value, count)
+        SELECT '{column}', IFNULL({column}, ''), COUNT(*) FROM complaints WHERE true GROUP BY {column}
+        ON CONFLICT(dimension, value) DO UPDATE SET count = count + excluded.count"""
+    for column in STATS_DIMENSIONS
+]
+
+# Change feed: every write to a complaint, its responses or its history appends
+# a row here, so clients sharing the file can ask "what changed since seq N"
+# instead of re-reading the listings. user_id is the complaint's owner, which
+# lets a student's view pick out its own changes. op 'reload' (complaint_id 0)
+# means too much changed to follow row by row, e.g. after a bulk import.
+def _change_log_trigger(name, event, table, ref, complaint_id, user_id, op):
+    return (f"CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON {table} BEGIN "
+            f"INSERT INTO change_log (table_name, op, complaint_id, user_id) "
+            f"VALUES ('{table}', '{op}', {ref}.{complaint_id}, {user_id}); END")
+
+
+_COMPLAINT_OWNER = "(SELECT user_id FROM complaints WHERE id = {ref}.complaint_id)"
+
+CHANGE_LOG_TRIGGERS = {
+    "change_log_complaints_insert": _change_log_trigger(
+        "change_log_complaints_insert", "INSERT", "complaints", "new", "id", "new.user_id", "insert"),
+    "change_log_complaints_update": _change_log_trigger(
+        "change_log_complaints_update", "UPDATE", "complaints", "new", "id", "new.user_id", "update"),
+    "change_log_complaints_delete": _change_log_trigger(
+        "change_log_complaints_delete", "DELETE", "complaints", "old", "id", "old.user_id", "delete"),
+    "change_log_responses_insert": _change_log_trigger(
+        "change_log_responses_insert", "INSERT", "complaint_responses", "new", "complaint_id",
+        _COMPLAINT_OWNER.format(ref="new"), "insert"),
+    "change_log_responses_delete": _change_log_trigger(
+        "change_log_responses_delete", "DELETE", "complaint_responses", "old", "complaint_id",
+        _COMPLAINT_OWNER.format(ref="old"), "delete"),
+    "change_log_history_insert": _change_log_trigger(
+        "change_log_history_insert", "INSERT", "status_history", "new", "complaint_id",
+        _COMPLAINT_OWNER.format(ref="new"), "insert"),
+}
+
+CHANGE_LOG_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS change_log (
+           seq INTEGER PRIMARY KEY AUTOINCREMENT,
+           table_name TEXT NOT NULL,
+           op TEXT NOT NULL,
+           complaint_id INTEGER NOT NULL,
+           user_id INTEGER,
+           changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""",
+] + list(CHANGE_LOG_TRIGGERS.values())
+
+# Entries kept when the change log is pruned on startup; a client that has
+# been away for longer than that reloads instead of replaying
+CHANGE_LOG_KEEP = 50000
+CHANGE_FEED_LIMIT = 1000
+
+# Service levels. complaint_lifecycle holds, per complaint, when it was first
+# answered (a response or a status change, whichever came first) and when it
+# was resolved, with the sla.py bucket each duration falls in. Triggers on
+# complaint_responses and status_history fill it in as transitions are
+# written, and triggers on it keep sla_sketch, the bucket counts per scope, in
+# step. A complaint reopened after being resolved drops out of the resolution
+# counts until it is resolved again. Archived complaints keep their row, so
+# the nightly archive run does not change the figures; deleting a complaint
+# removes it.
+SLA_FINISHED = "('Resolved', 'Closed')"
+# Weeks get_sla_statistics() reports one by one
+SLA_TREND_WEEKS = 12
+
+# scope -> the columns its counts are grouped by; the others hold ''
+SLA_SCOPES = {
+    "all": (),
+    "category": ("category",),
+    "department": ("department",),
+    "week": ("week",),
+    "cell": ("category", "department", "week"),
+}
+SLA_COLUMNS = ("category", "department", "week")
+
+
+def _sla_week(ref):
+    """Monday of the week `ref` falls in"""
+    return f"date({ref}, 'weekday 0', '-6 days')"
+
+
+def _sla_bucket(at):
+    seconds = f"MAX((julianday({at}) - julianday(complaint_lifecycle.submitted_at)) * 86400, 0)"
+    return f"(SELECT bucket FROM sla_buckets WHERE upper_secs >= {seconds} ORDER BY upper_secs LIMIT 1)"
+
+
+def _sla_bump(metric, ref, delta):
+    statements = []
+    for scope, columns in SLA_SCOPES.items():
+        values = ", ".join(f"{ref}.{column}" if column in columns else "''" for column in SLA_COLUMNS)
+        statements.append(
+            f"INSERT INTO sla_sketch (metric, scope, category, department, week, bucket, count) "
+            f"SELECT '{metric}', '{scope}', {values}, {ref}.{metric}_bucket, {delta} "
+            f"WHERE {ref}.{metric}_bucket IS NOT NULL "
+            f"ON CONFLICT(metric, scope, category, department, week, bucket) DO UPDATE SET count = count + {delta};")
+    return " ".join(statements)
+
+
+SLA_TRIGGERS = {
+    "sla_complaints_insert": f"""CREATE TRIGGER IF NOT EXISTS sla_complaints_insert
+                   AFTER INSERT ON complaints BEGIN
+                       INSERT OR IGNORE INTO complaint_lifecycle (complaint_id, category, department, week, submitted_at)
+                       VALUES (new.id, IFNULL(new.category, ''), new.department, {_sla_week("new.submitted_at")},
+                               new.submitted_at);
+                   END""",
+    "sla_complaints_delete": """CREATE TRIGGER IF NOT EXISTS sla_complaints_delete
+                   AFTER DELETE ON complaints BEGIN
+                       DELETE FROM complaint_lifecycle WHERE complaint_id = old.id AND archived = 0;
+                   END""",
+    "sla_responses_insert": f"""CREATE TRIGGER IF NOT EXISTS sla_responses_insert
+                   AFTER INSERT ON complaint_responses BEGIN
+                       UPDATE complaint_lifecycle SET first_response_at = new.responded_at,
+                                                      first_response_bucket = {_sla_bucket("new.responded_at")}
+                       WHERE complaint_id = new.complaint_id AND first_response_at IS NULL;
+                   END""",
+    "sla_history_insert": f"""CREATE TRIGGER IF NOT EXISTS sla_history_insert
+                   AFTER INSERT ON status_history BEGIN
+                       UPDATE complaint_lifecycle SET first_response_at = new.changed_at,
+                                                      first_response_bucket = {_sla_bucket("new.changed_at")}
+                       WHERE complaint_id = new.complaint_id AND first_response_at IS NULL;
+                       UPDATE complaint_lifecycle SET resolved_at = new.changed_at,
+                                                      resolution_bucket = {_sla_bucket("new.changed_at")}
+                       WHERE complaint_id = new.complaint_id AND resolved_at IS NULL
+                       AND new.new_status IN {SLA_FINISHED};
+                       UPDATE complaint_lifecycle SET resolved_at = NULL, resolution_bucket = NULL
+                       WHERE complaint_id = new.complaint_id AND resolved_at IS NOT NULL
+                       AND new.new_status NOT IN {SLA_FINISHED};
+                   END""",
+    "sla_lifecycle_delete": f"""CREATE TRIGGER IF NOT EXISTS sla_lifecycle_delete
+                   AFTER DELETE ON complaint_lifecycle BEGIN
+                       {" ".join(_sla_bump(metric, "old", -1) for metric in SLA_METRICS)}
+                   END""",
+}
+SLA_TRIGGERS.update({
+    f"sla_{metric}_sketch": f"""CREATE TRIGGER IF NOT EXISTS sla_{metric}_sketch
+                   AFTER UPDATE OF {metric}_bucket ON complaint_lifecycle
+                   WHEN old.{metric}_bucket IS NOT new.{metric}_bucket BEGIN
+                       {_sla_bump(metric, "old", -1)} {_sla_bump(metric, "new", 1)}
+                   END"""
+    for metric in SLA_METRICS
+})
+
+SLA_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS sla_buckets (
+           bucket INTEGER PRIMARY KEY,
+           upper_secs REAL NOT NULL UNIQUE)""",
+    "INSERT OR IGNORE INTO sla_buckets (bucket, upper_secs) VALUES "
+    + ", ".join(f"({bucket}, {upper!r})" for bucket, upper in enumerate(SLA_BUCKET_BOUNDS)),
+    """CREATE TABLE IF NOT EXISTS complaint_lifecycle (
+           complaint_id INTEGER PRIMARY KEY,
+           category TEXT NOT NULL,
+           department TEXT NOT NULL,
+           week TEXT NOT NULL,
+           submitted_at TIMESTAMP,
+           first_response_at TIMESTAMP,
+           resolved_at TIMESTAMP,
+           first_response_bucket INTEGER,
+           resolution_bucket INTEGER,
+           archived INTEGER NOT NULL DEFAULT 0)""",
+    """CREATE TABLE IF NOT EXISTS sla_sketch (
+           metric TEXT NOT NULL,
+           scope TEXT NOT NULL,
+           category TEXT NOT NULL,
+           department TEXT NOT NULL,
+           week TEXT NOT NULL,
+           bucket INTEGER NOT NULL,
+           count INTEGER NOT NULL DEFAULT 0,
+           PRIMARY KEY (metric, scope, category, department, week, bucket)) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_sla_sketch_week ON sla_sketch(scope, week)",
+] + list(SLA_TRIGGERS.values())
+
+# Lifecycle rows for complaints written without the triggers (existing files,
+# deferred imports), worked out from their responses and history. Setting the
+# buckets fires the sketch triggers, which count them in.
+SLA_LIFECYCLE_SELECT = f"""SELECT c.id AS complaint_id, IFNULL(c.category, '') AS category,
+           c.department AS department, {_sla_week("c.submitted_at")} AS week, c.submitted_at AS submitted_at,
+           (SELECT MIN(at) FROM (SELECT MIN(responded_at) AS at FROM {{schema}}.complaint_responses
+                                 WHERE complaint_id = c.id
+                                 UNION ALL
+                                 SELECT MIN(changed_at) FROM {{schema}}.status_history WHERE complaint_id = c.id))
+               AS first_response_at,
+           CASE WHEN c.status IN {SLA_FINISHED} THEN
+               (SELECT MAX(changed_at) FROM {{schema}}.status_history h
+                WHERE h.complaint_id = c.id AND h.new_status IN {SLA_FINISHED}
+                AND (h.old_status IS NULL OR h.old_status NOT IN {SLA_FINISHED}))
+           END AS resolved_at
+    FROM {{schema}}.complaints c"""
+
+SLA_BACKFILL = [
+    f"""INSERT OR IGNORE INTO complaint_lifecycle
+            (complaint_id, category, department, week, submitted_at, first_response_at, resolved_at)
+        {SLA_LIFECYCLE_SELECT.format(schema="main")}""",
+    f"""UPDATE complaint_lifecycle SET first_response_bucket = {_sla_bucket("complaint_lifecycle.first_response_at")}
+        WHERE first_response_at IS NOT NULL AND first_response_bucket IS NULL""",
+    f"""UPDATE complaint_lifecycle SET resolution_bucket = {_sla_bucket("complaint_lifecycle.resolved_at")}
+        WHERE resolved_at IS NOT NULL AND resolution_bucket IS NULL""",
+]
+
+SLA_REBUILD = ["DELETE FROM sla_sketch"] + [
+    f"""INSERT INTO sla_sketch (metric, scope, category, department, week, bucket, count)
+        SELECT '{metric}', '{scope}', {", ".join(column if column in columns else "''" for column in SLA_COLUMNS)},
+               {metric}_bucket, COUNT(*) FROM complaint_lifecycle
+        WHERE {metric}_bucket IS NOT NULL GROUP BY {"".join(column + ", " for column in columns)}{metric}_bucket"""
+    for metric in SLA_METRICS for scope, columns in SLA_SCOPES.items()
+]
+
+# Near-duplicate detection (see duplicates.py). complaint_minhash holds the
+# signature and complaint_lsh the band keys of every Open or In Progress
+# complaint; both are written from Python, as SQL cannot compute them, and
+# triggers drop a complaint from them once it is resolved, closed or deleted.
+# complaint_duplicates links a complaint to the one it duplicates; clusters
+# are kept one level deep, every member pointing at the same complaint.
+DUPLICATE_STATUSES = ("Open", "In Progress")
+_DUPLICATE_STATUS_LIST = "('Open', 'In Progress')"
+
+# Candidates whose signatures are compared per lookup, most shared bands first
+DUPLICATE_CANDIDATES = 200
+
+DUPLICATE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS complaint_minhash (
+           complaint_id INTEGER PRIMARY KEY,
+           signature BLOB NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS complaint_lsh (
+           band_key INTEGER NOT NULL,
+           complaint_id INTEGER NOT NULL,
+           PRIMARY KEY (band_key, complaint_id)) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS idx_complaint_lsh_complaint ON complaint_lsh(complaint_id)",
+    """CREATE TABLE IF NOT EXISTS complaint_duplicates (
+           complaint_id INTEGER PRIMARY KEY,
+           duplicate_of INTEGER NOT NULL,
+           linked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""",
+    "CREATE INDEX IF NOT EXISTS idx_complaint_duplicates_of ON complaint_duplicates(duplicate_of)",
+    f"""CREATE TRIGGER IF NOT EXISTS duplicates_status_update
+           AFTER UPDATE OF status ON complaints WHEN new.status NOT IN {_DUPLICATE_STATUS_LIST} BEGIN
+               DELETE FROM complaint_lsh WHERE complaint_id = new.id;
+               DELETE FROM complaint_minhash WHERE complaint_id = new.id;
+           END""",
+    """CREATE TRIGGER IF NOT EXISTS duplicates_complaints_delete
+           AFTER DELETE ON complaints BEGIN
+               DELETE FROM complaint_lsh WHERE complaint_id = old.id;
+               DELETE FROM complaint_minhash WHERE complaint_id = old.id;
+           END""",
+    # Linking shows up in other teachers' lists through the change feed
+    _change_log_trigger("change_log_duplicates_insert", "INSERT", "complaint_duplicates", "new", "complaint_id",
+                        _COMPLAINT_OWNER.format(ref="new"), "update"),
+    _change_log_trigger("change_log_duplicates_update", "UPDATE", "complaint_duplicates", "new", "complaint_id",
+                        _COMPLAINT_OWNER.format(ref="new"), "update"),
+    _change_log_trigger("change_log_duplicates_delete", "DELETE", "complaint_duplicates", "old", "complaint_id",
+                        _COMPLAINT_OWNER.format(ref="old"), "update"),
+]
+
+# Category and priority suggestions (suggestions.py). suggestion_labels and
+# suggestion_features hold the counts of each model; a complaint is learned
+# from once, when a teacher first moves it on from Open, and
+# suggestion_learned records the model version that learned it. Every
+# process keeps the models in memory and catches up with the complaints
+# learned since its copy; trained_version moves only when they are retrained
+# from scratch, which calls for a full reload. suggestion_models keeps how
+# each model scored when last trained; one that does no better than the most
+# common label is not suggested.
+SUGGESTION_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS suggestion_models (
+           model TEXT PRIMARY KEY,
+           accuracy REAL,
+           baseline REAL,
+           evaluated INTEGER NOT NULL DEFAULT 0)""",
+    """CREATE TABLE IF NOT EXISTS suggestion_labels (
+           model TEXT NOT NULL,
+           label TEXT NOT NULL,
+           documents INTEGER NOT NULL,
+           tokens INTEGER NOT NULL,
+           PRIMARY KEY (model, label)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS suggestion_features (
+           model TEXT NOT NULL,
+           label TEXT NOT NULL,
+           feature INTEGER NOT NULL,
+           count INTEGER NOT NULL,
+           PRIMARY KEY (model, label, feature)) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS suggestion_learned (
+           complaint_id INTEGER PRIMARY KEY,
+           version INTEGER NOT NULL)""",
+    "CREATE INDEX IF NOT EXISTS idx_suggestion_learned_version ON suggestion_learned(version)",
+    """CREATE TABLE IF NOT EXISTS suggestion_state (
+           id INTEGER PRIMARY KEY CHECK (id = 1),
+           version INTEGER NOT NULL,
+           trained_version INTEGER NOT NULL,
+           trained_at TIMESTAMP)""",
+    "INSERT OR IGNORE INTO suggestion_state (id, version, trained_version) VALUES (1, 0, 0)",
+]
+
+# Training examples scored by train_suggestions, picked at random
+SUGGESTION_EVALUATION_SAMPLE = 2000
+
+# Schema migrations, applied in order on startup and tracked in PRAGMA user_version.
+# Version 1 adds the secondary indexes behind the complaint listings, the
+# per-student lookup and the per-complaint response/history reads.
+# Version 2 adds the trigger-maintained complaint_stats table.
+# Version 3 records who last changed a complaint's status on the row itself, so
+# a trigger can write status_history and a status change is one UPDATE.
+# Version 4 adds the change_log table behind the live change feed.
+# Version 5 adds the complaint lifecycle and service-level sketches.
+# Version 6 adds the near-duplicate index and duplicate links; init_db fills
+# the index for the complaints already open.
+# Version 7 adds the suggestion models; init_db trains them on the complaints
+# teachers have already handled.
+# Version 8 indexes roll numbers, so a search for part of one scans the index
+# rather than the complaints table.
+MIGRATIONS = {
+    1: [
+        "CREATE INDEX IF NOT EXISTS idx_complaints_submitted ON complaints(submitted_at)",
+        "CREATE INDEX IF NOT EXISTS idx_complaints_status ON complaints(status, submitted_at)",
+        "CREATE INDEX IF NOT EXISTS idx_complaints_category ON complaints(category, submitted_at)",
+        "CREATE INDEX IF NOT EXISTS idx_complaints_priority ON complaints(priority, submitted_at)",
+        "CREATE INDEX IF NOT EXISTS idx_complaints_department ON complaints(department)",
+        "CREATE INDEX IF NOT EXISTS idx_complaints_user ON complaints(user_id, submitted_at)",
+        "CREATE INDEX IF NOT EXISTS idx_responses_complaint ON complaint_responses(complaint_id, responded_at)",
+        "CREATE INDEX IF NOT EXISTS idx_status_history_complaint ON status_history(complaint_id, changed_at)",
+    ],
+    2: STATS_SCHEMA + STATS_REBUILD,
+    3: [
+        "ALTER TABLE complaints ADD COLUMN status_changed_by INTEGER",
+        """CREATE TRIGGER IF NOT EXISTS complaints_status_history
+               AFTER UPDATE OF status ON complaints BEGIN
+                   INSERT INTO status_history (complaint_id, old_status, new_status, changed_by)
+                   VALUES (new.id, old.status, new.status, IFNULL(new.status_changed_by, new.user_id));
+               END""",
+    ],
+    4: CHANGE_LOG_SCHEMA,
+    5: SLA_SCHEMA + SLA_BACKFILL,
+    6: DUPLICATE_SCHEMA,
+    7: SUGGESTION_SCHEMA,
+    8: ["CREATE INDEX IF NOT EXISTS idx_complaints_roll_no ON complaints(roll_no)"],
+}
+
+SCHEMA_VERSION = max(MIGRATIONS)
+
+# Full-text index over the searchable complaint columns. It is an external
+# content table, so the text lives only in `complaints` and the triggers keep
+# the index in step with every insert, update and delete.
+FTS_TABLE = """CREATE VIRTUAL TABLE IF NOT EXISTS complaints_fts USING fts5(
+                   complaint, name, roll_no,
+                   content='complaints', content_rowid='id')"""
+
+FTS_TRIGGERS = {
+    "complaints_fts_insert": """CREATE TRIGGER IF NOT EXISTS complaints_fts_insert
+                   AFTER INSERT ON complaints BEGIN
+                       INSERT INTO complaints_fts(rowid, complaint, name, roll_no)
+                       VALUES (new.id, new.complaint, new.name, new.roll_no);
+                   END""",
+    "complaints_fts_delete": """CREATE TRIGGER IF NOT EXISTS complaints_fts_delete
+                   AFTER DELETE ON complaints BEGIN
+                       INSERT INTO complaints_fts(complaints_fts, rowid, complaint, name, roll_no)
+                       VALUES ('delete', old.id, old.complaint, old.name, old.roll_no);
+                   END""",
+    "complaints_fts_update": """CREATE TRIGGER IF NOT EXISTS complaints_fts_update
+                   AFTER UPDATE OF complaint, name, roll_no ON complaints BEGIN
+                       INSERT INTO complaints_fts(complaints_fts, rowid, complaint, name, roll_no)
+                       VALUES ('delete', old.id, old.complaint, old.name, old.roll_no);
+                       INSERT INTO complaints_fts(rowid, complaint, name, roll_no)
+                       VALUES (new.id, new.complaint, new.name, new.roll_no);
+                   END""",
+}
+
+# Cold storage for finished complaints. archive_complaints() moves them, with
+# their responses and status history, into a second database file attached
+# to every connection as `archive`; ids are kept, so a complaint lives in
+# exactly one of the two files (AUTOINCREMENT never hands an id out twice).
+ARCHIVE_STATUSES = ("Resolved", "Closed")
+ARCHIVE_BATCH_SIZE = 500
+
+ARCHIVE_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS archive.complaints (
+           id INTEGER PRIMARY KEY,
+           user_id INTEGER NOT NULL,
+           name TEXT NOT NULL,
+           roll_no TEXT,
+           department TEXT NOT NULL,
+           course TEXT NOT NULL,
+           gender TEXT NOT NULL,
+           complaint TEXT NOT NULL,
+           category TEXT,
+           priority TEXT,
+           status TEXT,
+           submitted_at TIMESTAMP,
+           updated_at TIMESTAMP,
+           archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)""",
+    """CREATE TABLE IF NOT EXISTS archive.complaint_responses (
+           id INTEGER PRIMARY KEY,
+           complaint_id INTEGER NOT NULL,
+           responder_id INTEGER NOT NULL,
+           response TEXT NOT NULL,
+           responded_at TIMESTAMP)""",
+    """CREATE TABLE IF NOT EXISTS archive.status_history (
+           id INTEGER PRIMARY KEY,
+           complaint_id INTEGER NOT NULL,
+           old_status TEXT,
+           new_status TEXT NOT NULL,
+           changed_by INTEGER NOT NULL,
+           changed_at TIMESTAMP)""",
+    """CREATE TABLE IF NOT EXISTS archive.complaint_stats (
+           dimension TEXT NOT NULL,
+           value TEXT NOT NULL,
+           count INTEGER NOT NULL DEFAULT 0,
+           PRIMARY KEY (dimension, value)) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS archive.idx_complaints_submitted ON complaints(submitted_at)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_complaints_status ON complaints(status, submitted_at)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_complaints_category ON complaints(category, submitted_at)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_complaints_priority ON complaints(priority, submitted_at)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_complaints_user ON complaints(user_id, submitted_at)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_complaints_roll_no ON complaints(roll_no)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_responses_complaint ON complaint_responses(complaint_id, responded_at)",
+    "CREATE INDEX IF NOT EXISTS archive.idx_status_history_complaint ON status_history(complaint_id, changed_at)",
+]
+
+ARCHIVE_FTS_TABLE = """CREATE VIRTUAL TABLE IF NOT EXISTS archive.complaints_fts USING fts5(
+                           complaint, name, roll_no,
+                           content='complaints', content_rowid='id')"""
+
+COMPLAINT_COLUMNS = ("id, user_id, name, roll_no, department, course, gender, complaint, "
+                     "category, priority, status, submitted_at, updated_at")
+
+
+def archive_path_for(dbname):
+    """Default archive file: college_complaints.db -> college_complaints_archive.db"""
+    if dbname == ":memory:":
+        return ":memory:"
+    root, ext = os.path.splitext(dbname)
+    return f"{root}_archive{ext or '.db'}"
+
+
+# Column headings of the CSV export, in query order
+EXPORT_HEADER = ['ID', 'Name', 'Roll No', 'Department', 'Course', 'Gender',
+                 'Complaint', 'Category', 'Priority', 'Status', 'Submitted At']
+
+EXPORT_BATCH_SIZE = 1000
+
+# Columns of export_snapshot, in snapshot.SNAPSHOT_TABLES order. Timestamps
+# become epoch seconds; durations come from main.complaint_lifecycle, which
+# also covers archived complaints.
+SNAPSHOT_COMPLAINTS_SELECT = """SELECT c.id, c.user_id, IFNULL(CAST(strftime('%s', c.submitted_at) AS INTEGER), 0),
+           IFNULL(CAST(strftime('%s', c.updated_at) AS INTEGER), 0), IFNULL(c.department, ''),
+           IFNULL(c.category, ''), IFNULL(c.priority, ''), IFNULL(c.status, ''), IFNULL(c.course, ''),
+           IFNULL(c.gender, ''), {archived},
+           MAX((julianday(l.first_response_at) - julianday(l.submitted_at)) * 86400, 0),
+           MAX((julianday(l.resolved_at) - julianday(l.submitted_at)) * 86400, 0)
+    FROM {schema}.complaints c LEFT JOIN main.complaint_lifecycle l ON l.complaint_id = c.id"""
+
+SNAPSHOT_TRANSITIONS_SELECT = """SELECT h.complaint_id, IFNULL(h.old_status, ''), h.new_status, h.changed_by,
+           IFNULL(CAST(strftime('%s', h.changed_at) AS INTEGER), 0), IFNULL(c.department, ''),
+           IFNULL(c.category, ''), IFNULL(c.priority, '')
+    FROM {schema}.status_history h JOIN {schema}.complaints c ON c.id = h.complaint_id"""
+
+# Rows per fetchmany() while a snapshot is read
+SNAPSHOT_BATCH_SIZE = 50_000
+
+# Complaint ids per UPDATE in bulk_update_status
+BULK_UPDATE_CHUNK = 500
+
+
+class ExportCancelled(Exception):
+    """Raised by Database.export_complaints when its cancel event is set"""
+
+
+# Entries kept by Database.lookups: the category list and user rows, which
+# the complaint, response and history reads attach names to
+LOOKUP_CACHE_SIZE = 2048
+
+# Database.results keeps the id lists of recent listings and searches, so
+# going back to a filter combination seen before skips the query. Only the
+# first RESULT_CACHE_MAX_IDS ids of a listing are kept; scrolling past them
+# continues with the uncached paging.
+RESULT_CACHE_SIZE = 64
+RESULT_CACHE_MAX_IDS = 5000
+
+# Bulk import (bulk_add_complaints). Records are dicts keyed by complaint
+# column; CSV files may use either those names or the export headings.
+IMPORT_BATCH_SIZE = 5000
+
+IMPORT_COLUMNS = ("user_id", "name", "roll_no", "department", "course", "gender",
+                  "complaint", "category", "priority", "status", "submitted_at")
+
+IMPORT_REQUIRED = ("name", "department", "course", "gender", "complaint")
+
+PRIORITIES = ("Low", "Medium", "High", "Critical")
+STATUSES = ("Open", "In Progress", "Resolved", "Closed")
+
+# What a deferred import drops and puts back: the complaint listing indexes
+# and the per-row insert triggers, which are rebuilt in one pass at the end
+IMPORT_DEFERRED_INDEXES = [sql for sql in MIGRATIONS[1] + MIGRATIONS[8] if " ON complaints(" in sql]
+IMPORT_DEFERRED_TRIGGERS = ("complaints_fts_insert", "complaint_stats_insert", "change_log_complaints_insert",
+                            "sla_complaints_insert")
+
+
+class ImportReport:
+    """Outcome of a bulk_add_complaints run"""
+    
+    def __init__(self):
+        self.inserted = 0
+        self.rejected = []
+        self.batches = []
+        self.seconds = 0.0
+    
+    def reject(self, line, reason, record):
+        self.rejected.append((line, reason, record))
+    
+    @property
+    def rows_per_sec(self):
+        return self.inserted / self.seconds if self.seconds else 0.0
+
+
+def iter_import_records(path, format=None):
+    """Yield complaint records from a .csv or .jsonl file (optionally .gz).
+    
+    CSV headings are matched case-insensitively with spaces read as
+    underscores, so a file written by export_complaints imports as-is.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    if format is None:
+        format = "jsonl" if path.removesuffix(".gz").endswith((".jsonl", ".json")) else "csv"
+    
+    with opener(path, "rt", newline="", encoding="utf-8") as f:
+        if format == "jsonl":
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            reader = csv.reader(f)
+            header = [h.strip().lower().replace(" ", "_") for h in next(reader, [])]
+            for row in reader:
+                yield dict(zip(header, row))
+
+
+SEARCH_TOKENS = re.compile(r'"([^"]*)"|(\S+)')
+
+
+def build_fts_query(text):
+    """Translate Search box input into an FTS5 MATCH expression.
+    
+    "quoted text" becomes a phrase query and every other word is matched as a
+    prefix, so partially typed names and roll numbers still find their rows.
+    Returns None when the input has nothing searchable in it.
+    """
+    terms = []
+    for phrase, word in SEARCH_TOKENS.findall(text or ""):
+        if phrase:
+            words = re.findall(r"\w+", phrase)
+            if words:
+                terms.append('"' + " ".join(words) + '"')
+        else:
+            for part in re.findall(r"\w+", word):
+                terms.append(f'"{part}"*')
+    return " ".join(terms) or None
 
 class Database:
-    def __init__(self, dbname="college_complaints.db"):
-        self.conn = sqlite3.connect(dbname, check_same_thread=False)
+    def __init__(self, dbname="college_complaints.db", config=None, cache_size=LOOKUP_CACHE_SIZE,
+                 archive=None, hasher=None):
+        self.dbname = dbname
+        self.hasher = hasher or PasswordHasher()
+        self.archive_path = archive_path_for(dbname) if archive is None else archive
+        self.pool = ConnectionPool(dbname, config,
+                                   attach={"archive": self.archive_path} if self.archive_path else None)
+        self.lookups = LRUCache(cache_size)
+        self.results = LRUCache(RESULT_CACHE_SIZE)
+        self._results_version = None
+        # The suggestion models and the suggestion_state version they reflect
+        self._suggesters = None
+        self._suggesters_version = None
+        self._suggestion_lock = threading.Lock()
+        # Set by enable_instrumentation()
+        self.instrumentation = None
+        self.fts_enabled = False
         self.init_db()
     
+    @property
+    def conn(self):
+        """The writer connection; schema setup and maintenance run on it"""
+        return self.pool.write_conn
+    
     def init_db(self):
         c = self.conn.cursor()
         
@@ -86,65 +712,334 @@ class Database:
             except sqlite3.IntegrityError:
                 pass
         
-        # Create default admin account
-        admin_hash = hashlib.sha256("admin123".encode()).hexdigest()
-        try:
+        # Create default admin account; hashing is slow, so only when it is missing
+        c.execute("SELECT 1 FROM users WHERE username='admin'")
+        if c.fetchone() is None:
             c.execute("""INSERT INTO users (username, password_hash, role, full_name, email, department) 
                         VALUES (?, ?, ?, ?, ?, ?)""", 
-                     ("admin", admin_hash, "Teacher", "Administrator", "admin@college.edu", "Administration"))
-        except sqlite3.IntegrityError:
-            pass
+                     ("admin", self.hash_password("admin123"), "Teacher", "Administrator",
+                      "admin@college.edu", "Administration"))
         
         self.conn.commit()
+        
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        self.migrate()
+        self.init_search_index()
+        self.restore_import_maintenance()
+        self.init_archive()
+        self.prune_change_log()
+        if version < 6:
+            # The duplicate index is new in version 6: fill it for the complaints already open
+            self.index_duplicates()
+        if version < 7:
+            self.train_suggestions()
     
-    def hash_password(self, password):
-        return hashlib.sha256(password.encode()).hexdigest()
+    def migrate(self):
+        """Bring an existing database file up to SCHEMA_VERSION"""
+        c = self.conn.cursor()
+        version = c.execute("PRAGMA user_version").fetchone()[0]
+        
+        for target in sorted(MIGRATIONS):
+            if target <= version:
+                continue
+            for statement in MIGRATIONS[target]:
+                c.execute(statement)
+            c.execute(f"PRAGMA user_version = {target}")
+            self.conn.commit()
+            version = target
+        
+        return version
     
-    # User Management
-    def register_user(self, username, password, role, full_name, email, department, roll_no=None):
+    def init_search_index(self):
+        """Create the FTS5 search index, or fall back to LIKE search without it"""
         c = self.conn.cursor()
-        password_hash = self.hash_password(password)
         try:
-            c.execute("""INSERT INTO users (username, password_hash, role, full_name, email, department, roll_no) 
-                        VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                     (username, password_hash, role, full_name, email, department, roll_no))
+            c.execute(FTS_TABLE)
+        except sqlite3.OperationalError:
+            # SQLite built without FTS5: the triggers would make every write
+            # to complaints fail, so drop any left behind by another build
+            for name in FTS_TRIGGERS:
+                c.execute(f"DROP TRIGGER IF EXISTS {name}")
             self.conn.commit()
-            return True, "Registration successful!"
-        except sqlite3.IntegrityError:
-            return False, "Username already exists!"
+            self.fts_enabled = False
+            return False
+        
+        existing = {row[0] for row in c.execute(
+            "SELECT name FROM sqlite_master WHERE type='trigger' AND name LIKE 'complaints_fts_%'")}
+        for sql in FTS_TRIGGERS.values():
+            c.execute(sql)
+        
+        # A missing trigger means rows were written without updating the index
+        if existing != set(FTS_TRIGGERS):
+            c.execute("INSERT INTO complaints_fts(complaints_fts) VALUES ('rebuild')")
+        
+        self.conn.commit()
+        self.fts_enabled = True
+        return True
     
-    def authenticate_user(self, username, password, role):
+    def init_archive(self):
+        """Create the archive tables in the attached archive file"""
+        if not self.archive_path:
+            return
         c = self.conn.cursor()
+        for statement in ARCHIVE_SCHEMA:
+            c.execute(statement)
+        if self.fts_enabled:
+            c.execute(ARCHIVE_FTS_TABLE)
+        self.conn.commit()
+    
+    def _schemas(self, include_archive):
+        return ("main", "archive") if include_archive and self.archive_path else ("main",)
+    
+    def hash_password(self, password):
+        return self.hasher.hash(password)
+    
+    # User Management
+    @retry_on_busy
+    def register_user(self, username, password, role, full_name, email, department, roll_no=None):
         password_hash = self.hash_password(password)
-        c.execute("SELECT * FROM users WHERE username=? AND password_hash=? AND role=?", 
-                 (username, password_hash, role))
-        user = c.fetchone()
-        return user
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            try:
+                c.execute("""INSERT INTO users (username, password_hash, role, full_name, email, department, roll_no) 
+                            VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                         (username, password_hash, role, full_name, email, department, roll_no))
+                conn.commit()
+                self.lookups.invalidate("user")
+                return True, "Registration successful!"
+            except sqlite3.IntegrityError:
+                return False, "Username already exists!"
+    
+    def authenticate_user(self, username, password, role):
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.execute("SELECT id, password_hash FROM users WHERE username=? AND role=?", (username, role))
+            row = c.fetchone()
+        
+        # The hash is slow on purpose; no connection is held while it runs
+        stored = row[1] if row else None
+        if not self.hasher.verify(password, stored):
+            return None
+        if self.hasher.needs_rehash(stored):
+            self._upgrade_password_hash(row[0], stored, password)
+        return self.get_user_by_id(row[0])
+    
+    def _upgrade_password_hash(self, user_id, old_hash, password):
+        """Store a hash with the current algorithm and cost after a successful login"""
+        new_hash = self.hash_password(password)
+        try:
+            self._replace_password_hash(user_id, old_hash, new_hash)
+        except sqlite3.OperationalError:
+            # Still locked after the retries: the old hash keeps working and
+            # is upgraded at a later login
+            pass
+    
+    @retry_on_busy
+    def _replace_password_hash(self, user_id, old_hash, new_hash):
+        with self.pool.writer() as conn:
+            # Only if nobody changed the password since it was read
+            conn.execute("UPDATE users SET password_hash=? WHERE id=? AND password_hash=?",
+                         (new_hash, user_id, old_hash))
+            conn.commit()
     
     def get_user_by_id(self, user_id):
-        c = self.conn.cursor()
-        c.execute("SELECT * FROM users WHERE id=?", (user_id,))
-        return c.fetchone()
+        return self.lookups.get(("user", user_id), lambda: self._load_user(user_id))
+    
+    def _load_user(self, user_id):
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.row_factory = User.from_row
+            c.execute(f"SELECT {User.COLUMNS} FROM users WHERE id=?", (user_id,))
+            return c.fetchone()
+    
+    def _with_user(self, rows, record, user_column, fields):
+        """Build `record`s from raw rows plus user attributes, as the old JOIN
+        users did. Rows whose user no longer exists are dropped, like an inner join.
+        """
+        result = []
+        for row in rows:
+            user = self.get_user_by_id(row[user_column])
+            if user is not None:
+                result.append(record(*row, *(getattr(user, name) for name in fields)))
+        return result
     
     # Complaint Management
-    def add_complaint(self, user_id, name, roll_no, department, course, gender, complaint, category, priority):
-        c = self.conn.cursor()
-        c.execute("""INSERT INTO complaints (user_id, name, roll_no, department, course, gender, complaint, category, priority) 
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                 (user_id, name, roll_no, department, course, gender, complaint, category, priority))
-        self.conn.commit()
-        return c.lastrowid
+    @retry_on_busy
+    def add_complaint(self, user_id, name, roll_no, department, course, gender, complaint, category, priority,
+                      duplicate_of=None):
+        """Returns the new complaint's id. With `duplicate_of` it joins that
+        complaint's duplicate cluster, as offered by find_duplicates()."""
+        sig = signature(complaint)
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            c.execute("""INSERT INTO complaints (user_id, name, roll_no, department, course, gender, complaint, category, priority) 
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                     (user_id, name, roll_no, department, course, gender, complaint, category, priority))
+            complaint_id = c.lastrowid
+            if sig is not None:
+                self._store_signature(c, complaint_id, sig)
+            if duplicate_of is not None:
+                self._link_duplicates(c, [complaint_id], duplicate_of)
+            conn.commit()
+            return complaint_id
     
-    def get_all_complaints(self, search=None, status_filter=None, category_filter=None, priority_filter=None):
-        c = self.conn.cursor()
-        query = """SELECT c.id, c.name, c.roll_no, c.department, c.course, c.gender, c.complaint, 
-                         c.category, c.priority, c.status, c.submitted_at, c.user_id
-                   FROM complaints c WHERE 1=1"""
+    def _import_row(self, record, categories, default_user_id):
+        """Validate one import record; returns (row, None) or (None, reason)"""
+        values = {k: (v.strip() if isinstance(v, str) else v) for k, v in record.items()}
+        values = {k: (None if v == "" else v) for k, v in values.items()}
+        
+        missing = [column for column in IMPORT_REQUIRED if not values.get(column)]
+        if missing:
+            return None, "missing " + ", ".join(missing)
+        
+        category = values.get("category") or "Other"
+        if category not in categories:
+            return None, f"unknown category {category!r}"
+        priority = values.get("priority") or "Medium"
+        if priority not in PRIORITIES:
+            return None, f"unknown priority {priority!r}"
+        status = values.get("status") or "Open"
+        if status not in STATUSES:
+            return None, f"unknown status {status!r}"
+        
+        user_id = values.get("user_id") or default_user_id
+        if user_id is None:
+            return None, "missing user_id"
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None, f"bad user_id {user_id!r}"
+        if self.get_user_by_id(user_id) is None:
+            return None, f"unknown user_id {user_id}"
+        
+        submitted_at = values.get("submitted_at")
+        if submitted_at is not None:
+            try:
+                # Store in the format CURRENT_TIMESTAMP uses so listings sort correctly
+                submitted_at = datetime.fromisoformat(str(submitted_at)).strftime("%Y-%m-%d %H:%M:%S")
+            except ValueError:
+                return None, f"bad submitted_at {submitted_at!r}"
+        
+        return (user_id, values["name"], values.get("roll_no"), values["department"],
+                values["course"], values["gender"], values["complaint"], category, priority,
+                status, submitted_at), None
+    
+    def bulk_add_complaints(self, records, batch_size=IMPORT_BATCH_SIZE, default_user_id=None,
+                            defer_indexes=False, progress=None):
+        """Insert many complaints, `batch_size` rows per transaction.
+        
+        `records` is an iterable of dicts keyed by IMPORT_COLUMNS, e.g. from
+        iter_import_records. Records with missing fields, an unknown
+        category, priority or status, or a user_id that is not a user are
+        skipped and listed in the report.
+        With `defer_indexes` the listing indexes, search index and dashboard
+        counters are not maintained row by row but rebuilt once at the end,
+        which is much faster for imports that dwarf the existing table.
+        progress(report) is called after every batch. Returns an ImportReport.
+        """
+        categories = set(self.get_categories())
+        report = ImportReport()
+        started = time.perf_counter()
+        
+        if defer_indexes:
+            self._suspend_import_maintenance()
+        try:
+            batch = []
+            for line, record in enumerate(records, 1):
+                row, reason = self._import_row(record, categories, default_user_id)
+                if row is None:
+                    report.reject(line, reason, record)
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    self._insert_import_batch(batch, report)
+                    batch = []
+                    if progress:
+                        progress(report)
+            if batch:
+                self._insert_import_batch(batch, report)
+                if progress:
+                    progress(report)
+        finally:
+            if defer_indexes:
+                self.restore_import_maintenance()
+            self.index_duplicates()
+            report.seconds = time.perf_counter() - started
+        
+        return report
+    
+    @retry_on_busy
+    def _insert_import_batch(self, batch, report):
+        started = time.perf_counter()
+        with self.pool.writer() as conn:
+            conn.executemany(
+                """INSERT INTO complaints (user_id, name, roll_no, department, course, gender, complaint,
+                                           category, priority, status, submitted_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))""", batch)
+            conn.commit()
+        seconds = time.perf_counter() - started
+        report.inserted += len(batch)
+        report.batches.append((len(batch), seconds))
+    
+    def _suspend_import_maintenance(self):
+        with self.pool.writer() as conn:
+            for sql in IMPORT_DEFERRED_INDEXES:
+                conn.execute("DROP INDEX IF EXISTS main." + sql.split()[5])
+            for name in IMPORT_DEFERRED_TRIGGERS:
+                conn.execute(f"DROP TRIGGER IF EXISTS {name}")
+            conn.commit()
+    
+    def restore_import_maintenance(self):
+        """Put back whatever a deferred import dropped, rebuilding what it fed.
+        
+        Also runs on startup, so an import that was killed half way leaves
+        no database without its indexes or with stale counters.
+        """
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            triggers = {row[0] for row in c.execute("SELECT name FROM sqlite_master WHERE type='trigger'")}
+            indexes = {row[0] for row in c.execute("SELECT name FROM sqlite_master WHERE type='index'")}
+            
+            for sql in IMPORT_DEFERRED_INDEXES:
+                if sql.split()[5] not in indexes:
+                    c.execute(sql)
+            if "complaint_stats_insert" not in triggers:
+                for sql in STATS_SCHEMA + STATS_REBUILD:
+                    c.execute(sql)
+            if self.fts_enabled and "complaints_fts_insert" not in triggers:
+                c.execute(FTS_TRIGGERS["complaints_fts_insert"])
+                c.execute("INSERT INTO complaints_fts(complaints_fts) VALUES ('rebuild')")
+            if "change_log_complaints_insert" not in triggers:
+                c.execute(CHANGE_LOG_TRIGGERS["change_log_complaints_insert"])
+                c.execute("INSERT INTO change_log (table_name, op, complaint_id) VALUES ('complaints', 'reload', 0)")
+            if "sla_complaints_insert" not in triggers:
+                c.execute(SLA_TRIGGERS["sla_complaints_insert"])
+                for sql in SLA_BACKFILL:
+                    c.execute(sql)
+            conn.commit()
+    
+    def _complaint_filters(self, search=None, status_filter=None, category_filter=None, priority_filter=None,
+                           schema="main"):
+        """Build the WHERE clause shared by the complaint listing queries"""
+        query = ""
         params = []
         
+        if schema != "main":
+            # An archive run interrupted between its two commits leaves the
+            # complaint in both files until the next run; list it once
+            query += " AND NOT EXISTS (SELECT 1 FROM main.complaints h WHERE h.id = c.id)"
+        
         if search:
-            query += " AND (c.name LIKE ? OR c.complaint LIKE ? OR c.roll_no LIKE ?)"
-            params.extend([f'%{search}%', f'%{search}%', f'%{search}%'])
+            match = build_fts_query(search) if self.fts_enabled else None
+            if match:
+                # FTS5 matches words by prefix; roll numbers still match anywhere, as "CS001" in "21CS001"
+                query += (f" AND (c.id IN (SELECT rowid FROM {schema}.complaints_fts(?))"
+                          f" OR c.id IN (SELECT id FROM {schema}.complaints WHERE roll_no LIKE ?))")
+                params.extend([match, f'%{search}%'])
+            else:
+                # No FTS5, or nothing in the input it can search for ("@", "-")
+                query += " AND (c.name LIKE ? OR c.complaint LIKE ? OR c.roll_no LIKE ?)"
+                params.extend([f'%{search}%', f'%{search}%', f'%{search}%'])
         
         if status_filter and status_filter != "All":
             query += " AND c.status = ?"
@@ -158,100 +1053,1130 @@ class Database:
             query += " AND c.priority = ?"
             params.append(priority_filter)
         
-        query += " ORDER BY c.submitted_at DESC"
-        c.execute(query, params)
-        return c.fetchall()
+        return query, params
     
-    def get_user_complaints(self, user_id):
-        c = self.conn.cursor()
-        c.execute("""SELECT id, name, roll_no, department, course, gender, complaint, 
-                           category, priority, status, submitted_at 
-                    FROM complaints WHERE user_id=? ORDER BY submitted_at DESC""", (user_id,))
-        return c.fetchall()
+    def _roll_no_matches(self, columns, schema, search, match):
+        """The ranked searches' second select: complaints whose roll number
+        contains `search` but which the FTS5 terms missed, ranked after every
+        text match (bm25 ranks are negative). Filters are appended by the caller."""
+        query = f"""SELECT {columns}, 0 FROM {schema}.complaints c
+                    WHERE c.id IN (SELECT id FROM {schema}.complaints WHERE roll_no LIKE ?)
+                      AND c.id NOT IN (SELECT rowid FROM {schema}.complaints_fts(?))"""
+        return query, [f'%{search}%', match]
     
-    def get_complaint_by_id(self, complaint_id):
-        c = self.conn.cursor()
-        c.execute("""SELECT c.*, u.full_name as submitter_name, u.email as submitter_email
-                    FROM complaints c 
-                    JOIN users u ON c.user_id = u.id 
-                    WHERE c.id=?""", (complaint_id,))
-        return c.fetchone()
+    def get_all_complaints(self, search=None, status_filter=None, category_filter=None, priority_filter=None,
+                           include_archive=False):
+        rows = []
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.row_factory = ComplaintSummary.from_row
+            for schema in self._schemas(include_archive):
+                filters, params = self._complaint_filters(search, status_filter, category_filter,
+                                                          priority_filter, schema)
+                query = f"""SELECT {ComplaintSummary.COLUMNS} FROM {schema}.complaints c WHERE 1=1""" + filters
+                
+                query += " ORDER BY c.submitted_at DESC"
+                c.execute(query, params)
+                rows.extend(c.fetchall())
+        if include_archive:
+            rows.sort(key=lambda row: row.submitted_at, reverse=True)
+        return rows
     
-    def update_complaint_status(self, complaint_id, new_status, changed_by):
-        c = self.conn.cursor()
-        # Get old status
-        c.execute("SELECT status FROM complaints WHERE id=?", (complaint_id,))
-        old_status = c.fetchone()[0]
+    def get_complaint_ids(self, search=None, status_filter=None, category_filter=None, priority_filter=None,
+                          include_archive=False):
+        """(ids, complete): the ids of the complaints a listing shows, in
+        display order (best match first when searching, newest first
+        otherwise), and whether that is all of them. At most
+        RESULT_CACHE_MAX_IDS ids are returned.
+        
+        Results are cached per filter combination. The newest change_log seq
+        is the data version: any write, from this process or another client
+        of the file, moves it and empties the cache on the next call.
+        """
+        version = self.latest_change_seq()
+        if version != self._results_version:
+            self.results.invalidate()
+            self._results_version = version
+        key = ("ids", search or None, status_filter, category_filter, priority_filter, bool(include_archive))
+        return self.results.get(key, lambda: self._load_complaint_ids(search, status_filter, category_filter,
+                                                                      priority_filter, include_archive))
+    
+    def _load_complaint_ids(self, search, status_filter, category_filter, priority_filter, include_archive):
+        match = build_fts_query(search) if search and self.fts_enabled else None
+        selects = []
+        params = []
+        for schema in self._schemas(include_archive):
+            if match:
+                filters, filter_params = self._complaint_filters(None, status_filter, category_filter,
+                                                                 priority_filter, schema)
+                selects.append(f"""SELECT c.id, f.rank FROM {schema}.complaints_fts(?) f
+                                   JOIN {schema}.complaints c ON c.id = f.rowid WHERE 1=1""" + filters)
+                params += [match] + filter_params
+                roll_no_select, roll_no_params = self._roll_no_matches("c.id", schema, search, match)
+                selects.append(roll_no_select + filters)
+                params += roll_no_params + filter_params
+            else:
+                filters, filter_params = self._complaint_filters(search, status_filter, category_filter,
+                                                                 priority_filter, schema)
+                selects.append(f"SELECT c.id, c.submitted_at FROM {schema}.complaints c WHERE 1=1" + filters)
+                params += filter_params
+        order = " ORDER BY rank" if match else " ORDER BY submitted_at DESC, id DESC"
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.execute(" UNION ALL ".join(selects) + order + " LIMIT ?", params + [RESULT_CACHE_MAX_IDS + 1])
+            ids = tuple(row[0] for row in c.fetchall())
+        return ids[:RESULT_CACHE_MAX_IDS], len(ids) <= RESULT_CACHE_MAX_IDS
+    
+    def get_complaint_row(self, complaint_id, search=None, status_filter=None, category_filter=None,
+                          priority_filter=None, include_archive=False):
+        """One complaint in listing shape, or None if it is gone or no longer matches the filters"""
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.row_factory = ComplaintSummary.from_row
+            for schema in self._schemas(include_archive):
+                filters, params = self._complaint_filters(search, status_filter, category_filter,
+                                                          priority_filter, schema)
+                c.execute(f"SELECT {ComplaintSummary.COLUMNS} FROM {schema}.complaints c WHERE c.id = ?" + filters,
+                          [complaint_id] + params)
+                row = c.fetchone()
+                if row is not None:
+                    return row
+            return None
+    
+    def iter_complaints_page(self, after=None, limit=50, search=None, status_filter=None,
+                             category_filter=None, priority_filter=None, include_archive=False):
+        """Yield pages of complaints, newest first, until the listing runs out.
         
-        # Update status
-        c.execute("UPDATE complaints SET status=?, updated_at=CURRENT_TIMESTAMP WHERE id=?", 
-                 (new_status, complaint_id))
+        Pages are fetched with a keyset cursor on (submitted_at, id) rather than
+        OFFSET, so each page is an index range read no matter how deep the
+        caller has scrolled. Pass the (submitted_at, id) of the last row seen as
+        `after` to resume a listing. Nothing is read until a page is requested.
+        With `include_archive` each page merges a page from both files.
+        """
+        queries = []
+        for schema in self._schemas(include_archive):
+            filters, params = self._complaint_filters(search, status_filter, category_filter,
+                                                      priority_filter, schema)
+            queries.append((f"SELECT {ComplaintSummary.COLUMNS} FROM {schema}.complaints c WHERE 1=1" + filters,
+                            params))
         
-        # Record in history
-        c.execute("""INSERT INTO status_history (complaint_id, old_status, new_status, changed_by) 
-                    VALUES (?, ?, ?, ?)""", (complaint_id, old_status, new_status, changed_by))
-        self.conn.commit()
+        while True:
+            page = []
+            with self.pool.reader() as conn:
+                c = conn.cursor()
+                c.row_factory = ComplaintSummary.from_row
+                for query, params in queries:
+                    if after is None:
+                        c.execute(query + " ORDER BY c.submitted_at DESC, c.id DESC LIMIT ?", params + [limit])
+                    else:
+                        c.execute(query + " AND (c.submitted_at, c.id) < (?, ?)"
+                                          " ORDER BY c.submitted_at DESC, c.id DESC LIMIT ?",
+                                  params + [after[0], after[1], limit])
+                    page.extend(c.fetchall())
+            if len(queries) > 1:
+                page = sorted(page, key=lambda row: (row.submitted_at, row.id), reverse=True)[:limit]
+            if page:
+                yield page
+            if len(page) < limit:
+                return
+            after = (page[-1].submitted_at, page[-1].id)
     
+    def search_complaints(self, search, status_filter=None, category_filter=None, priority_filter=None,
+                          limit=None, offset=0, include_archive=False):
+        """Complaints matching `search`, best match first (bm25 rank)"""
+        match = build_fts_query(search) if self.fts_enabled else None
+        if not match:
+            # No FTS5 (or nothing searchable): same rows, newest first
+            rows = self.get_all_complaints(search, status_filter, category_filter, priority_filter,
+                                           include_archive)
+            return rows[offset:offset + limit] if limit else rows[offset:]
+        
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            selects = []
+            params = []
+            for schema in self._schemas(include_archive):
+                filters, filter_params = self._complaint_filters(None, status_filter, category_filter,
+                                                                 priority_filter, schema)
+                selects.append(f"""SELECT {ComplaintSummary.COLUMNS}, f.rank
+                                   FROM {schema}.complaints_fts(?) f
+                                   JOIN {schema}.complaints c ON c.id = f.rowid
+                                   WHERE 1=1""" + filters)
+                params += [match] + filter_params
+                roll_no_select, roll_no_params = self._roll_no_matches(ComplaintSummary.COLUMNS, schema,
+                                                                       search, match)
+                selects.append(roll_no_select + filters)
+                params += roll_no_params + filter_params
+            query = " UNION ALL ".join(selects) + " ORDER BY rank"
+            
+            if limit:
+                query += " LIMIT ? OFFSET ?"
+                params.extend([limit, offset])
+            
+            c.row_factory = lambda cursor, row: ComplaintSummary(*row[:-1])
+            c.execute(query, params)
+            return c.fetchall()
+    
+    def count_complaints(self, search=None, status_filter=None, category_filter=None, priority_filter=None,
+                         include_archive=False):
+        total = 0
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            for schema in self._schemas(include_archive):
+                filters, params = self._complaint_filters(search, status_filter, category_filter,
+                                                          priority_filter, schema)
+                c.execute(f"SELECT COUNT(*) FROM {schema}.complaints c WHERE 1=1" + filters, params)
+                total += c.fetchone()[0]
+        return total
+    
+    def iter_export_batches(self, filters=None, batch_size=EXPORT_BATCH_SIZE):
+        """Yield export rows in fetchmany() batches from a single open cursor"""
+        filters = dict(filters or {})
+        selects = []
+        params = []
+        for schema in self._schemas(filters.pop("include_archive", False)):
+            where, schema_params = self._complaint_filters(**filters, schema=schema)
+            selects.append(f"""SELECT c.id, c.name, c.roll_no, c.department, c.course, c.gender, c.complaint, 
+                                     c.category, c.priority, c.status, c.submitted_at
+                               FROM {schema}.complaints c WHERE 1=1""" + where)
+            params += schema_params
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.execute(" UNION ALL ".join(selects) + " ORDER BY submitted_at DESC", params)
+            try:
+                while True:
+                    batch = c.fetchmany(batch_size)
+                    if not batch:
+                        return
+                    yield batch
+            finally:
+                c.close()
+    
+    def export_complaints(self, path, filters=None, compress=None, batch_size=EXPORT_BATCH_SIZE,
+                          progress=None, cancel=None):
+        """Stream the complaints matching `filters` into a CSV file.
+        
+        `filters` takes the keyword arguments of get_all_complaints. Rows go
+        from the cursor to the writer one batch at a time, so memory use does
+        not grow with the export. The file is gzip-compressed when `compress`
+        is true, or by default when `path` ends in .gz. progress(rows,
+        rows_per_sec) is called after every batch; setting the `cancel` event
+        stops the export with ExportCancelled and removes the partial file.
+        Returns the number of complaints written.
+        """
+        if compress is None:
+            compress = path.endswith(".gz")
+        opener = gzip.open if compress else open
+        
+        written = 0
+        started = time.perf_counter()
+        try:
+            with opener(path, 'wt', newline='', encoding='utf-8') as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(EXPORT_HEADER)
+                
+                for batch in self.iter_export_batches(filters, batch_size):
+                    if cancel is not None and cancel.is_set():
+                        raise ExportCancelled(f"Export cancelled after {written} rows")
+                    writer.writerows(batch)
+                    written += len(batch)
+                    if progress is not None:
+                        elapsed = time.perf_counter() - started
+                        progress(written, written / elapsed if elapsed > 0 else 0.0)
+        except BaseException:
+            if os.path.exists(path):
+                os.remove(path)
+            raise
+        
+        return written
+    
+    def export_snapshot(self, path, include_archive=True, batch_size=SNAPSHOT_BATCH_SIZE):
+        """Write every complaint and status transition to a columnar
+        snapshot (see snapshot.py) for snapshot.Snapshot to group and pivot.
+        `path` ends in .npz, or in .parquet for a directory of Parquet files
+        when pyarrow is installed. Returns {table: rows written}.
+        """
+        tables = {name: TableBuilder(columns) for name, columns in SNAPSHOT_TABLES.items()}
+        queries = {"complaints": SNAPSHOT_COMPLAINTS_SELECT, "transitions": SNAPSHOT_TRANSITIONS_SELECT}
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            for schema in self._schemas(include_archive):
+                for name, query in queries.items():
+                    query = query.format(schema=schema, archived=int(schema != "main"))
+                    if schema != "main":
+                        # A complaint restored from the archive counts once, from main
+                        query += " WHERE NOT EXISTS (SELECT 1 FROM main.complaints m WHERE m.id = c.id)"
+                    c.execute(query)
+                    while True:
+                        batch = c.fetchmany(batch_size)
+                        if not batch:
+                            break
+                        tables[name].append(batch)
+        
+        write_snapshot(path, tables, {"exported_at": datetime.now().isoformat(timespec="seconds"),
+                                      "include_archive": include_archive})
+        return {name: table.rows for name, table in tables.items()}
+    
+    def get_user_complaints(self, user_id, include_archive=False):
+        selects = []
+        params = []
+        for schema in self._schemas(include_archive):
+            # The filters hide an archive copy whose complaint is still in the hot file
+            filters, filter_params = self._complaint_filters(schema=schema)
+            selects.append(f"SELECT {StudentComplaint.COLUMNS} FROM {schema}.complaints c WHERE user_id=?" + filters)
+            params += [user_id] + filter_params
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.row_factory = StudentComplaint.from_row
+            c.execute(" UNION ALL ".join(selects) + " ORDER BY submitted_at DESC", params)
+            return c.fetchall()
+    
+    def get_complaint_by_id(self, complaint_id, include_archive=False):
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            complaint = None
+            for schema in self._schemas(include_archive):
+                c.execute(f"SELECT {ComplaintDetail.COLUMNS} FROM {schema}.complaints WHERE id=?", (complaint_id,))
+                complaint = c.fetchone()
+                if complaint is not None:
+                    break
+        rows = self._with_user([complaint] if complaint else [], ComplaintDetail, 1, ("full_name", "email"))
+        return rows[0] if rows else None
+    
+    def load_complaint_bundle(self, complaint_id, include_archive=True):
+        """The complaint, its responses and its status history from one read
+        transaction, as a ComplaintBundle; None if there is no such complaint.
+        
+        Rows have the same shape as get_complaint_by_id, get_responses and
+        get_status_history; user names come from the lookup cache.
+        """
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.execute("BEGIN")
+            try:
+                complaint = None
+                for schema in self._schemas(include_archive):
+                    c.execute(f"SELECT {ComplaintDetail.COLUMNS} FROM {schema}.complaints WHERE id=?",
+                              (complaint_id,))
+                    complaint = c.fetchone()
+                    if complaint is not None:
+                        break
+                if complaint is None:
+                    return None
+                c.execute(f"""SELECT {Response.COLUMNS} FROM {schema}.complaint_responses
+                              WHERE complaint_id=? ORDER BY responded_at ASC""", (complaint_id,))
+                responses = c.fetchall()
+                c.execute(f"""SELECT {StatusChange.COLUMNS} FROM {schema}.status_history
+                              WHERE complaint_id=? ORDER BY changed_at ASC""", (complaint_id,))
+                history = c.fetchall()
+            finally:
+                c.execute("COMMIT")
+        
+        complaint = self._with_user([complaint], ComplaintDetail, 1, ("full_name", "email"))
+        if not complaint:
+            return None
+        return ComplaintBundle(complaint[0],
+                               self._with_user(responses, Response, 2, ("full_name", "role")),
+                               self._with_user(history, StatusChange, 4, ("full_name",)),
+                               archived=schema != "main")
+    
+    @retry_on_busy
+    def update_complaint_status(self, complaint_id, new_status, changed_by):
+        """Set the status in one statement; the complaints_status_history
+        trigger records the change. Complaints linked as duplicates of this
+        one follow it in the same transaction. Returns the new updated_at."""
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            c.execute("""UPDATE complaints SET status=?, status_changed_by=?, updated_at=CURRENT_TIMESTAMP
+                         WHERE id=? RETURNING updated_at""", (new_status, changed_by, complaint_id))
+            row = c.fetchone()
+            if row is None:
+                raise ValueError(f"Complaint #{complaint_id} does not exist or has been archived")
+            changed = [complaint_id] + self._cascade_status(c, [complaint_id], new_status, changed_by)
+            if new_status in DUPLICATE_STATUSES:
+                self._index_missing_signatures(c, changed)
+            if new_status != "Open":
+                self._learn_suggestions(c, changed)
+            conn.commit()
+            return row[0]
+    
+    def _cascade_status(self, c, primary_ids, new_status, changed_by):
+        """Give the complaints linked as duplicates of `primary_ids` the same
+        status; they are folded into their primary in the teacher's list, so
+        nobody would otherwise move them on. Returns the ids that changed."""
+        changed = []
+        for start in range(0, len(primary_ids), BULK_UPDATE_CHUNK):
+            chunk = primary_ids[start:start + BULK_UPDATE_CHUNK]
+            id_list = ", ".join("?" for _ in chunk)
+            c.execute(f"""UPDATE complaints SET status=?, status_changed_by=?, updated_at=CURRENT_TIMESTAMP
+                          WHERE id IN (SELECT complaint_id FROM complaint_duplicates WHERE duplicate_of IN ({id_list}))
+                          AND status IS NOT ? RETURNING id""", [new_status, changed_by] + chunk + [new_status])
+            changed.extend(row[0] for row in c.fetchall())
+        return changed
+    
+    @retry_on_busy
+    def bulk_update_status(self, complaint_ids, new_status, changed_by):
+        """Set the status of many complaints in one transaction.
+        
+        The ids go to SQLite in chunks of BULK_UPDATE_CHUNK per UPDATE, and
+        the complaints_status_history trigger writes each history row inside
+        the same transaction, so closing hundreds of complaints is a single
+        commit. Complaints that are missing, archived or already in
+        `new_status` are skipped; duplicates linked to the ones that changed
+        follow them. Returns the ids that changed, those duplicates included.
+        """
+        ids = list(dict.fromkeys(complaint_ids))
+        changed = []
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            for start in range(0, len(ids), BULK_UPDATE_CHUNK):
+                chunk = ids[start:start + BULK_UPDATE_CHUNK]
+                id_list = ", ".join("?" for _ in chunk)
+                c.execute(f"""UPDATE complaints SET status=?, status_changed_by=?, updated_at=CURRENT_TIMESTAMP
+                              WHERE id IN ({id_list}) AND status IS NOT ? RETURNING id""",
+                          [new_status, changed_by] + chunk + [new_status])
+                changed.extend(row[0] for row in c.fetchall())
+            changed += self._cascade_status(c, changed, new_status, changed_by)
+            if new_status in DUPLICATE_STATUSES:
+                # Reopened complaints go back into the duplicate index
+                self._index_missing_signatures(c, changed)
+            if new_status != "Open":
+                self._learn_suggestions(c, changed)
+            conn.commit()
+        return changed
+    
+    @retry_on_busy
     def delete_complaint(self, complaint_id):
-        c = self.conn.cursor()
-        c.execute("DELETE FROM complaint_responses WHERE complaint_id=?", (complaint_id,))
-        c.execute("DELETE FROM status_history WHERE complaint_id=?", (complaint_id,))
-        c.execute("DELETE FROM complaints WHERE id=?", (complaint_id,))
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            c.execute("DELETE FROM complaint_responses WHERE complaint_id=?", (complaint_id,))
+            c.execute("DELETE FROM status_history WHERE complaint_id=?", (complaint_id,))
+            c.execute("DELETE FROM complaints WHERE id=?", (complaint_id,))
+            # Complaints linked to this one stand on their own again
+            c.execute("DELETE FROM complaint_duplicates WHERE complaint_id=? OR duplicate_of=?",
+                      (complaint_id, complaint_id))
+            conn.commit()
     
+    @retry_on_busy
     def add_response(self, complaint_id, responder_id, response):
-        c = self.conn.cursor()
-        c.execute("""INSERT INTO complaint_responses (complaint_id, responder_id, response) 
-                    VALUES (?, ?, ?)""", (complaint_id, responder_id, response))
-        self.conn.commit()
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            c.execute("""INSERT INTO complaint_responses (complaint_id, responder_id, response) 
+                        VALUES (?, ?, ?)""", (complaint_id, responder_id, response))
+            conn.commit()
     
-    def get_responses(self, complaint_id):
-        c = self.conn.cursor()
-        c.execute("""SELECT cr.*, u.full_name, u.role 
-                    FROM complaint_responses cr
-                    JOIN users u ON cr.responder_id = u.id
-                    WHERE cr.complaint_id=? ORDER BY cr.responded_at ASC""", (complaint_id,))
-        return c.fetchall()
+    def get_responses(self, complaint_id, include_archive=False):
+        selects = [f"SELECT {Response.COLUMNS} FROM {schema}.complaint_responses WHERE complaint_id=?"
+                   for schema in self._schemas(include_archive)]
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.execute(" UNION ".join(selects) + " ORDER BY responded_at ASC", [complaint_id] * len(selects))
+            responses = c.fetchall()
+        return self._with_user(responses, Response, 2, ("full_name", "role"))
     
-    def get_status_history(self, complaint_id):
-        c = self.conn.cursor()
-        c.execute("""SELECT sh.*, u.full_name 
-                    FROM status_history sh
-                    JOIN users u ON sh.changed_by = u.id
-                    WHERE sh.complaint_id=? ORDER BY sh.changed_at ASC""", (complaint_id,))
-        return c.fetchall()
+    def get_status_history(self, complaint_id, include_archive=False):
+        selects = [f"SELECT {StatusChange.COLUMNS} FROM {schema}.status_history WHERE complaint_id=?"
+                   for schema in self._schemas(include_archive)]
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.execute(" UNION ".join(selects) + " ORDER BY changed_at ASC", [complaint_id] * len(selects))
+            history = c.fetchall()
+        return self._with_user(history, StatusChange, 4, ("full_name",))
+    
+    # Duplicates
+    def _store_signature(self, c, complaint_id, sig):
+        c.execute("INSERT OR REPLACE INTO complaint_minhash (complaint_id, signature) VALUES (?, ?)",
+                  (complaint_id, pack_signature(sig)))
+        c.executemany("INSERT OR IGNORE INTO complaint_lsh (band_key, complaint_id) VALUES (?, ?)",
+                      [(key, complaint_id) for key in band_keys(sig)])
+    
+    def _index_missing_signatures(self, c, complaint_ids):
+        for start in range(0, len(complaint_ids), BULK_UPDATE_CHUNK):
+            chunk = complaint_ids[start:start + BULK_UPDATE_CHUNK]
+            id_list = ", ".join("?" for _ in chunk)
+            c.execute(f"""SELECT id, complaint FROM complaints c WHERE id IN ({id_list})
+                          AND NOT EXISTS (SELECT 1 FROM complaint_minhash m WHERE m.complaint_id = c.id)""", chunk)
+            for complaint_id, text in c.fetchall():
+                sig = signature(text)
+                if sig is not None:
+                    self._store_signature(c, complaint_id, sig)
+    
+    def index_duplicates(self, batch_size=IMPORT_BATCH_SIZE):
+        """Add the Open and In Progress complaints missing from the duplicate
+        index, e.g. after a bulk import. Returns how many were added."""
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.execute(f"""SELECT id, complaint FROM complaints c WHERE status IN {_DUPLICATE_STATUS_LIST}
+                          AND NOT EXISTS (SELECT 1 FROM complaint_minhash m WHERE m.complaint_id = c.id)""")
+            missing = c.fetchall()
+        
+        indexed = 0
+        for start in range(0, len(missing), batch_size):
+            signatures = [(complaint_id, signature(text)) for complaint_id, text in missing[start:start + batch_size]]
+            with self.pool.writer() as conn:
+                c = conn.cursor()
+                for complaint_id, sig in signatures:
+                    if sig is not None:
+                        self._store_signature(c, complaint_id, sig)
+                        indexed += 1
+                conn.commit()
+        return indexed
+    
+    @retry_on_busy
+    def rebuild_duplicate_index(self):
+        """Recompute every signature, e.g. after the duplicates.py settings changed"""
+        with self.pool.writer() as conn:
+            conn.execute("DELETE FROM complaint_lsh")
+            conn.execute("DELETE FROM complaint_minhash")
+            conn.commit()
+        return self.index_duplicates()
+    
+    def find_duplicates(self, text, limit=5, exclude=None):
+        """Open complaints that `text` is probably a duplicate of, best match
+        first, as DuplicateMatch rows. A match that already belongs to a
+        duplicate cluster is reported as the complaint the cluster is linked
+        to. `exclude` leaves out a complaint and its cluster.
+        
+        Only complaints sharing an LSH band key with `text` are compared, so
+        the cost follows the number of similar complaints, not the number open.
+        """
+        sig = signature(text)
+        if sig is None:
+            return []
+        keys = band_keys(sig)
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.execute(f"SELECT complaint_id FROM complaint_lsh WHERE band_key IN ({', '.join('?' for _ in keys)})",
+                      keys)
+            shared = {}
+            for (complaint_id,) in c.fetchall():
+                shared[complaint_id] = shared.get(complaint_id, 0) + 1
+            shared.pop(exclude, None)
+            candidates = sorted(shared, key=shared.get, reverse=True)[:DUPLICATE_CANDIDATES]
+            if not candidates:
+                return []
+            
+            id_list = ", ".join("?" for _ in candidates)
+            c.execute(f"""SELECT m.complaint_id, m.signature, d.duplicate_of FROM complaint_minhash m
+                          LEFT JOIN complaint_duplicates d ON d.complaint_id = m.complaint_id
+                          WHERE m.complaint_id IN ({id_list})""", candidates)
+            scores = {}
+            for complaint_id, blob, duplicate_of in c.fetchall():
+                score = similarity(sig, unpack_signature(blob))
+                if score >= DUPLICATE_THRESHOLD:
+                    scores[complaint_id] = (score, duplicate_of)
+            if not scores:
+                return []
+            
+            wanted = list(set(scores) | {duplicate_of for score, duplicate_of in scores.values()} - {None})
+            c.execute(f"""SELECT id, complaint, category, status, submitted_at,
+                                 (SELECT COUNT(*) FROM complaint_duplicates d WHERE d.duplicate_of = c.id)
+                          FROM complaints c WHERE id IN ({", ".join("?" for _ in wanted)})
+                          AND status IN {_DUPLICATE_STATUS_LIST}""", wanted)
+            rows = {row[0]: row for row in c.fetchall()}
+        
+        best = {}
+        for complaint_id, (score, duplicate_of) in scores.items():
+            target = duplicate_of if duplicate_of in rows else complaint_id
+            if target != exclude and target in rows:
+                best[target] = max(best.get(target, 0.0), score)
+        ranked = sorted(best, key=lambda target: (best[target], rows[target][5]), reverse=True)[:limit]
+        return [DuplicateMatch(*rows[target][:5], round(best[target], 2), rows[target][5]) for target in ranked]
+    
+    def _link_duplicates(self, c, complaint_ids, duplicate_of):
+        row = c.execute("SELECT duplicate_of FROM complaint_duplicates WHERE complaint_id = ?",
+                        (duplicate_of,)).fetchone()
+        if row is not None:
+            # Join the cluster the target belongs to, so clusters stay one level deep
+            duplicate_of = row[0]
+        if c.execute("SELECT 1 FROM complaints WHERE id = ?", (duplicate_of,)).fetchone() is None:
+            raise ValueError(f"Complaint #{duplicate_of} does not exist or has been archived")
+        
+        ids = [complaint_id for complaint_id in dict.fromkeys(complaint_ids) if complaint_id != duplicate_of]
+        for start in range(0, len(ids), BULK_UPDATE_CHUNK):
+            chunk = ids[start:start + BULK_UPDATE_CHUNK]
+            # Whatever was linked to one of these complaints moves along with it
+            id_list = ", ".join("?" for _ in chunk)
+            c.execute(f"UPDATE complaint_duplicates SET duplicate_of = ? WHERE duplicate_of IN ({id_list})",
+                      [duplicate_of] + chunk)
+            c.executemany("INSERT OR REPLACE INTO complaint_duplicates (complaint_id, duplicate_of) VALUES (?, ?)",
+                          [(complaint_id, duplicate_of) for complaint_id in chunk])
+        return ids
+    
+    @retry_on_busy
+    def link_duplicates(self, complaint_ids, duplicate_of):
+        """Mark complaints as duplicates of `duplicate_of`, bringing their own
+        duplicates along. Returns the ids linked."""
+        with self.pool.writer() as conn:
+            ids = self._link_duplicates(conn.cursor(), complaint_ids, duplicate_of)
+            conn.commit()
+        return ids
+    
+    @retry_on_busy
+    def unlink_duplicates(self, complaint_ids):
+        """Take complaints out of their duplicate clusters"""
+        ids = list(dict.fromkeys(complaint_ids))
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            for start in range(0, len(ids), BULK_UPDATE_CHUNK):
+                chunk = ids[start:start + BULK_UPDATE_CHUNK]
+                c.execute(f"DELETE FROM complaint_duplicates WHERE complaint_id IN ({', '.join('?' for _ in chunk)})",
+                          chunk)
+            conn.commit()
+    
+    def get_duplicate_links(self, complaint_ids):
+        """DuplicateLink rows for the given complaints that are in a cluster.
+        A complaint only counts as a duplicate while the complaint it is
+        linked to is still in the main file."""
+        ids = list(dict.fromkeys(complaint_ids))
+        links = {}
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            for start in range(0, len(ids), BULK_UPDATE_CHUNK):
+                chunk = ids[start:start + BULK_UPDATE_CHUNK]
+                id_list = ", ".join("?" for _ in chunk)
+                c.execute(f"""SELECT d.complaint_id, d.duplicate_of FROM complaint_duplicates d
+                              JOIN complaints c ON c.id = d.duplicate_of WHERE d.complaint_id IN ({id_list})""", chunk)
+                for complaint_id, duplicate_of in c.fetchall():
+                    links[complaint_id] = DuplicateLink(complaint_id, duplicate_of, [])
+                c.execute(f"""SELECT duplicate_of, complaint_id FROM complaint_duplicates
+                              WHERE duplicate_of IN ({id_list})""", chunk)
+                for duplicate_of, complaint_id in c.fetchall():
+                    link = links.setdefault(duplicate_of, DuplicateLink(duplicate_of, None, []))
+                    link.duplicates.append(complaint_id)
+        return list(links.values())
+    
+    # Suggestions
+    def iter_suggestion_examples(self, batch_size=IMPORT_BATCH_SIZE, include_archive=True):
+        """Batches of (id, complaint, category, priority) rows for every
+        complaint a teacher has moved on from Open: what the suggestion
+        models learn from"""
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            try:
+                for schema in self._schemas(include_archive):
+                    c.execute(f"SELECT id, complaint, category, priority FROM {schema}.complaints "
+                              "WHERE status != 'Open'")
+                    while True:
+                        batch = c.fetchmany(batch_size)
+                        if not batch:
+                            break
+                        yield batch
+            finally:
+                c.close()
+    
+    def _write_suggestion_counts(self, c, models):
+        for model, counts in models.items():
+            c.executemany("""INSERT INTO suggestion_labels (model, label, documents, tokens) VALUES (?, ?, ?, ?)
+                             ON CONFLICT(model, label) DO UPDATE SET documents = documents + excluded.documents,
+                                                                   tokens = tokens + excluded.tokens""",
+                          [(model, label, counts.documents[label], counts.tokens[label])
+                           for label in counts.documents])
+            c.executemany("""INSERT INTO suggestion_features (model, label, feature, count) VALUES (?, ?, ?, ?)
+                             ON CONFLICT(model, label, feature) DO UPDATE SET count = count + excluded.count""",
+                          ((model, label, feature, count) for label, label_counts in counts.counts.items()
+                           for feature, count in label_counts.items()))
+    
+    def _learn_suggestions(self, c, complaint_ids):
+        """Add the complaints not learned yet to the suggestion models, in the caller's transaction"""
+        rows = []
+        for start in range(0, len(complaint_ids), BULK_UPDATE_CHUNK):
+            chunk = complaint_ids[start:start + BULK_UPDATE_CHUNK]
+            id_list = ", ".join("?" for _ in chunk)
+            c.execute(f"""SELECT id, complaint, category, priority FROM complaints c WHERE id IN ({id_list})
+                          AND NOT EXISTS (SELECT 1 FROM suggestion_learned l WHERE l.complaint_id = c.id)""", chunk)
+            rows.extend(c.fetchall())
+        if not rows:
+            return
+        models = new_models()
+        learn_examples(models, rows)
+        self._write_suggestion_counts(c, models)
+        version = c.execute("UPDATE suggestion_state SET version = version + 1 WHERE id = 1 "
+                            "RETURNING version").fetchone()[0]
+        c.executemany("INSERT INTO suggestion_learned (complaint_id, version) VALUES (?, ?)",
+                      [(row[0], version) for row in rows])
+    
+    @retry_on_busy
+    def train_suggestions(self):
+        """Retrain the suggestion models from scratch on every complaint a
+        teacher has handled, archived ones included, and score them on a
+        sample of those. Returns a dict with the number of examples, stored
+        feature counts, each model's accuracy and baseline, and seconds taken."""
+        started = time.perf_counter()
+        models = new_models()
+        learned = []
+        sample = []
+        rng = random.Random(0)
+        for batch in self.iter_suggestion_examples():
+            learn_examples(models, batch)
+            for row in batch:
+                # Reservoir sampling keeps every example equally likely to be scored
+                if len(sample) < SUGGESTION_EVALUATION_SAMPLE:
+                    sample.append(row)
+                else:
+                    slot = rng.randrange(len(learned) + 1)
+                    if slot < SUGGESTION_EVALUATION_SAMPLE:
+                        sample[slot] = row
+                learned.append(row[0])
+        evaluate(models, sample)
+        
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            c.execute("DELETE FROM suggestion_labels")
+            c.execute("DELETE FROM suggestion_features")
+            c.execute("DELETE FROM suggestion_learned")
+            self._write_suggestion_counts(c, models)
+            c.executemany("INSERT OR REPLACE INTO suggestion_models (model, accuracy, baseline, evaluated) "
+                          "VALUES (?, ?, ?, ?)",
+                          [(model, counts.accuracy, counts.baseline, len(sample)) for model, counts in models.items()])
+            version = c.execute("""UPDATE suggestion_state SET version = version + 1, trained_version = version + 1,
+                                   trained_at = CURRENT_TIMESTAMP WHERE id = 1 RETURNING version""").fetchone()[0]
+            c.executemany("INSERT OR IGNORE INTO suggestion_learned (complaint_id, version) VALUES (?, ?)",
+                          ((complaint_id, version) for complaint_id in learned))
+            conn.commit()
+        return {"examples": len(learned),
+                "features": sum(len(label_counts) for counts in models.values()
+                                for label_counts in counts.counts.values()),
+                "accuracy": {model: (counts.accuracy, counts.baseline) for model, counts in models.items()},
+                "seconds": time.perf_counter() - started}
+    
+    def _suggestion_models(self):
+        """The in-memory models, first brought up to date with the database.
+        Call with _suggestion_lock held."""
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.execute("BEGIN")
+            try:
+                version, trained_version = c.execute("SELECT version, trained_version FROM suggestion_state "
+                                                     "WHERE id = 1").fetchone()
+                if version == self._suggesters_version:
+                    return self._suggesters
+                if self._suggesters is None or trained_version > self._suggesters_version:
+                    # Retrained since, or not loaded yet: read all the counts
+                    models = new_models()
+                    for model in SUGGESTION_MODELS:
+                        row = c.execute("SELECT accuracy, baseline FROM suggestion_models WHERE model = ?",
+                                        (model,)).fetchone()
+                        if row is not None:
+                            models[model].accuracy, models[model].baseline = row
+                        c.execute("SELECT label, documents, tokens FROM suggestion_labels WHERE model = ?", (model,))
+                        for label, documents, tokens in c.fetchall():
+                            models[model].add(label, documents, tokens, {})
+                        c.execute("SELECT label, feature, count FROM suggestion_features WHERE model = ?", (model,))
+                        for label, rows in groupby(c, key=lambda row: row[0]):
+                            models[model].add(label, 0, 0, {feature: count for _, feature, count in rows})
+                else:
+                    # Learn again what other clients learned since
+                    models = self._suggesters
+                    c.execute("""SELECT c.id, c.complaint, c.category, c.priority FROM suggestion_learned l
+                                 JOIN complaints c ON c.id = l.complaint_id WHERE l.version > ?""",
+                              (self._suggesters_version,))
+                    learn_examples(models, c.fetchall())
+            finally:
+                c.execute("COMMIT")
+        self._suggesters = models
+        self._suggesters_version = version
+        return models
+    
+    def suggest_labels(self, text):
+        """A LabelSuggestion of category and priority for the complaint text
+        a student is typing, or None if there is nothing to go on yet.
+        
+        The models stay in memory; a call reads one row to see whether
+        anything was learned since and otherwise only does the arithmetic,
+        well under a millisecond.
+        """
+        feature_ids = features(text)
+        if not feature_ids:
+            return None
+        categories = self.get_categories()
+        with self._suggestion_lock:
+            models = self._suggestion_models()
+            # A model that cannot beat answering its most common label suggests nothing
+            category = models["category"].predict(feature_ids, categories) if models["category"].useful else []
+            priority = models["priority"].predict(feature_ids, PRIORITIES) if models["priority"].useful else []
+        if not (category or priority):
+            return None
+        category, category_confidence = category[0] if category else (None, 0.0)
+        priority, priority_confidence = priority[0] if priority else (None, 0.0)
+        return LabelSuggestion(category, round(category_confidence, 3), priority, round(priority_confidence, 3))
+    
+    # Change feed
+    def latest_change_seq(self):
+        with self.pool.reader() as conn:
+            return conn.execute("SELECT IFNULL(MAX(seq), 0) FROM change_log").fetchone()[0]
+    
+    def get_changes_since(self, seq, limit=CHANGE_FEED_LIMIT, user_id=None):
+        """Change log entries after `seq`, oldest first, at most `limit`.
+        
+        With `user_id` only changes to that user's complaints (and reloads)
+        are returned. A primary key range read: the cost follows the number
+        of changes, not the size of the tables.
+        """
+        query = f"SELECT {Change.COLUMNS} FROM change_log WHERE seq > ?"
+        params = [seq]
+        if user_id is not None:
+            query += " AND (user_id = ? OR op = 'reload')"
+            params.append(user_id)
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.row_factory = Change.from_row
+            c.execute(query + " ORDER BY seq LIMIT ?", params + [limit])
+            return c.fetchall()
+    
+    def get_complaint_rows(self, complaint_ids, search=None, status_filter=None, category_filter=None,
+                           priority_filter=None, include_archive=False):
+        """Listing rows for `complaint_ids` that still match the filters"""
+        ids = list(complaint_ids)
+        rows = []
+        if not ids:
+            return rows
+        id_list = ", ".join("?" for _ in ids)
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.row_factory = ComplaintSummary.from_row
+            for schema in self._schemas(include_archive):
+                filters, params = self._complaint_filters(search, status_filter, category_filter,
+                                                          priority_filter, schema)
+                c.execute(f"SELECT {ComplaintSummary.COLUMNS} FROM {schema}.complaints c "
+                          f"WHERE c.id IN ({id_list})" + filters, ids + params)
+                rows.extend(c.fetchall())
+        return rows
+    
+    def prune_change_log(self, keep=CHANGE_LOG_KEEP):
+        with self.pool.writer() as conn:
+            conn.execute("DELETE FROM change_log WHERE seq <= (SELECT MAX(seq) FROM change_log) - ?", (keep,))
+            conn.commit()
+    
+    # Archive
+    def archive_complaints(self, older_than_days=30, statuses=ARCHIVE_STATUSES, batch_size=ARCHIVE_BATCH_SIZE,
+                           progress=None):
+        """Move finished complaints last updated more than `older_than_days`
+        ago, with their responses and status history, to the archive file.
+        
+        Works in batches of `batch_size` complaints. Each batch is copied and
+        committed first and only then deleted from the main file: SQLite in
+        WAL mode cannot commit two attached files atomically, and this way an
+        interrupted run leaves duplicates (hidden from readers, cleaned up by
+        the next run) rather than losing rows. progress(moved) is called after
+        every batch. Returns the number of complaints moved.
+        """
+        if not self.archive_path:
+            raise ValueError("this database has no archive attached")
+        
+        placeholders = ", ".join("?" for _ in statuses)
+        moved = 0
+        while True:
+            ids = self._archive_batch(statuses, placeholders, older_than_days, batch_size)
+            if not ids:
+                return moved
+            moved += len(ids)
+            if progress:
+                progress(moved)
+    
+    @retry_on_busy
+    def _archive_batch(self, statuses, placeholders, older_than_days, batch_size):
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            c.execute(f"""SELECT id FROM main.complaints
+                          WHERE status IN ({placeholders}) AND updated_at < datetime('now', ?)
+                          LIMIT ?""", [*statuses, f"-{int(older_than_days)} days", batch_size])
+            ids = [row[0] for row in c.fetchall()]
+            if not ids:
+                return ids
+            
+            id_list = ", ".join("?" for _ in ids)
+            c.execute(f"SELECT id FROM archive.complaints WHERE id IN ({id_list})", ids)
+            already = {row[0] for row in c.fetchall()}
+            fresh = [i for i in ids if i not in already]
+            fresh_list = ", ".join("?" for _ in fresh)
+            
+            if fresh:
+                c.execute(f"""INSERT INTO archive.complaints ({COMPLAINT_COLUMNS})
+                              SELECT {COMPLAINT_COLUMNS} FROM main.complaints WHERE id IN ({fresh_list})""", fresh)
+                c.execute(f"""INSERT OR IGNORE INTO archive.complaint_responses
+                              SELECT * FROM main.complaint_responses WHERE complaint_id IN ({fresh_list})""", fresh)
+                c.execute(f"""INSERT OR IGNORE INTO archive.status_history
+                              SELECT * FROM main.status_history WHERE complaint_id IN ({fresh_list})""", fresh)
+                if self.fts_enabled:
+                    c.execute(f"""INSERT INTO archive.complaints_fts (rowid, complaint, name, roll_no)
+                                  SELECT id, complaint, name, roll_no FROM archive.complaints
+                                  WHERE id IN ({fresh_list})""", fresh)
+                # Counters for the dashboard's "including archived" totals
+                for column in (None,) + STATS_DIMENSIONS:
+                    value = f"IFNULL({column}, '')" if column else "''"
+                    group = f" GROUP BY {column}" if column else ""
+                    c.execute(f"""INSERT INTO archive.complaint_stats (dimension, value, count)
+                                  SELECT '{column or "total"}', {value}, COUNT(*) FROM archive.complaints
+                                  WHERE id IN ({fresh_list}){group}
+                                  ON CONFLICT(dimension, value) DO UPDATE SET count = count + excluded.count""",
+                              fresh)
+            conn.commit()
+            
+            # Triggers keep the main search index and counters in step; the
+            # service-level figures keep counting archived complaints
+            c.execute(f"UPDATE main.complaint_lifecycle SET archived = 1 WHERE complaint_id IN ({id_list})", ids)
+            c.execute(f"DELETE FROM main.complaint_responses WHERE complaint_id IN ({id_list})", ids)
+            c.execute(f"DELETE FROM main.status_history WHERE complaint_id IN ({id_list})", ids)
+            c.execute(f"DELETE FROM main.complaints WHERE id IN ({id_list})", ids)
+            conn.commit()
+            return ids
+    
+    def archive_size(self):
+        """Complaints held in the main and archive files"""
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            hot = c.execute("SELECT COUNT(*) FROM main.complaints").fetchone()[0]
+            cold = 0
+            if self.archive_path:
+                cold = c.execute("SELECT COUNT(*) FROM archive.complaints").fetchone()[0]
+            return hot, cold
     
     # Analytics
-    def get_statistics(self):
-        c = self.conn.cursor()
-        stats = {}
+    def get_statistics(self, include_archive=False):
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            stats = {'total': 0}
+            for dimension in STATS_DIMENSIONS:
+                stats[f'by_{dimension}'] = {}
+            
+            for schema in self._schemas(include_archive):
+                c.execute(f"""SELECT dimension, NULLIF(value, ''), count FROM {schema}.complaint_stats
+                              WHERE dimension IN ('total', 'status', 'category', 'priority', 'department')
+                              AND count > 0""")
+                for dimension, value, count in c.fetchall():
+                    if dimension == 'total':
+                        stats['total'] += count
+                    else:
+                        by_value = stats[f'by_{dimension}']
+                        by_value[value] = by_value.get(value, 0) + count
+            
+            return stats
+    
+    def compute_statistics(self):
+        """get_statistics() computed from scratch with GROUP BY scans"""
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            stats = {}
+            
+            # Total complaints
+            c.execute("SELECT COUNT(*) FROM complaints")
+            stats['total'] = c.fetchone()[0]
+            
+            # By status, category, priority and department
+            for dimension in STATS_DIMENSIONS:
+                c.execute(f"SELECT {dimension}, COUNT(*) FROM complaints GROUP BY {dimension}")
+                stats[f'by_{dimension}'] = dict(c.fetchall())
+            
+            return stats
+    
+    @retry_on_busy
+    def rebuild_statistics(self):
+        """Recompute complaint_stats from the complaints table"""
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            for statement in STATS_REBUILD:
+                c.execute(statement)
+            conn.commit()
+    
+    def verify_statistics(self):
+        """Compare complaint_stats with live GROUP BY results.
         
-        # Total complaints
-        c.execute("SELECT COUNT(*) FROM complaints")
-        stats['total'] = c.fetchone()[0]
+        Returns a list of (dimension, value, stored, live) for every bucket
+        that disagrees; an empty list means the counters are consistent.
+        """
+        stored = self.get_statistics()
+        live = self.compute_statistics()
+        mismatches = []
         
-        # By status
-        c.execute("SELECT status, COUNT(*) FROM complaints GROUP BY status")
-        stats['by_status'] = dict(c.fetchall())
+        if stored['total'] != live['total']:
+            mismatches.append(('total', None, stored['total'], live['total']))
         
-        # By category
-        c.execute("SELECT category, COUNT(*) FROM complaints GROUP BY category")
-        stats['by_category'] = dict(c.fetchall())
+        for dimension in STATS_DIMENSIONS:
+            key = f'by_{dimension}'
+            for value in set(stored[key]) | set(live[key]):
+                if stored[key].get(value, 0) != live[key].get(value, 0):
+                    mismatches.append((dimension, value, stored[key].get(value, 0), live[key].get(value, 0)))
         
-        # By priority
-        c.execute("SELECT priority, COUNT(*) FROM complaints GROUP BY priority")
-        stats['by_priority'] = dict(c.fetchall())
+        return mismatches
+    
+    def get_sla_statistics(self, since=None):
+        """Median and p90 seconds to first response and to resolution.
+        
+        Returns {metric: {"all": summary, "by_category": {...}, "by_department":
+        {...}, "by_week": {...}}} for each metric in sla.SLA_METRICS, where a
+        summary is {"count", "median", "p90"} and weeks are keyed by their
+        Monday. by_week covers the last SLA_TREND_WEEKS weeks. With `since`
+        ('YYYY-MM-DD' or a date) only complaints submitted from that week on
+        are counted, and by_week has every week from then.
+        
+        Read from the sla_sketch counts, which are bounded by the number of
+        buckets per group, so this costs about the same at 1k complaints as
+        at 1M. A quantile of at most sla.SLA_MIN_SECONDS is reported as
+        SLA_MIN_SECONDS.
+        """
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            if since is None:
+                metrics = ", ".join(f"'{metric}'" for metric in SLA_METRICS)
+                this_week = _sla_week("'now'")
+                recent = f"date({this_week}, '-{7 * (SLA_TREND_WEEKS - 1)} days')"
+                c.execute(f"""SELECT metric, scope, category || department || week, bucket, count FROM sla_sketch
+                              WHERE metric IN ({metrics}) AND scope IN ('all', 'category', 'department')
+                              AND count > 0
+                              UNION ALL
+                              SELECT metric, scope, week, bucket, count FROM sla_sketch
+                              WHERE scope = 'week' AND week >= {recent} AND count > 0""")
+            else:
+                # Merge the per-(category, department, week) counts of those weeks
+                c.execute(f"""SELECT metric, 'cell', category, department, week, bucket, count FROM sla_sketch
+                              WHERE scope = 'cell' AND week >= {_sla_week("?")} AND count > 0""", (str(since),))
+            rows = c.fetchall()
+        
+        sketches = {metric: {"all": QuantileSketch(), "by_category": {}, "by_department": {}, "by_week": {}}
+                    for metric in SLA_METRICS}
         
-        # By department
-        c.execute("SELECT department, COUNT(*) FROM complaints GROUP BY department")
-        stats['by_department'] = dict(c.fetchall())
+        def add(group, value, bucket, count):
+            sketch = group.get(value)
+            if sketch is None:
+                sketch = group[value] = QuantileSketch()
+            sketch.add(bucket, count)
+        
+        for metric, scope, *values, bucket, count in rows:
+            groups = sketches[metric]
+            if scope == "cell":
+                groups["all"].add(bucket, count)
+                for name, value in zip(("by_category", "by_department", "by_week"), values):
+                    add(groups[name], value, bucket, count)
+            elif scope == "all":
+                groups["all"].add(bucket, count)
+            else:
+                add(groups["by_" + scope], values[0], bucket, count)
+        
+        return {metric: {name: sketch.summary() if name == "all" else
+                         {value: group.summary() for value, group in sketch.items()}
+                         for name, sketch in groups.items()}
+                for metric, groups in sketches.items()}
+    
+    def compute_sla_statistics(self, since=None):
+        """get_sla_statistics() worked out exactly from every complaint's
+        responses and status history, main and archive files alike. This is
+        the full scan the sketches are there to avoid; it is kept to check them.
+        """
+        durations = {metric: {"all": [], "by_category": {}, "by_department": {}, "by_week": {}}
+                     for metric in SLA_METRICS}
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            for schema in self._schemas(True):
+                query = SLA_LIFECYCLE_SELECT.format(schema=schema)
+                if schema != "main":
+                    query += " WHERE NOT EXISTS (SELECT 1 FROM main.complaints h WHERE h.id = c.id)"
+                else:
+                    query += " WHERE true"
+                params = []
+                if since is not None:
+                    query += f" AND c.submitted_at >= {_sla_week('?')}"
+                    params.append(str(since))
+                c.execute(f"""SELECT category, department, week,
+                                     MAX((julianday(first_response_at) - julianday(submitted_at)) * 86400, 0),
+                                     MAX((julianday(resolved_at) - julianday(submitted_at)) * 86400, 0)
+                              FROM ({query})""", params)
+                for category, department, week, *seconds in c.fetchall():
+                    for metric, value in zip(SLA_METRICS, seconds):
+                        if value is None:
+                            continue
+                        groups = durations[metric]
+                        groups["all"].append(value)
+                        groups["by_category"].setdefault(category, []).append(value)
+                        groups["by_department"].setdefault(department, []).append(value)
+                        groups["by_week"].setdefault(week, []).append(value)
         
-        return stats
+        return {metric: {name: exact_summary(values) if name == "all" else
+                         {value: exact_summary(group) for value, group in values.items()}
+                         for name, values in groups.items()}
+                for metric, groups in durations.items()}
+    
+    @retry_on_busy
+    def rebuild_sla_statistics(self):
+        """Recompute sla_sketch from complaint_lifecycle"""
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            for statement in SLA_REBUILD:
+                c.execute(statement)
+            conn.commit()
     
     def get_categories(self):
-        c = self.conn.cursor()
-        c.execute("SELECT name FROM categories ORDER BY name")
-        return [row[0] for row in c.fetchall()]
+        return list(self.lookups.get(("categories",), self._load_categories))
+    
+    def _load_categories(self):
+        with self.pool.reader() as conn:
+            c = conn.cursor()
+            c.execute("SELECT name FROM categories ORDER BY name")
+            return tuple(row[0] for row in c.fetchall())
+    
+    @retry_on_busy
+    def add_category(self, name, description=None):
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            try:
+                c.execute("INSERT INTO categories (name, description) VALUES (?, ?)", (name, description))
+                conn.commit()
+            except sqlite3.IntegrityError:
+                return False
+        self.lookups.invalidate("categories")
+        return True
+    
+    @retry_on_busy
+    def delete_category(self, name):
+        """Remove a category; complaints already filed under it keep the name"""
+        with self.pool.writer() as conn:
+            c = conn.cursor()
+            c.execute("DELETE FROM categories WHERE name=?", (name,))
+            conn.commit()
+        self.lookups.invalidate("categories")
+        return c.rowcount > 0
+    
+    def cache_stats(self):
+        """Hit/miss counters of the categories and users lookup cache"""
+        return self.lookups.stats()
+    
+    def result_cache_stats(self):
+        """Hit/miss counters of the listing id cache behind get_complaint_ids"""
+        return self.results.stats()
+    
+    # Instrumentation
+    def enable_instrumentation(self, slow_query_ms=SLOW_QUERY_MS):
+        """Time every public method and SQL statement from now on, logging
+        statements that take `slow_query_ms` or longer with their plan.
+        Enabling again only changes the threshold."""
+        if self.instrumentation is not None:
+            self.instrumentation.slow_query_ms = slow_query_ms
+        else:
+            Instrumentation(slow_query_ms).attach(self)
+        return True
+    
+    def disable_instrumentation(self):
+        """Stop timing and drop what was recorded"""
+        if self.instrumentation is not None:
+            self.instrumentation.detach(self)
+        return True
+    
+    def instrumentation_snapshot(self):
+        """Calls, rows and latency per method and statement, and the slow-query log, as a
+        JSON-ready dict; None while instrumentation is off"""
+        return self.instrumentation.snapshot() if self.instrumentation is not None else None
+    
+    def reset_instrumentation(self):
+        if self.instrumentation is not None:
+            self.instrumentation.reset()
+        return True
+    
+    def dump_instrumentation(self, path):
+        """Write instrumentation_snapshot() to a JSON file; False while instrumentation is off"""
+        if self.instrumentation is None:
+            return False
+        self.instrumentation.dump(path)
+        return True
     
     def close(self):
-        self.conn.close()
+        self.pool.close()
@@ -0,0 +1,163 @@
+# db_worker.py
+import queue
+import threading
+
+class DbFuture:
+    """Result of a call queued on the database thread"""
+
+    def __init__(self, key=None, notify=True):
+        self.key = key
+        self.notify = notify
+        self._event = threading.Event()
+        self._cancelled = False
+        self._result = None
+        self._error = None
+
+    def cancel(self):
+        """Drop the call if it has not run yet, and its result if it has"""
+        self._cancelled = True
+
+    def cancelled(self):
+        return self._cancelled
+
+    def done(self):
+        return self._event.is_set()
+
+    def result(self, timeout=None):
+        """Block until the call finished; only for use off the Tk thread or in tests"""
+        if not self._event.wait(timeout):
+            raise TimeoutError("database call did not finish in time")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+class AsyncDatabase:
+    """Runs every Database call on one dedicated thread.
+
+    Views queue work with submit() and get the result back on the Tk thread
+    through callback/errback, delivered by an after() poll loop, so a slow
+    disk or a locked database never blocks the main loop. Calls submitted
+    with the same `key` supersede each other: when filters change quickly
+    only the newest query's result is delivered.
+
+    Any other attribute is forwarded to the wrapped Database and runs
+    synchronously on the database thread, serialized with the queued work.
+    That is for other threads only: called from the Tk thread it raises
+    instead of blocking the main loop, so views have to use submit().
+    """
+
+    def __init__(self, db, root, poll_ms=15):
+        self.db = db
+        self.root = root
+        self.poll_ms = poll_ms
+
+        self._tasks = queue.Queue()
+        self._results = queue.Queue()
+        self._latest = {}
+        self._closed = False
+        self._tk_thread = threading.current_thread()
+
+        self.thread = threading.Thread(target=self._run, name="database", daemon=True)
+        self.thread.start()
+        self._poll_id = self.root.after(self.poll_ms, self._drain)
+
+    def submit(self, method, *args, callback=None, errback=None, key=None, owner=None, **kwargs):
+        """Queue `method` (a Database method name or a callable taking the
+        Database) and return a DbFuture.
+
+        callback(result) or errback(exception) run on the Tk thread. If
+        `owner` is a widget that has been destroyed by then, neither runs.
+        """
+        future = DbFuture(key)
+        if key is not None:
+            previous = self._latest.get(key)
+            if previous is not None:
+                previous.cancel()
+            self._latest[key] = future
+
+        self._tasks.put((future, method, args, kwargs, callback, errback, owner))
+        return future
+
+    def cancel(self, key):
+        future = self._latest.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def call(self, method, *args, **kwargs):
+        """Run a call on the database thread and wait for its result"""
+        current = threading.current_thread()
+        if current is self.thread:
+            return self._invoke(method, args, kwargs)
+        if current is self._tk_thread:
+            raise RuntimeError(f"{getattr(method, '__name__', method)}() would block the Tk thread; use submit()")
+        future = DbFuture(notify=False)
+        self._tasks.put((future, method, args, kwargs, None, None, None))
+        return future.result()
+
+    def __getattr__(self, name):
+        attr = getattr(self.db, name)
+        if not callable(attr):
+            return attr
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    def close(self):
+        """Stop the database thread once the queued work is done"""
+        if self._closed:
+            return
+        self._closed = True
+        self._tasks.put(None)
+        self.thread.join(timeout=5)
+        try:
+            self.root.after_cancel(self._poll_id)
+        except Exception:
+            pass
+
+    # Database thread
+    def _invoke(self, method, args, kwargs):
+        if callable(method):
+            return method(self.db, *args, **kwargs)
+        return getattr(self.db, method)(*args, **kwargs)
+
+    def _run(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            future = task[0]
+            if not future.cancelled():
+                try:
+                    future._result = self._invoke(task[1], task[2], task[3])
+                except Exception as e:
+                    future._error = e
+            future._event.set()
+            if future.notify:
+                self._results.put(task)
+
+    # Tk thread
+    def _drain(self):
+        while True:
+            try:
+                future, method, args, kwargs, callback, errback, owner = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if future.key is not None and self._latest.get(future.key) is future:
+                del self._latest[future.key]
+            if future.cancelled():
+                continue
+            if owner is not None and not owner.winfo_exists():
+                continue
+
+            try:
+                if future._error is not None:
+                    if errback is None:
+                        raise future._error
+                    errback(future._error)
+                elif callback is not None:
+                    callback(future._result)
+            except Exception as e:
+                self.root.report_callback_exception(type(e), e, e.__traceback__)
+
+        if not self._closed:
+            self._poll_id = self.root.after(self.poll_ms, self._drain)
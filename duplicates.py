@@ -0,0 +1,80 @@
+# duplicates.py
+# MinHash signatures and LSH band keys for spotting near-duplicate complaints.
+#
+# A complaint's text is reduced to its set of words, minus the filler words
+# every complaint shares. Its signature holds, for each of SIGNATURE_SIZE
+# hash functions, the smallest hash of any of those words; two signatures
+# agree in a position with probability equal to the Jaccard similarity of
+# the word sets. The signature is cut into LSH_BANDS bands of LSH_ROWS
+# positions and each band hashed to one key, so complaints sharing a band
+# key are candidates: a pair with similarity 0.5 shares at least one of 20
+# keys 93% of the time, a pair at 0.2 only 15% of the time. The database
+# stores the keys in an index, which makes finding the candidates for a new
+# complaint a handful of index lookups however many complaints are open.
+import functools
+import re
+import struct
+from hashlib import blake2b
+
+SIGNATURE_SIZE = 60
+LSH_BANDS = 20
+LSH_ROWS = SIGNATURE_SIZE // LSH_BANDS
+
+# Estimated similarity from which a candidate is reported as a likely duplicate
+DUPLICATE_THRESHOLD = 0.5
+
+WORDS = re.compile(r"[^\W_]+")
+STOP_WORDS = frozenset("""
+    a about above after again all also am an and any are as at be because been before being below between
+    both but by can could did do does doing down during each few for from further had has have having he her
+    here hers him his how i if in into is it its itself just me more most my no nor not now of off on once
+    only or other our out over own same she should since so some still such than that the their them then
+    there these they this those through to too under until up very was we were what when where which while
+    who why will with would you your please sir madam maam kindly issue problem complaint
+""".split())
+
+# Each word's SIGNATURE_SIZE hashes come from this many 64-byte digests
+_DIGESTS = -(-SIGNATURE_SIZE * 4 // 64)
+_SIGNATURE = struct.Struct(f"<{SIGNATURE_SIZE}I")
+_BAND = struct.Struct(f"<{LSH_ROWS}I")
+
+
+def words(text):
+    """The distinct words of `text` that say what it is about"""
+    return {word for word in WORDS.findall(text.lower()) if word not in STOP_WORDS}
+
+
+@functools.lru_cache(maxsize=50000)
+def _word_hashes(word):
+    data = word.encode("utf-8")
+    digest = b"".join(blake2b(data, salt=i.to_bytes(16, "little")).digest() for i in range(_DIGESTS))
+    return _SIGNATURE.unpack_from(digest)
+
+
+def signature(text):
+    """The MinHash signature of `text`, SIGNATURE_SIZE 32-bit integers, or
+    None when it has no words to go on"""
+    hashes = [_word_hashes(word) for word in words(text)]
+    if not hashes:
+        return None
+    return tuple(map(min, *hashes)) if len(hashes) > 1 else hashes[0]
+
+
+def band_keys(sig):
+    """One signed 64-bit key per band; equal keys mean the band matched"""
+    return [int.from_bytes(blake2b(_BAND.pack(*sig[band * LSH_ROWS:(band + 1) * LSH_ROWS]), digest_size=8,
+                                   salt=band.to_bytes(16, "little")).digest(), "little", signed=True)
+            for band in range(LSH_BANDS)]
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of the texts behind two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / SIGNATURE_SIZE
+
+
+def pack_signature(sig):
+    return _SIGNATURE.pack(*sig)
+
+
+def unpack_signature(blob):
+    return _SIGNATURE.unpack(blob)
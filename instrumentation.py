@@ -0,0 +1,364 @@
+# instrumentation.py
+# Opt-in timing of Database methods and of the SQL they run.
+#
+# attach() puts a timing wrapper in front of every public method of one
+# Database, and has its connection pool hand out connections whose cursors
+# time each statement from execute() to the last row fetched (or until the
+# connection goes back to the pool). Until then nothing is wrapped, and
+# detach() puts the plain methods back, so a database without
+# instrumentation pays one `is None` check per connection it borrows.
+# Statements slower than slow_query_ms go to the slow-query log with their
+# EXPLAIN QUERY PLAN.
+import functools
+import inspect
+import json
+import re
+import threading
+import time
+import types
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Latency histogram buckets: upper bounds from 25 us doubling to ~3.3 s
+LATENCY_BOUNDS_MS = [0.025 * 2 ** i for i in range(18)] + [float("inf")]
+LATENCY_QUANTILES = {"p50_ms": 0.5, "p90_ms": 0.9, "p99_ms": 0.99}
+
+SLOW_QUERY_MS = 100.0
+SLOW_QUERY_LOG_SIZE = 200
+
+# Parameters kept per slow-query log entry
+SLOW_QUERY_PARAMS = 20
+
+SNAPSHOT_FORMAT = 1
+
+# Public Database methods that are not timed: turning instrumentation on and
+# off and reading it, and close(), which runs after the last reading
+UNINSTRUMENTED = frozenset(("enable_instrumentation", "disable_instrumentation", "instrumentation_snapshot",
+                            "reset_instrumentation", "dump_instrumentation", "close"))
+
+_PLACEHOLDER_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+@functools.lru_cache(maxsize=2048)
+def statement_key(sql):
+    """One key for a statement however its whitespace and IN lists vary"""
+    return _PLACEHOLDER_LISTS.sub("?, ...", " ".join(sql.split()))
+
+
+def count_rows(result):
+    """Rows in a Database method's result: list length, 0 for None, else 1"""
+    if result is None:
+        return 0
+    if isinstance(result, (list, tuple, set)):
+        return len(result)
+    return 1
+
+
+def _json_param(value):
+    if isinstance(value, (bytes, memoryview)):
+        return f"<{len(value)} bytes>"
+    return value
+
+
+class LatencyHistogram:
+    """Calls, rows and a latency histogram for one method or statement"""
+
+    __slots__ = ("counts", "calls", "rows", "errors", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BOUNDS_MS)
+        self.calls = 0
+        self.rows = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, elapsed_ms, rows):
+        bucket = 0
+        while elapsed_ms > LATENCY_BOUNDS_MS[bucket]:
+            bucket += 1
+        self.counts[bucket] += 1
+        self.calls += 1
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the nearest-rank quantile, capped at the slowest call"""
+        if not self.calls:
+            return None
+        rank = max(1, round(q * self.calls))
+        seen = 0
+        for bound, count in zip(LATENCY_BOUNDS_MS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max_ms)
+
+    def to_json(self):
+        result = {"calls": self.calls, "errors": self.errors, "rows": self.rows,
+                  "total_ms": round(self.total_ms, 3),
+                  "mean_ms": round(self.total_ms / self.calls, 4) if self.calls else None}
+        for name, q in LATENCY_QUANTILES.items():
+            value = self.quantile(q)
+            result[name] = round(value, 4) if value is not None else None
+        result["max_ms"] = round(self.max_ms, 4)
+        result["histogram"] = [[bound if bound != float("inf") else None, count]
+                               for bound, count in zip(LATENCY_BOUNDS_MS, self.counts) if count]
+        return result
+
+
+class InstrumentedCursor:
+    """A cursor that reports each statement to an Instrumentation once its
+    rows have been read, or once it is closed, reused or given back"""
+
+    def __init__(self, cursor, monitor, conn):
+        self._cursor = cursor
+        self._monitor = monitor
+        self._conn = conn
+        self._sql = None
+
+    @property
+    def row_factory(self):
+        return self._cursor.row_factory
+
+    @row_factory.setter
+    def row_factory(self, factory):
+        self._cursor.row_factory = factory
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def _finish(self):
+        if self._sql is not None:
+            sql, self._sql = self._sql, None
+            self._monitor.record_statement(self._conn, sql, self._params, self._elapsed, self._rows)
+
+    def execute(self, sql, params=()):
+        self._finish()
+        start = time.perf_counter()
+        self._cursor.execute(sql, params)
+        self._elapsed = time.perf_counter() - start
+        self._sql = sql
+        self._params = params
+        self._rows = max(self._cursor.rowcount, 0)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        self._finish()
+        start = time.perf_counter()
+        self._cursor.executemany(sql, seq_of_params)
+        elapsed = time.perf_counter() - start
+        self._monitor.record_statement(self._conn, sql, None, elapsed, max(self._cursor.rowcount, 0))
+        return self
+
+    def fetchone(self):
+        start = time.perf_counter()
+        row = self._cursor.fetchone()
+        self._elapsed += time.perf_counter() - start
+        if row is None:
+            self._finish()
+        else:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        size = self._cursor.arraysize if size is None else size
+        start = time.perf_counter()
+        rows = self._cursor.fetchmany(size)
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        if len(rows) < size:
+            self._finish()
+        return rows
+
+    def fetchall(self):
+        start = time.perf_counter()
+        rows = self._cursor.fetchall()
+        self._elapsed += time.perf_counter() - start
+        self._rows += len(rows)
+        self._finish()
+        return rows
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        row = self.fetchone()
+        if row is None:
+            raise StopIteration
+        return row
+
+    def close(self):
+        self._finish()
+        self._cursor.close()
+
+
+class InstrumentedConnection:
+    """A pool connection whose cursors and commits are timed"""
+
+    def __init__(self, conn, monitor):
+        self._conn = conn
+        self._monitor = monitor
+        self._cursors = []
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def cursor(self):
+        cursor = InstrumentedCursor(self._conn.cursor(), self._monitor, self._conn)
+        self._cursors.append(cursor)
+        return cursor
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+    def commit(self):
+        start = time.perf_counter()
+        self._conn.commit()
+        self._monitor.record_statement(self._conn, "COMMIT", None, time.perf_counter() - start, 0)
+
+    def finish(self):
+        """Record the statements whose rows were not all read, while the
+        connection is still this borrower's to run EXPLAIN on"""
+        for cursor in self._cursors:
+            cursor._finish()
+        self._cursors = []
+
+
+class Instrumentation:
+    """Method and statement metrics of one Database, and its slow-query log"""
+
+    def __init__(self, slow_query_ms=SLOW_QUERY_MS, log_size=SLOW_QUERY_LOG_SIZE):
+        self.slow_query_ms = slow_query_ms
+        self.methods = {}
+        self.statements = {}
+        self.slow_queries = deque(maxlen=log_size)
+        self.started_at = datetime.now()
+        self._lock = threading.Lock()
+        self._wrapped = []
+
+    def attach(self, db):
+        """Start timing `db`; its methods are wrapped on the instance, not the class"""
+        for name, method in inspect.getmembers(type(db), inspect.isfunction):
+            if name.startswith("_") or name in UNINSTRUMENTED:
+                continue
+            setattr(db, name, self._timed_method(name, getattr(db, name)))
+            self._wrapped.append(name)
+        db.pool.monitor = self
+        db.instrumentation = self
+
+    def detach(self, db):
+        for name in self._wrapped:
+            db.__dict__.pop(name, None)
+        self._wrapped = []
+        db.pool.monitor = None
+        db.instrumentation = None
+
+    @contextmanager
+    def lend(self, conn):
+        """`conn` wrapped for one borrower of the pool"""
+        monitored = InstrumentedConnection(conn, self)
+        try:
+            yield monitored
+        finally:
+            monitored.finish()
+
+    def _timed_method(self, name, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = method(*args, **kwargs)
+            except BaseException:
+                self.record_method(name, None, 0)
+                raise
+            elapsed = time.perf_counter() - start
+            if isinstance(result, types.GeneratorType):
+                # Batches are read later; their time and rows count when the generator finishes
+                return self._timed_generator(name, result, elapsed)
+            self.record_method(name, elapsed, count_rows(result))
+            return result
+        return timed
+
+    def _timed_generator(self, name, generator, elapsed):
+        rows = 0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    batch = next(generator)
+                except StopIteration:
+                    elapsed += time.perf_counter() - start
+                    return
+                elapsed += time.perf_counter() - start
+                rows += count_rows(batch) if isinstance(batch, list) else 1
+                yield batch
+        finally:
+            generator.close()
+            self.record_method(name, elapsed, rows)
+
+    def record_method(self, name, elapsed, rows):
+        """Count one call of `name`; an elapsed of None counts an error"""
+        with self._lock:
+            stats = self.methods.get(name)
+            if stats is None:
+                stats = self.methods[name] = LatencyHistogram()
+            if elapsed is None:
+                stats.errors += 1
+            else:
+                stats.add(elapsed * 1000, rows)
+
+    def record_statement(self, conn, sql, params, elapsed, rows):
+        elapsed_ms = elapsed * 1000
+        key = statement_key(sql)
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = LatencyHistogram()
+            stats.add(elapsed_ms, rows)
+        if elapsed_ms >= self.slow_query_ms:
+            self.log_slow_query(conn, sql, params, elapsed_ms, rows)
+
+    def log_slow_query(self, conn, sql, params, elapsed_ms, rows):
+        plan = None
+        if params is not None and sql.lstrip().upper().startswith(("SELECT", "WITH", "INSERT", "UPDATE", "DELETE")):
+            try:
+                plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+            except Exception as e:
+                plan = [f"EXPLAIN QUERY PLAN failed: {e}"]
+        if isinstance(params, dict):
+            params = {name: _json_param(value) for name, value in list(params.items())[:SLOW_QUERY_PARAMS]}
+        elif params is not None:
+            params = [_json_param(value) for value in list(params)[:SLOW_QUERY_PARAMS]]
+        entry = {"at": datetime.now().isoformat(sep=" ", timespec="seconds"), "sql": " ".join(sql.split()),
+                 "params": params, "elapsed_ms": round(elapsed_ms, 3), "rows": rows, "plan": plan}
+        with self._lock:
+            self.slow_queries.append(entry)
+
+    def reset(self):
+        with self._lock:
+            self.methods = {}
+            self.statements = {}
+            self.slow_queries.clear()
+            self.started_at = datetime.now()
+
+    def snapshot(self):
+        """Everything recorded so far as a JSON-ready dict"""
+        with self._lock:
+            methods = {name: stats.to_json() for name, stats in sorted(self.methods.items())}
+            statements = {sql: stats.to_json() for sql, stats in self.statements.items()}
+            slow_queries = list(self.slow_queries)
+        return {"format": SNAPSHOT_FORMAT,
+                "started_at": self.started_at.isoformat(sep=" ", timespec="seconds"),
+                "taken_at": datetime.now().isoformat(sep=" ", timespec="seconds"),
+                "slow_query_ms": self.slow_query_ms,
+                "methods": methods, "statements": statements, "slow_queries": slow_queries}
+
+    def dump(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
@@ -1,13 +1,14 @@
 # main.py
+import argparse
 import customtkinter as ctk
 import tkinter.messagebox as tkmb
+from change_feed import ChangeFeed
 from database import Database
+from db_worker import AsyncDatabase
 from views.login_view import LoginView
-from views.student_view import StudentView
-from views.teacher_view import TeacherView
 
 class ComplaintManagementApp(ctk.CTk):
-    def __init__(self):
+    def __init__(self, database=None, diagnostics=False):
         super().__init__()
         
         ctk.set_appearance_mode("System")
@@ -17,8 +18,12 @@ class ComplaintManagementApp(ctk.CTk):
         self.geometry("1200x700")
         self.resizable(True, True)
         
-        # Initialize database
-        self.db = Database()
+        # Initialize database (local file, or a RemoteDatabase for server.py);
+        # views talk to it through the background worker
+        self.db = AsyncDatabase(database or Database(), self)
+        self.changes = ChangeFeed(self.db, self)
+        # Teachers get a Diagnostics tab with the database instrumentation
+        self.diagnostics = diagnostics
         
         # Current user and view
         self.current_user = None
@@ -43,23 +48,51 @@ class ComplaintManagementApp(ctk.CTk):
         if self.current_view:
             self.current_view.destroy()
         
+        # Only the view for this role is ever imported
         if role == "Student":
-            self.current_view = StudentView(self, self.db, user, self.logout)
+            from views.student_view import StudentView
+            self.current_view = StudentView(self, self.db, user, self.logout, self.changes)
         else:  # Teacher
-            self.current_view = TeacherView(self, self.db, user, self.logout)
+            from views.teacher_view import TeacherView
+            self.current_view = TeacherView(self, self.db, user, self.logout, self.changes,
+                                            diagnostics=self.diagnostics)
         
         self.current_view.pack(fill="both", expand=True)
     
     def logout(self):
         """Logout current user"""
+        if hasattr(self.db.db, "logout"):
+            # End the server session when running against server.py
+            self.db.submit("logout")
         self.show_login()
     
     def on_closing(self):
         """Clean up on window close"""
+        database = self.db.db
+        self.changes.stop()
         self.db.close()
+        database.close()
         self.destroy()
 
 if __name__ == "__main__":
-    app = ComplaintManagementApp()
+    parser = argparse.ArgumentParser(description="College Complaint Management System")
+    parser.add_argument("--server", help="use a server.py service, e.g. http://complaints-host:8765, "
+                                         "instead of the local database file")
+    parser.add_argument("--diagnostics", action="store_true",
+                        help="time database methods and statements and show them to teachers on a Diagnostics tab")
+    parser.add_argument("--slow-query-ms", type=float, default=None,
+                        help="log statements taking this long with their query plan (implies --diagnostics)")
+    args = parser.parse_args()
+    diagnostics = args.diagnostics or args.slow_query_ms is not None
+    
+    database = None
+    if args.server:
+        from remote_database import RemoteDatabase
+        database = RemoteDatabase(args.server)
+    elif diagnostics:
+        database = Database()
+        database.enable_instrumentation(*(() if args.slow_query_ms is None else (args.slow_query_ms,)))
+    
+    app = ComplaintManagementApp(database, diagnostics)
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
     app.mainloop()
@@ -0,0 +1,110 @@
+# passwords.py
+import base64
+import hashlib
+import hmac
+import os
+import re
+import threading
+
+# Cost settings; benchmarks/bench_password_hash.py suggests values for a
+# target login time on the machine it runs on
+DEFAULT_ALGORITHM = "scrypt" if hasattr(hashlib, "scrypt") else "pbkdf2_sha256"
+SCRYPT_PARAMS = {"n": 2 ** 14, "r": 8, "p": 1}
+PBKDF2_ITERATIONS = 600_000
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+# Unsalted sha256 hex digests written before hashes carried their algorithm
+LEGACY_SHA256 = re.compile(r"[0-9a-f]{64}")
+
+
+def _b64encode(data):
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _b64decode(text):
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+class PasswordHasher:
+    """Salted, deliberately slow password hashes in a self-describing format.
+
+    A stored hash reads "algorithm$params$salt$key", e.g.
+    "scrypt$n=16384,r=8,p=1$<salt>$<key>" or
+    "pbkdf2_sha256$i=600000$<salt>$<key>", so the cost can be raised later
+    without breaking existing accounts: needs_rehash() tells the caller to
+    store a fresh hash after the next successful login. Bare sha256 digests
+    from older databases still verify and always need a rehash.
+
+    Both algorithms release the GIL, but each scrypt call also needs
+    128 * n * r bytes of memory, so at most `max_concurrent` hashes run at
+    once and a burst of logins queues instead of exhausting CPU and memory.
+    """
+
+    def __init__(self, algorithm=DEFAULT_ALGORITHM, scrypt_params=None, pbkdf2_iterations=PBKDF2_ITERATIONS,
+                 max_concurrent=None):
+        if algorithm not in ("scrypt", "pbkdf2_sha256"):
+            raise ValueError(f"unknown password hash algorithm {algorithm!r}")
+        self.algorithm = algorithm
+        self.scrypt_params = dict(scrypt_params or SCRYPT_PARAMS)
+        self.pbkdf2_iterations = pbkdf2_iterations
+        self._slots = threading.BoundedSemaphore(max_concurrent or os.cpu_count() or 2)
+        # Verified against for unknown usernames, so a miss costs as much as a hit
+        self._dummy_hash = None
+
+    def _params(self):
+        if self.algorithm == "scrypt":
+            return dict(self.scrypt_params)
+        return {"i": self.pbkdf2_iterations}
+
+    def _derive(self, algorithm, params, password, salt):
+        with self._slots:
+            if algorithm == "scrypt":
+                n, r, p = params["n"], params["r"], params["p"]
+                return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                                      maxmem=256 * n * r + 1024 * 1024, dklen=KEY_BYTES)
+            return hashlib.pbkdf2_hmac("sha256", password.encode(), salt, params["i"], dklen=KEY_BYTES)
+
+    def hash(self, password):
+        salt = os.urandom(SALT_BYTES)
+        params = self._params()
+        key = self._derive(self.algorithm, params, password, salt)
+        encoded = ",".join(f"{name}={value}" for name, value in params.items())
+        return f"{self.algorithm}${encoded}${_b64encode(salt)}${_b64encode(key)}"
+
+    def _parse(self, stored):
+        """(algorithm, params, salt, key) of a stored hash, or None if it is not one"""
+        try:
+            algorithm, encoded, salt, key = stored.split("$")
+            params = dict((name, int(value)) for name, value in
+                          (item.split("=") for item in encoded.split(",")))
+            return algorithm, params, _b64decode(salt), _b64decode(key)
+        except (ValueError, TypeError):
+            return None
+
+    def verify(self, password, stored):
+        if stored is None:
+            # Same work as a real check, so timing does not reveal unknown usernames
+            if self._dummy_hash is None:
+                self._dummy_hash = self.hash("")
+            self.verify(password, self._dummy_hash)
+            return False
+        if LEGACY_SHA256.fullmatch(stored):
+            digest = hashlib.sha256(password.encode()).hexdigest()
+            return hmac.compare_digest(digest, stored)
+        parsed = self._parse(stored)
+        if parsed is None or parsed[0] not in ("scrypt", "pbkdf2_sha256"):
+            return False
+        algorithm, params, salt, key = parsed
+        try:
+            derived = self._derive(algorithm, params, password, salt)
+        except (KeyError, ValueError):
+            return False
+        return hmac.compare_digest(derived, key)
+
+    def needs_rehash(self, stored):
+        parsed = self._parse(stored)
+        if parsed is None:
+            return True
+        algorithm, params, salt, key = parsed
+        return algorithm != self.algorithm or params != self._params()
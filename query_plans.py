@@ -0,0 +1,224 @@
+# query_plans.py
+# Query-plan guard for database.py.
+#
+# Every public Database method is exercised against a scratch database while
+# the SQL it issues is captured with a trace callback. Each captured statement
+# is then run through EXPLAIN QUERY PLAN and flagged if SQLite falls back to a
+# full table scan or builds a temporary B-tree to sort or group. Full-text
+# searches may sort their match set, which is bounded by the number of hits.
+#
+# Usage:
+#     python query_plans.py            # exits 1 and lists offenders on failure
+#
+# or from a test runner:
+#     from query_plans import assert_query_plans
+#     assert_query_plans()
+import os
+import re
+import sys
+import tempfile
+from database import Database
+
+# Statements that never go through the planner in an interesting way
+SKIPPED_PREFIXES = ("INSERT INTO", "PRAGMA", "BEGIN", "COMMIT", "ROLLBACK",
+                    "CREATE", "DROP", "SAVEPOINT", "RELEASE", "ANALYZE")
+
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+FILTER_VALUES = [None, "All", "Open"]
+
+
+def exercise_database(db):
+    """Call every public Database method at least once with realistic arguments"""
+    db.register_user("plan_student", "secret1", "Student", "Plan Student",
+                     "plan@college.edu", "Physics", "2024PH001")
+    student = db.authenticate_user("plan_student", "secret1", "Student")
+    teacher = db.authenticate_user("admin", "admin123", "Teacher")
+    db.get_user_by_id(student.id)
+
+    complaint_id = db.add_complaint(student.id, "Plan Student", "2024PH001", "Physics", "B.Sc",
+                                    "Other", "The lab projector has been broken for a week",
+                                    "Infrastructure", "High")
+    db.add_response(complaint_id, teacher.id, "Technician has been informed")
+    db.update_complaint_status(complaint_id, "In Progress", teacher.id)
+    db.bulk_update_status([complaint_id], "Open", teacher.id)
+    db.bulk_update_status([complaint_id], "In Progress", teacher.id)
+
+    for status in FILTER_VALUES:
+        for category in (None, "Infrastructure"):
+            for priority in (None, "High"):
+                db.get_all_complaints(None, status, category, priority)
+    db.get_all_complaints("projector", "All", "All", "All")
+    for status in FILTER_VALUES:
+        for page in db.iter_complaints_page(limit=1, status_filter=status):
+            pass
+        list(db.iter_complaints_page(after=("9999-12-31", 0), limit=1,
+                                     category_filter="Infrastructure", priority_filter="High"))
+    db.search_complaints("projector", "All", "All", "All")
+    db.count_complaints(None, "Open", "Infrastructure")
+    for batch in db.iter_export_batches({"status_filter": "Open", "priority_filter": "High"}):
+        pass
+    db.search_complaints('"lab projector" brok', "Open", "Infrastructure", "High", limit=20, offset=20)
+
+    db.get_complaint_row(complaint_id)
+    db.get_complaint_row(complaint_id, "projector", "Open", "Infrastructure", "High")
+    db.get_user_complaints(student.id)
+    db.get_complaint_by_id(complaint_id)
+    db.get_responses(complaint_id)
+    db.get_status_history(complaint_id)
+    db.load_complaint_bundle(complaint_id)
+    seq = db.latest_change_seq()
+    db.get_changes_since(0)
+    db.get_changes_since(seq - 1, user_id=student.id)
+    db.get_complaint_rows([complaint_id], "projector", "Open", "Infrastructure", "High")
+    for status in FILTER_VALUES:
+        db.get_complaint_ids(None, status, "Infrastructure", "High")
+    db.get_complaint_ids("projector", "Open", "All", "All")
+    db.get_complaint_ids(None, "All", "All", "All")
+    db.prune_change_log()
+    db.get_statistics()
+    db.verify_statistics()
+    db.rebuild_statistics()
+    db.get_sla_statistics()
+    db.get_sla_statistics(since="2024-01-01")
+    duplicate_id = db.add_complaint(student.id, "Plan Student", "2024PH001", "Physics", "B.Sc", "Other",
+                                    "The projector in the lab has been broken for a week", "Infrastructure",
+                                    "High", duplicate_of=complaint_id)
+    db.find_duplicates("Lab projector broken since last week")
+    db.find_duplicates("The lab projector has been broken for a week", exclude=complaint_id)
+    db.link_duplicates([duplicate_id], complaint_id)
+    db.get_duplicate_links([complaint_id, duplicate_id])
+    db.unlink_duplicates([duplicate_id])
+    db.index_duplicates()
+    db.suggest_labels("The projector in the lab is broken")
+    db.update_complaint_status(duplicate_id, "In Progress", teacher.id)
+    db.suggest_labels("The projector in the lab is broken")
+    db.get_categories()
+    db.add_category("Plan Category", "Added by the query plan check")
+    db.delete_category("Plan Category")
+
+    # Hot and archived complaints together
+    db.update_complaint_status(complaint_id, "Closed", teacher.id)
+    db.archive_complaints(older_than_days=-1)
+    db.archive_size()
+    db.get_complaint_by_id(complaint_id, include_archive=True)
+    db.get_responses(complaint_id, include_archive=True)
+    db.get_status_history(complaint_id, include_archive=True)
+    db.load_complaint_bundle(complaint_id)
+    db.get_user_complaints(student.id, include_archive=True)
+    db.get_complaint_row(complaint_id, "projector", "Closed", include_archive=True)
+    db.get_all_complaints(None, "Closed", "Infrastructure", None, include_archive=True)
+    list(db.iter_complaints_page(limit=1, status_filter="Closed", include_archive=True))
+    db.search_complaints("projector", "Closed", include_archive=True)
+    db.get_complaint_ids("projector", "Closed", include_archive=True)
+    db.get_complaint_ids(None, "Closed", "Infrastructure", include_archive=True)
+    db.count_complaints("projector", include_archive=True)
+    for batch in db.iter_export_batches({"status_filter": "Closed", "include_archive": True}):
+        pass
+    db.get_statistics(include_archive=True)
+    db.get_sla_statistics()
+
+    db.delete_complaint(db.add_complaint(student.id, "Plan Student", "2024PH001", "Physics", "B.Sc",
+                                         "Other", "Temporary complaint", "Other", "Low"))
+
+
+def exercise_full_scans(db):
+    """Checks and rebuilds that read every row on purpose. They are run, so
+    their SQL is known to work, but their plans are not checked."""
+    db.compute_sla_statistics()
+    db.compute_sla_statistics(since="2024-01-01")
+    db.rebuild_sla_statistics()
+    db.rebuild_duplicate_index()
+    db.train_suggestions()
+    for batch in db.iter_suggestion_examples():
+        pass
+    with tempfile.TemporaryDirectory() as scratch:
+        db.export_snapshot(os.path.join(scratch, "snapshot.npz"))
+    exercise_instrumentation(db)
+
+
+def exercise_instrumentation(db):
+    """exercise_database again through the instrumentation wrappers, with
+    every statement logged as slow so each one has its plan explained"""
+    db.enable_instrumentation(slow_query_ms=0)
+    try:
+        exercise_database(db)
+        snapshot = db.instrumentation_snapshot()
+        with tempfile.TemporaryDirectory() as scratch:
+            db.dump_instrumentation(os.path.join(scratch, "instrumentation.json"))
+        db.reset_instrumentation()
+    finally:
+        db.disable_instrumentation()
+    failed = [entry["sql"] for entry in snapshot["slow_queries"]
+              if entry["plan"] and entry["plan"][0].startswith("EXPLAIN QUERY PLAN failed")]
+    if failed:
+        raise AssertionError("Slow-query log could not explain:\n" + "\n".join(failed))
+
+
+def explain(conn, sql):
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def plan_problems(plan):
+    """Return the plan lines that indicate a full scan or a temp B-tree sort"""
+    problems = []
+    full_text = any("VIRTUAL TABLE" in detail for detail in plan)
+    for detail in plan:
+        if FULL_SCAN.match(detail):
+            problems.append(detail)
+        elif "USE TEMP B-TREE" in detail and not full_text:
+            problems.append(detail)
+    return problems
+
+
+def collect_statements(db):
+    statements = []
+    db.conn.set_trace_callback(statements.append)
+    try:
+        exercise_database(db)
+    finally:
+        db.conn.set_trace_callback(None)
+    exercise_full_scans(db)
+
+    unique = []
+    for sql in statements:
+        sql = " ".join(sql.split())
+        if sql.startswith("--"):
+            # Trigger programs are traced as comments naming the trigger
+            continue
+        if sql.upper().startswith(SKIPPED_PREFIXES) and "SELECT" not in sql.upper():
+            continue
+        if sql not in unique:
+            unique.append(sql)
+    return unique
+
+
+def check_query_plans(dbname=":memory:"):
+    """Return a list of (sql, offending plan lines) for every bad query"""
+    db = Database(dbname)
+    try:
+        offenders = []
+        for sql in collect_statements(db):
+            problems = plan_problems(explain(db.conn, sql))
+            if problems:
+                offenders.append((sql, problems))
+        return offenders
+    finally:
+        db.close()
+
+
+def assert_query_plans(dbname=":memory:"):
+    offenders = check_query_plans(dbname)
+    if offenders:
+        lines = [f"{sql}\n    -> {'; '.join(problems)}" for sql, problems in offenders]
+        raise AssertionError("Queries without index support:\n" + "\n".join(lines))
+
+
+if __name__ == "__main__":
+    offenders = check_query_plans()
+    for sql, problems in offenders:
+        print(sql)
+        for detail in problems:
+            print(f"    -> {detail}")
+    print(f"{len(offenders)} query plan problem(s) found")
+    sys.exit(1 if offenders else 0)
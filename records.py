@@ -0,0 +1,170 @@
+# records.py
+
+# Record types by name, for decoding them from JSON
+RECORD_TYPES = {}
+
+
+class Record:
+    """Base for the row types Database returns.
+
+    Subclasses only list their columns in __slots__, so a row costs one small
+    object with no per-instance __dict__, and views read `comp.status`
+    instead of `comp[9]`. Used directly as a cursor row_factory through
+    from_row(). Rows compare equal when they hold the same values, which is
+    what the list reconciliation relies on.
+    """
+
+    __slots__ = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        RECORD_TYPES[cls.__name__] = cls
+        # A generated __init__ with one parameter per column, as namedtuple
+        # does; a generic setattr loop makes large fetches markedly slower
+        args = ", ".join(cls.__slots__)
+        body = "".join(f"    self.{name} = {name}\n" for name in cls.__slots__)
+        namespace = {}
+        exec(f"def __init__(self, {args}):\n{body}", namespace)
+        cls.__init__ = namespace["__init__"]
+
+    @classmethod
+    def from_row(cls, cursor, row):
+        return cls(*row)
+
+    def __iter__(self):
+        for name in self.__slots__:
+            yield getattr(self, name)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __repr__(self):
+        values = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({values})"
+
+    def _asdict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class User(Record):
+    __slots__ = ("id", "username", "role", "full_name", "email", "department", "roll_no", "created_at")
+
+    COLUMNS = "id, username, role, full_name, email, department, roll_no, created_at"
+
+
+class ComplaintSummary(Record):
+    """A row of the teacher's complaint list"""
+
+    __slots__ = ("id", "name", "roll_no", "department", "category", "priority", "status",
+                 "submitted_at", "user_id")
+
+    COLUMNS = ("c.id, c.name, c.roll_no, c.department, c.category, c.priority, c.status, "
+               "c.submitted_at, c.user_id")
+
+
+class StudentComplaint(Record):
+    """A card in the student's own complaint list"""
+
+    __slots__ = ("id", "course", "complaint", "category", "priority", "status", "submitted_at")
+
+    COLUMNS = "id, course, complaint, category, priority, status, submitted_at"
+
+
+class ComplaintDetail(Record):
+    """Every complaint column plus who submitted it"""
+
+    __slots__ = ("id", "user_id", "name", "roll_no", "department", "course", "gender", "complaint",
+                 "category", "priority", "status", "submitted_at", "updated_at",
+                 "submitter_name", "submitter_email")
+
+    COLUMNS = ("id, user_id, name, roll_no, department, course, gender, complaint, "
+               "category, priority, status, submitted_at, updated_at")
+
+
+class Response(Record):
+    __slots__ = ("id", "complaint_id", "responder_id", "response", "responded_at",
+                 "responder_name", "responder_role")
+
+    COLUMNS = "id, complaint_id, responder_id, response, responded_at"
+
+
+class StatusChange(Record):
+    __slots__ = ("id", "complaint_id", "old_status", "new_status", "changed_by", "changed_at",
+                 "changed_by_name")
+
+    COLUMNS = "id, complaint_id, old_status, new_status, changed_by, changed_at"
+
+
+class Change(Record):
+    """One change_log entry"""
+
+    __slots__ = ("seq", "table_name", "op", "complaint_id", "user_id")
+
+    COLUMNS = "seq, table_name, op, complaint_id, user_id"
+
+
+class DuplicateMatch(Record):
+    """An open complaint that a new one looks like; `duplicates` counts the
+    complaints already linked to it"""
+
+    __slots__ = ("id", "complaint", "category", "status", "submitted_at", "similarity", "duplicates")
+
+
+class DuplicateLink(Record):
+    """How a listed complaint takes part in a duplicate cluster: the
+    complaint it was linked to, or the ids linked to it"""
+
+    __slots__ = ("complaint_id", "duplicate_of", "duplicates")
+
+
+class LabelSuggestion(Record):
+    """The most likely category and priority for a complaint's text, with
+    their probabilities"""
+
+    __slots__ = ("category", "category_confidence", "priority", "priority_confidence")
+
+
+class ComplaintBundle:
+    """Everything the complaint detail windows show, read in one transaction"""
+
+    __slots__ = ("complaint", "responses", "history", "archived")
+
+    def __init__(self, complaint, responses, history, archived=False):
+        self.complaint = complaint
+        self.responses = responses
+        self.history = history
+        self.archived = archived
+
+    def __repr__(self):
+        return (f"ComplaintBundle(complaint={self.complaint.id}, responses={len(self.responses)}, "
+                f"history={len(self.history)}, archived={self.archived})")
+
+
+def to_json(value):
+    """JSON-ready copy of a Database result, keeping record types"""
+    if isinstance(value, Record):
+        return {"__record__": type(value).__name__, "values": [to_json(v) for v in value]}
+    if isinstance(value, ComplaintBundle):
+        return {"__record__": "ComplaintBundle",
+                "values": [to_json(value.complaint), to_json(value.responses), to_json(value.history),
+                           value.archived]}
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    if isinstance(value, dict):
+        return {k: to_json(v) for k, v in value.items()}
+    return value
+
+
+def from_json(obj):
+    """json.loads object_hook that turns to_json() records back into records"""
+    name = obj.get("__record__")
+    if name == "ComplaintBundle":
+        return ComplaintBundle(*obj["values"])
+    if name is not None:
+        return RECORD_TYPES[name](*obj["values"])
+    return obj
@@ -0,0 +1,250 @@
+# remote_database.py
+import http.client
+import json
+import threading
+from urllib.parse import urlsplit
+
+from database import Database, EXPORT_BATCH_SIZE
+from records import from_json, to_json
+
+ERROR_TYPES = {"ValueError": ValueError, "TypeError": TypeError, "PermissionError": PermissionError,
+               "LookupError": LookupError}
+
+
+class RemoteError(RuntimeError):
+    """The server failed a call for a reason other than bad arguments"""
+
+
+class RemoteDatabase:
+    """Database stand-in that sends every call to a server.py process.
+
+    It offers the methods the views use with the same arguments and return
+    types, so ComplaintManagementApp runs unchanged on top of it (through
+    AsyncDatabase as usual). Each thread keeps its own keep-alive connection.
+    The session from a successful authenticate_user() is sent with every
+    later call. Errors come back as the exception type the server raised
+    where that is a plain argument error (ValueError, PermissionError, ...).
+    """
+
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.timeout = timeout
+        self.session = None
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+            conn = connection_class(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, path, args, kwargs):
+        body = json.dumps({"args": to_json(list(args)), "kwargs": to_json(kwargs)})
+        headers = {"Content-Type": "application/json"}
+        if self.session:
+            headers["Authorization"] = f"Bearer {self.session}"
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request("POST", path, body, headers)
+                return conn.getresponse()
+            except (ConnectionError, http.client.RemoteDisconnected, http.client.CannotSendRequest):
+                # The server closed an idle keep-alive connection: reconnect once
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+    def _raise_for(self, response, data):
+        try:
+            error = json.loads(data)["error"]
+        except (ValueError, KeyError, TypeError):
+            raise RemoteError(f"HTTP {response.status} from {self.url}")
+        raise ERROR_TYPES.get(error["type"], RemoteError)(error["message"])
+
+    def call(self, method, *args, **kwargs):
+        response = self._request(f"/api/{method}", args, kwargs)
+        data = response.read()
+        if response.status != 200:
+            self._raise_for(response, data)
+        reply = json.loads(data, object_hook=from_json)
+        if "session" in reply:
+            self.session = reply["session"]
+        return reply["result"]
+
+    def stream(self, method, *args, **kwargs):
+        """Yield the batches a /stream/ method sends, one JSON line each"""
+        response = self._request(f"/stream/{method}", args, kwargs)
+        if response.status != 200:
+            self._raise_for(response, response.read())
+        try:
+            for line in response:
+                yield json.loads(line, object_hook=from_json)
+        finally:
+            if not response.isclosed():
+                # Abandoned midway: the rest of the stream cannot be skipped
+                self._connection().close()
+                self._local.conn = None
+
+    # Users
+    def authenticate_user(self, username, password, role):
+        return self.call("authenticate_user", username, password, role)
+
+    def register_user(self, username, password, role, full_name, email, department, roll_no=None):
+        return tuple(self.call("register_user", username, password, role, full_name, email, department, roll_no))
+
+    def get_user_by_id(self, user_id):
+        return self.call("get_user_by_id", user_id)
+
+    def logout(self):
+        """End the server session of the logged-in account"""
+        if self.session:
+            self._request("/logout", (), {}).read()
+            self.session = None
+
+    # Complaints
+    def add_complaint(self, user_id, name, roll_no, department, course, gender, complaint, category, priority,
+                      duplicate_of=None):
+        return self.call("add_complaint", user_id, name, roll_no, department, course, gender, complaint,
+                         category, priority, duplicate_of)
+
+    def get_all_complaints(self, search=None, status_filter=None, category_filter=None, priority_filter=None,
+                           include_archive=False):
+        rows = []
+        for page in self.iter_complaints_page(search=search, status_filter=status_filter,
+                                              category_filter=category_filter, priority_filter=priority_filter,
+                                              include_archive=include_archive, limit=500):
+            rows.extend(page)
+        return rows
+
+    def iter_complaints_page(self, after=None, limit=50, search=None, status_filter=None,
+                             category_filter=None, priority_filter=None, include_archive=False):
+        """Pages from the server, one request per page, as Database.iter_complaints_page"""
+        while True:
+            page = self.call("get_complaints_page", after, limit, search, status_filter, category_filter,
+                             priority_filter, include_archive)
+            if page:
+                yield page
+            if len(page) < limit:
+                return
+            after = (page[-1].submitted_at, page[-1].id)
+
+    def get_complaint_ids(self, search=None, status_filter=None, category_filter=None, priority_filter=None,
+                          include_archive=False):
+        ids, complete = self.call("get_complaint_ids", search, status_filter, category_filter, priority_filter,
+                                  include_archive)
+        return tuple(ids), complete
+
+    def search_complaints(self, search, status_filter=None, category_filter=None, priority_filter=None,
+                          limit=None, offset=0, include_archive=False):
+        return self.call("search_complaints", search, status_filter, category_filter, priority_filter,
+                         limit, offset, include_archive)
+
+    def count_complaints(self, search=None, status_filter=None, category_filter=None, priority_filter=None,
+                         include_archive=False):
+        return self.call("count_complaints", search, status_filter, category_filter, priority_filter,
+                         include_archive)
+
+    def get_complaint_row(self, complaint_id, search=None, status_filter=None, category_filter=None,
+                          priority_filter=None, include_archive=False):
+        return self.call("get_complaint_row", complaint_id, search, status_filter, category_filter,
+                         priority_filter, include_archive)
+
+    def get_complaint_rows(self, complaint_ids, search=None, status_filter=None, category_filter=None,
+                           priority_filter=None, include_archive=False):
+        return self.call("get_complaint_rows", list(complaint_ids), search, status_filter, category_filter,
+                         priority_filter, include_archive)
+
+    def iter_export_batches(self, filters=None, batch_size=EXPORT_BATCH_SIZE):
+        for batch in self.stream("iter_export_batches", filters, batch_size):
+            yield [tuple(row) for row in batch]
+
+    # Written locally from the streamed batches, exactly as Database does it
+    export_complaints = Database.export_complaints
+
+    def get_user_complaints(self, user_id, include_archive=False):
+        return self.call("get_user_complaints", user_id, include_archive)
+
+    def get_complaint_by_id(self, complaint_id, include_archive=False):
+        return self.call("get_complaint_by_id", complaint_id, include_archive)
+
+    def load_complaint_bundle(self, complaint_id, include_archive=True):
+        return self.call("load_complaint_bundle", complaint_id, include_archive)
+
+    def update_complaint_status(self, complaint_id, new_status, changed_by):
+        return self.call("update_complaint_status", complaint_id, new_status, changed_by)
+
+    def bulk_update_status(self, complaint_ids, new_status, changed_by):
+        return self.call("bulk_update_status", list(complaint_ids), new_status, changed_by)
+
+    def delete_complaint(self, complaint_id):
+        return self.call("delete_complaint", complaint_id)
+
+    def add_response(self, complaint_id, responder_id, response):
+        return self.call("add_response", complaint_id, responder_id, response)
+
+    def get_responses(self, complaint_id, include_archive=False):
+        return self.call("get_responses", complaint_id, include_archive)
+
+    def get_status_history(self, complaint_id, include_archive=False):
+        return self.call("get_status_history", complaint_id, include_archive)
+
+    # Duplicates
+    def find_duplicates(self, text, limit=5, exclude=None):
+        return self.call("find_duplicates", text, limit, exclude)
+
+    def link_duplicates(self, complaint_ids, duplicate_of):
+        return self.call("link_duplicates", list(complaint_ids), duplicate_of)
+
+    def unlink_duplicates(self, complaint_ids):
+        return self.call("unlink_duplicates", list(complaint_ids))
+
+    def get_duplicate_links(self, complaint_ids):
+        return self.call("get_duplicate_links", list(complaint_ids))
+
+    # Suggestions
+    def suggest_labels(self, text):
+        return self.call("suggest_labels", text)
+
+    # Change feed
+    def latest_change_seq(self):
+        return self.call("latest_change_seq")
+
+    def get_changes_since(self, seq, limit=None, user_id=None):
+        kwargs = {"user_id": user_id} if limit is None else {"limit": limit, "user_id": user_id}
+        return self.call("get_changes_since", seq, **kwargs)
+
+    # Statistics and categories
+    def get_statistics(self, include_archive=False):
+        return self.call("get_statistics", include_archive)
+
+    def get_sla_statistics(self, since=None):
+        return self.call("get_sla_statistics", None if since is None else str(since))
+
+    def get_categories(self):
+        return self.call("get_categories")
+
+    def add_category(self, name, description=None):
+        return self.call("add_category", name, description)
+
+    def delete_category(self, name):
+        return self.call("delete_category", name)
+
+    # Instrumentation of the server's database, switched on with server.py --instrument
+    def instrumentation_snapshot(self):
+        return self.call("instrumentation_snapshot")
+
+    def reset_instrumentation(self):
+        return self.call("reset_instrumentation")
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,51 @@
+# scripts/archive_complaints.py
+# Move resolved and closed complaints into the archive database file.
+#
+#     python scripts/archive_complaints.py --older-than 30days
+#     python scripts/archive_complaints.py --older-than 90d --status Closed --db college_complaints.db
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import ARCHIVE_BATCH_SIZE, ARCHIVE_STATUSES, Database
+
+
+def parse_days(text):
+    match = re.fullmatch(r"\s*(\d+)\s*(d|days?)?\s*", text)
+    if not match:
+        raise argparse.ArgumentTypeError(f"expected a number of days like 30days, got {text!r}")
+    return int(match.group(1))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive finished complaints")
+    parser.add_argument("--db", default="college_complaints.db", help="database file")
+    parser.add_argument("--archive", help="archive file (default: <db>_archive.db next to the database)")
+    parser.add_argument("--older-than", type=parse_days, default=30,
+                        help="only complaints not updated for this long, e.g. 30days (default: 30)")
+    parser.add_argument("--status", action="append", choices=["Open", "In Progress", "Resolved", "Closed"],
+                        help="status to archive, repeatable (default: Resolved and Closed)")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="complaints per transaction")
+    args = parser.parse_args()
+
+    def progress(moved):
+        print(f"\r{moved:,} complaints archived", end="", file=sys.stderr)
+
+    db = Database(args.db, archive=args.archive)
+    try:
+        moved = db.archive_complaints(args.older_than, tuple(args.status or ARCHIVE_STATUSES),
+                                      batch_size=args.batch_size, progress=progress)
+        hot, cold = db.archive_size()
+    finally:
+        db.close()
+
+    print(f"\nArchived {moved:,} complaints to {db.archive_path}; "
+          f"{hot:,} remain in {args.db}, {cold:,} in the archive", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+# scripts/export_complaints.py
+# Export complaints to CSV (or .csv.gz) without starting the GUI.
+#
+#     python scripts/export_complaints.py complaints.csv.gz --status Open --category Hostel
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export complaints to a CSV file")
+    parser.add_argument("path", help="output file; a .gz suffix enables gzip compression")
+    parser.add_argument("--db", default="college_complaints.db", help="database file")
+    parser.add_argument("--search", help="full-text search terms")
+    parser.add_argument("--status", help="only complaints with this status")
+    parser.add_argument("--category", help="only complaints in this category")
+    parser.add_argument("--priority", help="only complaints with this priority")
+    parser.add_argument("--gzip", action="store_true", help="compress even without a .gz suffix")
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows fetched per batch")
+    args = parser.parse_args()
+
+    filters = {"search": args.search, "status_filter": args.status,
+               "category_filter": args.category, "priority_filter": args.priority}
+
+    def progress(rows, rate):
+        print(f"\r{rows:,} rows ({rate:,.0f} rows/s)", end="", file=sys.stderr)
+
+    db = Database(args.db)
+    try:
+        count = db.export_complaints(args.path, filters, compress=args.gzip or None,
+                                     batch_size=args.batch_size, progress=progress)
+    finally:
+        db.close()
+
+    print(f"\nExported {count} complaints to {args.path}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
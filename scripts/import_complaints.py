@@ -0,0 +1,59 @@
+# scripts/import_complaints.py
+# Import legacy complaints from a CSV or JSONL file (optionally gzipped).
+#
+#     python scripts/import_complaints.py legacy.jsonl.gz --defer-indexes
+#     python scripts/import_complaints.py old.csv --user-id 1 --rejects rejected.jsonl
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database, IMPORT_BATCH_SIZE, iter_import_records
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import complaints into the database")
+    parser.add_argument("path", help="input .csv or .jsonl file, a .gz suffix is decompressed")
+    parser.add_argument("--db", default="college_complaints.db", help="database file")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="input format (default: from the suffix)")
+    parser.add_argument("--user-id", type=int, default=1,
+                        help="account to file records without a user_id under (default: 1, the admin)")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="rows per transaction")
+    parser.add_argument("--defer-indexes", action="store_true",
+                        help="rebuild indexes, search and statistics once at the end")
+    parser.add_argument("--rejects", help="write rejected records with the reason to this JSONL file")
+    args = parser.parse_args()
+
+    def progress(report):
+        rows, seconds = report.batches[-1]
+        print(f"batch {len(report.batches)}: {rows:,} rows in {seconds:.2f}s "
+              f"({rows / seconds if seconds else 0:,.0f} rows/s), {report.inserted:,} total, "
+              f"{len(report.rejected):,} rejected", file=sys.stderr)
+
+    db = Database(args.db)
+    try:
+        report = db.bulk_add_complaints(iter_import_records(args.path, args.format),
+                                        batch_size=args.batch_size, default_user_id=args.user_id,
+                                        defer_indexes=args.defer_indexes, progress=progress)
+    finally:
+        db.close()
+
+    if args.rejects:
+        with open(args.rejects, "w", encoding="utf-8") as f:
+            for line, reason, record in report.rejected:
+                f.write(json.dumps({"line": line, "reason": reason, "record": record}) + "\n")
+    else:
+        for line, reason, record in report.rejected[:20]:
+            print(f"record {line}: {reason}", file=sys.stderr)
+        if len(report.rejected) > 20:
+            print(f"... and {len(report.rejected) - 20} more (use --rejects to save them)", file=sys.stderr)
+
+    print(f"Imported {report.inserted:,} complaints in {report.seconds:.1f}s "
+          f"({report.rows_per_sec:,.0f} rows/s), rejected {len(report.rejected):,}", file=sys.stderr)
+    return 1 if report.rejected else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+# scripts/rebuild_statistics.py
+# Check the trigger-maintained dashboard counters against the complaints
+# table, and rebuild them if they have drifted.
+#
+#     python scripts/rebuild_statistics.py --check
+#     python scripts/rebuild_statistics.py [--db college_complaints.db]
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify or rebuild the complaint_stats table")
+    parser.add_argument("--db", default="college_complaints.db", help="database file")
+    parser.add_argument("--check", action="store_true", help="only report mismatches, exit 1 if any")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    try:
+        mismatches = db.verify_statistics()
+        for dimension, value, stored, live in mismatches:
+            print(f"{dimension}={value!r}: stored {stored}, actual {live}")
+
+        if args.check:
+            print("Statistics are consistent" if not mismatches else f"{len(mismatches)} mismatch(es)")
+            return 1 if mismatches else 0
+
+        db.rebuild_statistics()
+        print(f"Rebuilt statistics ({len(mismatches)} bucket(s) were out of date)")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
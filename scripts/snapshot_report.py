@@ -0,0 +1,87 @@
+# scripts/snapshot_report.py
+# Cross-tab reports from a columnar snapshot of the complaint history.
+#
+#     python scripts/snapshot_report.py complaints.npz --export
+#     python scripts/snapshot_report.py complaints.npz --rows department --columns month
+#     python scripts/snapshot_report.py complaints.npz --group department category month priority
+#     python scripts/snapshot_report.py complaints.npz --rows category --columns priority \
+#         --value resolution_seconds --agg mean --where status=Resolved
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from snapshot import Snapshot
+
+
+def parse_where(terms):
+    where = {}
+    for term in terms or ():
+        key, _, value = term.partition("=")
+        where[key] = value.split(",")
+    return where
+
+
+def format_number(number):
+    if isinstance(number, float):
+        return f"{number:,.1f}"
+    return f"{number:,}"
+
+
+def print_table(header, rows):
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    for line in [header] + rows:
+        print("  ".join(str(cell).rjust(width) if i else str(cell).ljust(width)
+                        for i, (cell, width) in enumerate(zip(line, widths))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Group or pivot a complaint snapshot")
+    parser.add_argument("path", help="snapshot file (.npz, or a .parquet directory)")
+    parser.add_argument("--export", action="store_true", help="export the snapshot from --db first")
+    parser.add_argument("--db", default="college_complaints.db", help="database file for --export")
+    parser.add_argument("--no-archive", action="store_true", help="leave archived complaints out of --export")
+    parser.add_argument("--table", default="complaints", choices=["complaints", "transitions"])
+    parser.add_argument("--group", nargs="+", help="keys to group by, one line per combination")
+    parser.add_argument("--rows", nargs="+", help="pivot row keys")
+    parser.add_argument("--columns", nargs="+", help="pivot column keys")
+    parser.add_argument("--value", help="numeric column to sum or average")
+    parser.add_argument("--agg", default="count", choices=["count", "sum", "mean"])
+    parser.add_argument("--where", nargs="+", metavar="KEY=VALUE[,VALUE]", help="only rows with these values")
+    args = parser.parse_args()
+    if args.rows and not args.columns:
+        parser.error("--rows needs --columns; use --group for a flat list")
+
+    if args.export:
+        from database import Database
+        db = Database(args.db)
+        try:
+            start = time.perf_counter()
+            rows = db.export_snapshot(args.path, include_archive=not args.no_archive)
+        finally:
+            db.close()
+        print(f"Exported {rows['complaints']:,} complaints and {rows['transitions']:,} transitions "
+              f"to {args.path} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    if not (args.group or args.rows):
+        return 0
+    start = time.perf_counter()
+    table = getattr(Snapshot.load(args.path), args.table)
+    where = parse_where(args.where)
+    if args.group:
+        groups = table.group_by(args.group, args.value, args.agg, where)
+        print_table(args.group + [args.agg], [list(key) + [format_number(number)]
+                                              for key, number in sorted(groups.items())])
+    else:
+        row_labels, column_labels, cells = table.pivot(args.rows, args.columns, args.value, args.agg, where)
+        print_table([" / ".join(args.rows)] + [str(label) for label in column_labels],
+                    [[str(label)] + [format_number(number) for number in line]
+                     for label, line in zip(row_labels, cells)])
+    print(f"\n{len(table):,} rows in {time.perf_counter() - start:.3f}s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
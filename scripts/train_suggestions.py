@@ -0,0 +1,119 @@
+# scripts/train_suggestions.py
+# Retrain the category and priority suggestion models and report how well
+# and how fast they suggest.
+#
+# The accuracy report holds out a share of the handled complaints, trains
+# throwaway models on the rest and scores the held-out ones, next to always
+# suggesting the most common label. The models in the database are then
+# retrained on everything and suggest_labels is timed end to end.
+#
+#     python scripts/train_suggestions.py [--db college_complaints.db] [--holdout 0.2]
+#     python scripts/train_suggestions.py --report-only
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import Database
+from suggestions import SUGGESTION_CONFIDENCE, SUGGESTION_MODELS, features, learn_examples, new_models
+
+# Held-out complaints timed per latency measurement
+LATENCY_SAMPLE = 2000
+
+
+def split_examples(db, holdout, seed):
+    rng = random.Random(seed)
+    train = []
+    test = []
+    for batch in db.iter_suggestion_examples():
+        for row in batch:
+            (test if rng.random() < holdout else train).append(row)
+    return train, test
+
+
+def score(models, train, test):
+    """Per model: accuracy, the same for the most common label, and the
+    share and accuracy of the suggestions confident enough to be shown"""
+    columns = {"category": 2, "priority": 3}
+    report = {}
+    for name in SUGGESTION_MODELS:
+        column = columns[name]
+        labelled = [row for row in test if row[column] is not None and row[column] not in SUGGESTION_MODELS[name]]
+        if not labelled:
+            continue
+        counts = {}
+        for row in train:
+            counts[row[column]] = counts.get(row[column], 0) + 1
+        majority = max(counts, key=counts.get) if counts else None
+        correct = shown = shown_correct = 0
+        for row in labelled:
+            prediction = models[name].predict(features(row[1]))
+            if not prediction:
+                continue
+            label, confidence = prediction[0]
+            correct += label == row[column]
+            if confidence >= SUGGESTION_CONFIDENCE:
+                shown += 1
+                shown_correct += label == row[column]
+        report[name] = {"examples": len(labelled), "accuracy": correct / len(labelled),
+                        "majority": sum(row[column] == majority for row in labelled) / len(labelled),
+                        "shown": shown / len(labelled), "shown_accuracy": shown_correct / shown if shown else 0.0}
+    return report
+
+
+def latency(call, texts):
+    timings = []
+    for text in texts:
+        start = time.perf_counter()
+        call(text)
+        timings.append((time.perf_counter() - start) * 1e6)
+    timings.sort()
+    return statistics.median(timings), timings[min(int(len(timings) * 0.99), len(timings) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Retrain and evaluate the category and priority suggestions")
+    parser.add_argument("--db", default="college_complaints.db")
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of complaints kept out for scoring")
+    parser.add_argument("--report-only", action="store_true", help="score and time, but leave the models as they are")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    try:
+        start = time.perf_counter()
+        train, test = split_examples(db, args.holdout, args.seed)
+        models = new_models()
+        learn_examples(models, train)
+        print(f"Trained on {len(train):,} handled complaints in {time.perf_counter() - start:.1f}s, "
+              f"scoring {len(test):,} held out")
+        for name, result in score(models, train, test).items():
+            print(f"  {name:<9} accuracy {result['accuracy']:6.1%} (most common label {result['majority']:6.1%}); "
+                  f"{result['shown']:6.1%} confident enough to suggest, {result['shown_accuracy']:6.1%} of those right")
+
+        texts = [row[1] for row in test[:LATENCY_SAMPLE]] or ["The hostel water supply has been out since Monday"]
+        median, p99 = latency(lambda text: [models[name].predict(features(text)) for name in models], texts)
+        print(f"  features and prediction: median {median:7.1f} us, p99 {p99:7.1f} us")
+
+        if not args.report_only:
+            report = db.train_suggestions()
+            print(f"Retrained the stored models on {report['examples']:,} complaints, "
+                  f"{report['features']:,} feature counts, in {report['seconds']:.1f}s")
+            for name, (accuracy, baseline) in report["accuracy"].items():
+                if accuracy is None:
+                    continue
+                verdict = "suggested" if accuracy > baseline else "not suggested, no better than the most common label"
+                print(f"  {name:<9} leave-one-out accuracy {accuracy:6.1%} against {baseline:6.1%}: {verdict}")
+        median, p99 = latency(db.suggest_labels, texts)
+        print(f"  suggest_labels: median {median:7.1f} us, p99 {p99:7.1f} us")
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+# server.py
+# JSON service that owns the database, for offices sharing one complaint
+# database over the network. Run it next to the database file and point
+# every desktop client at it:
+#
+#     python server.py --db college_complaints.db --port 8765
+#     python main.py --server http://complaints-host:8765
+import argparse
+import json
+import secrets
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from database import PRIORITIES, STATUSES, Database
+from records import DuplicateMatch, to_json
+
+DEFAULT_PORT = 8765
+SESSION_TTL = 12 * 60 * 60
+MAX_BODY = 1024 * 1024
+
+# Who may call each method: None for anyone, "user" for any logged-in
+# account, "Teacher" for teachers only. Nothing else is reachable.
+API_METHODS = {
+    "authenticate_user": None,
+    "register_user": None,
+    "get_categories": None,
+    "latest_change_seq": None,
+    "get_user_by_id": "user",
+    "get_changes_since": "user",
+    "add_complaint": "user",
+    "get_user_complaints": "user",
+    "load_complaint_bundle": "user",
+    "get_complaints_page": "Teacher",
+    "get_complaint_ids": "Teacher",
+    "get_all_complaints": "Teacher",
+    "search_complaints": "Teacher",
+    "count_complaints": "Teacher",
+    "get_complaint_row": "Teacher",
+    "get_complaint_rows": "Teacher",
+    "get_complaint_by_id": "Teacher",
+    "get_responses": "Teacher",
+    "get_status_history": "Teacher",
+    "update_complaint_status": "Teacher",
+    "bulk_update_status": "Teacher",
+    "add_response": "Teacher",
+    "delete_complaint": "Teacher",
+    "find_duplicates": "user",
+    "link_duplicates": "Teacher",
+    "unlink_duplicates": "Teacher",
+    "get_duplicate_links": "Teacher",
+    "suggest_labels": "user",
+    "get_statistics": "Teacher",
+    "get_sla_statistics": "Teacher",
+    "add_category": "Teacher",
+    "delete_category": "Teacher",
+    "instrumentation_snapshot": "Teacher",
+    "reset_instrumentation": "Teacher",
+}
+
+# Position of the argument naming who made a change
+ACTING_USER_ARG = {"update_complaint_status": 2, "bulk_update_status": 2, "add_response": 1}
+
+# Methods whose result is streamed as one JSON line per batch
+STREAM_METHODS = {"iter_export_batches": "Teacher"}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ComplaintService:
+    """The Database plus logged-in sessions and per-role access checks.
+
+    Calls run on the HTTP server's request threads; the Database connection
+    pool already serializes writers and lets readers run side by side.
+    """
+
+    def __init__(self, db):
+        self.db = db
+        self.sessions = {}
+        self._lock = threading.Lock()
+
+    def login(self, user):
+        token = secrets.token_urlsafe(32)
+        with self._lock:
+            self.sessions[token] = (user, time.monotonic() + SESSION_TTL)
+        return token
+
+    def logout(self, token):
+        with self._lock:
+            self.sessions.pop(token, None)
+
+    def session_user(self, token):
+        with self._lock:
+            session = self.sessions.get(token)
+            if session is None:
+                return None
+            user, expires = session
+            if time.monotonic() > expires:
+                del self.sessions[token]
+                return None
+            return user
+
+    def check_access(self, method, access, user, args, kwargs):
+        if method == "register_user":
+            # Anyone may sign up as a student; only a teacher can create another teacher
+            role = args[2] if len(args) > 2 else kwargs.get("role")
+            if role != "Student" and (user is None or user.role != "Teacher"):
+                raise ApiError(403, "only a teacher can create teacher accounts")
+        if access is None:
+            return
+        if user is None:
+            raise ApiError(401, "login required")
+        if access == "Teacher" and user.role != "Teacher":
+            raise ApiError(403, f"{method} is for teachers only")
+        if user.role == "Student":
+            # Students only act as themselves
+            own_account = ("add_complaint", "get_user_complaints", "get_user_by_id")
+            if method in own_account and (not args or args[0] != user.id):
+                raise ApiError(403, "students can only use their own account")
+            if method == "get_changes_since":
+                kwargs["user_id"] = user.id
+        elif method in ACTING_USER_ARG:
+            # changed_by / responder_id is the teacher making the call
+            position = ACTING_USER_ARG[method]
+            if len(args) <= position or args[position] != user.id:
+                raise ApiError(403, "changes are recorded under your own account")
+
+    def check_values(self, method, args):
+        """The desktop forms only offer valid choices; clients of the API may not"""
+        if method in ("update_complaint_status", "bulk_update_status") and len(args) > 1 and args[1] not in STATUSES:
+            raise ApiError(400, f"unknown status {args[1]!r}")
+        if method == "add_complaint" and len(args) > 8 and args[8] not in PRIORITIES:
+            raise ApiError(400, f"unknown priority {args[8]!r}")
+
+    def get_complaints_page(self, after=None, limit=50, search=None, status_filter=None, category_filter=None,
+                            priority_filter=None, include_archive=False):
+        """One page of iter_complaints_page(); pass the last row's
+        (submitted_at, id) as `after` for the next one
+        """
+        pages = self.db.iter_complaints_page(tuple(after) if after else None, limit, search, status_filter,
+                                             category_filter, priority_filter, include_archive)
+        return next(pages, [])
+
+    def call(self, method, args, kwargs, token):
+        if method not in API_METHODS:
+            raise ApiError(404, f"no such method {method!r}")
+        user = self.session_user(token) if token else None
+        self.check_access(method, API_METHODS[method], user, args, kwargs)
+        self.check_values(method, args)
+
+        target = self.get_complaints_page if method == "get_complaints_page" else getattr(self.db, method)
+        result = target(*args, **kwargs)
+
+        if method == "load_complaint_bundle" and user.role == "Student":
+            if result is not None and result.complaint.user_id != user.id:
+                raise ApiError(403, "not your complaint")
+        if method == "find_duplicates" and user.role == "Student":
+            # Students learn that a similar complaint exists, not what someone else wrote
+            result = [DuplicateMatch(**{**match._asdict(), "complaint": None}) for match in result]
+        if method == "authenticate_user" and result is not None:
+            return result, self.login(result)
+        return result, None
+
+    def stream(self, method, args, kwargs, token):
+        if method not in STREAM_METHODS:
+            raise ApiError(404, f"no such method {method!r}")
+        self.check_access(method, STREAM_METHODS[method], self.session_user(token) if token else None,
+                          args, kwargs)
+        return getattr(self.db, method)(*args, **kwargs)
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """POST /api/<method> with {"args": [...], "kwargs": {...}}.
+
+    Replies {"result": ...} with records encoded by records.to_json, or
+    {"error": {"type": ..., "message": ...}} with a 4xx/5xx status.
+    POST /stream/<method> replies one JSON value per line.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out as separate writes; with Nagle on, each reply
+    # on a keep-alive connection waits ~40 ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+    service = None
+    quiet = False
+
+    def do_POST(self):
+        try:
+            kind, _, method = self.path.lstrip("/").partition("/")
+            args, kwargs = self.read_call()
+            token = self.token()
+            if kind == "api":
+                result, session = self.service.call(method, args, kwargs, token)
+                reply = {"result": to_json(result)}
+                if session:
+                    reply["session"] = session
+                self.send_json(200, reply)
+            elif kind == "stream":
+                self.send_stream(self.service.stream(method, args, kwargs, token))
+            elif kind == "logout":
+                self.service.logout(token)
+                self.send_json(200, {"result": None})
+            else:
+                raise ApiError(404, f"unknown path {self.path}")
+        except ApiError as e:
+            error_type = {401: "PermissionError", 403: "PermissionError", 404: "LookupError"}.get(e.status, "ValueError")
+            self.send_error_json(e.status, error_type, str(e))
+        except (ValueError, TypeError) as e:
+            # Bad arguments, including a method's own ValueError
+            self.send_error_json(400, type(e).__name__, str(e))
+        except Exception as e:
+            self.log_error("%s failed: %r", self.path, e)
+            self.send_error_json(500, type(e).__name__, str(e))
+
+    def read_call(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY:
+            raise ApiError(413, "request too large")
+        body = json.loads(self.rfile.read(length) or b"{}")
+        return list(body.get("args", [])), dict(body.get("kwargs", {}))
+
+    def token(self):
+        header = self.headers.get("Authorization", "")
+        return header[len("Bearer "):] if header.startswith("Bearer ") else None
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def send_error_json(self, status, error_type, message):
+        self.send_json(status, {"error": {"type": error_type, "message": message}})
+
+    def send_stream(self, batches):
+        batches = iter(batches)
+        # Bad arguments fail on the first batch, while a JSON error can still be sent
+        first = next(batches, None)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            if first is not None:
+                self.write_chunk(first)
+                for batch in batches:
+                    self.write_chunk(batch)
+        except Exception as e:
+            # Too late for an error reply: drop the connection without the
+            # final chunk, so the client sees a truncated stream
+            self.log_error("%s failed mid-stream: %r", self.path, e)
+            self.close_connection = True
+            return
+        self.wfile.write(b"0\r\n\r\n")
+
+    def write_chunk(self, batch):
+        line = json.dumps(to_json(batch)).encode() + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(db, host="127.0.0.1", port=DEFAULT_PORT, quiet=False):
+    """A ThreadingHTTPServer serving `db`; call serve_forever() on it"""
+    handler = type("BoundApiHandler", (ApiHandler,), {"service": ComplaintService(db), "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the complaint database over HTTP")
+    parser.add_argument("--db", default="college_complaints.db", help="database file")
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on (0.0.0.0 for all)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--quiet", action="store_true", help="do not log every request")
+    parser.add_argument("--instrument", action="store_true",
+                        help="time every database method and statement (teachers see it under Diagnostics)")
+    parser.add_argument("--slow-query-ms", type=float, default=None,
+                        help="log statements taking this long with their query plan (implies --instrument)")
+    parser.add_argument("--metrics-dump", help="write the instrumentation snapshot to this JSON file on shutdown")
+    args = parser.parse_args()
+
+    db = Database(args.db)
+    if args.instrument or args.slow_query_ms is not None or args.metrics_dump:
+        db.enable_instrumentation(*(() if args.slow_query_ms is None else (args.slow_query_ms,)))
+    server = make_server(db, args.host, args.port, args.quiet)
+    print(f"Serving {args.db} on http://{args.host}:{server.server_address[1]}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.metrics_dump:
+            db.dump_instrumentation(args.metrics_dump)
+            print(f"Instrumentation snapshot written to {args.metrics_dump}", file=sys.stderr)
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# sla.py
+# Streaming quantile sketches for the service-level figures on the Dashboard.
+#
+# A duration is counted in one of a fixed set of log-spaced buckets, each
+# SLA_BUCKET_GROWTH times wider than the one before, so a quantile read back
+# from the counts is within about +-2.5% of the true value however many
+# complaints went in. The first bucket is the exception: it holds everything
+# up to SLA_MIN_SECONDS, and a quantile that lands in it is reported as that
+# bound, which says only "within a minute". Sketches of the same metric merge by adding counts,
+# which is what lets the database keep them per (category, department, week)
+# and still answer "all of Hostel" or "everything this term" from a handful
+# of rows.
+import math
+
+SLA_METRICS = ("first_response", "resolution")
+SLA_QUANTILES = {"median": 0.5, "p90": 0.9}
+
+# Bucket 0 holds everything up to a minute; the last one everything beyond ~3 years
+SLA_MIN_SECONDS = 60
+SLA_BUCKET_GROWTH = 1.05
+SLA_MAX_SECONDS = 100_000_000
+SLA_BUCKET_BOUNDS = [SLA_MIN_SECONDS * SLA_BUCKET_GROWTH ** i
+                     for i in range(math.ceil(math.log(SLA_MAX_SECONDS / SLA_MIN_SECONDS, SLA_BUCKET_GROWTH)))]
+SLA_BUCKET_BOUNDS.append(1e18)
+
+
+def bucket_value(bucket):
+    """The duration reported for a bucket: the geometric middle of its bounds,
+    or for bucket 0, which starts at zero, its upper bound"""
+    upper = SLA_BUCKET_BOUNDS[bucket]
+    if bucket == 0:
+        return upper
+    if bucket == len(SLA_BUCKET_BOUNDS) - 1:
+        return SLA_BUCKET_BOUNDS[bucket - 1]
+    return upper / math.sqrt(SLA_BUCKET_GROWTH)
+
+
+class QuantileSketch:
+    """Bucket counts for one metric of one group of complaints"""
+
+    __slots__ = ("counts", "count")
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+
+    def add(self, bucket, count=1):
+        self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.count += count
+
+    def quantile(self, q):
+        """Nearest-rank quantile in seconds, None for an empty sketch"""
+        if self.count <= 0:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= rank:
+                return bucket_value(bucket)
+
+    def summary(self):
+        result = {"count": self.count}
+        for name, q in SLA_QUANTILES.items():
+            result[name] = self.quantile(q)
+        return result
+
+
+def exact_summary(durations):
+    """summary() computed from the durations themselves"""
+    durations = sorted(durations)
+    result = {"count": len(durations)}
+    for name, q in SLA_QUANTILES.items():
+        result[name] = durations[max(1, math.ceil(q * len(durations))) - 1] if durations else None
+    return result
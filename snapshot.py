@@ -0,0 +1,468 @@
+# snapshot.py
+# Columnar snapshots of the complaint history for cross-tab reports.
+#
+# Database.export_snapshot() writes every complaint and every status
+# transition into one file, a column at a time: text columns such as
+# department or status are dictionary-encoded (a small integer code per row
+# plus the list of distinct values), timestamps are epoch seconds. Snapshot
+# loads the file and groups or pivots on any mix of columns and calendar
+# units with NumPy, without going back to the database:
+#
+#     snap = Snapshot.load("complaints.npz")
+#     snap.complaints.group_by(["department", "category", "month", "priority"])
+#     snap.complaints.pivot("department", "month", value="resolution_seconds", agg="mean")
+#
+# The .npz format (a zip of .npy arrays) is written without NumPy, so
+# exporting never needs it; NumPy only makes the aggregation fast, and
+# without it the same calls run in plain Python. A directory ending in
+# .parquet gets one Parquet file per table instead, with dictionary columns,
+# when pyarrow is installed.
+import ast
+import json
+import math
+import os
+import struct
+import sys
+import zipfile
+from array import array
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+SNAPSHOT_FORMAT = 1
+
+# table -> [(column, kind)]. Kinds: "id" and "time" (epoch seconds) are
+# unsigned 32-bit, "label" is dictionary-encoded text, "seconds" a duration
+# with NaN where there is none yet, "flag" 0 or 1.
+SNAPSHOT_TABLES = {
+    "complaints": [
+        ("id", "id"), ("user_id", "id"), ("submitted_at", "time"), ("updated_at", "time"),
+        ("department", "label"), ("category", "label"), ("priority", "label"), ("status", "label"),
+        ("course", "label"), ("gender", "label"), ("archived", "flag"),
+        ("first_response_seconds", "seconds"), ("resolution_seconds", "seconds"),
+    ],
+    "transitions": [
+        ("complaint_id", "id"), ("old_status", "label"), ("new_status", "label"), ("changed_by", "id"),
+        ("changed_at", "time"), ("department", "label"), ("category", "label"), ("priority", "label"),
+    ],
+}
+
+# The timestamp calendar units group by when no column is named
+DEFAULT_TIME_COLUMN = {"complaints": "submitted_at", "transitions": "changed_at"}
+TIME_UNITS = ("year", "month", "week", "day")
+DATETIME_UNITS = {"year": "datetime64[Y]", "month": "datetime64[M]"}
+
+TYPECODES = {"id": "I", "time": "I", "label": "I", "seconds": "f", "flag": "B"}
+DESCRS = {"B": "|u1", "H": "<u2", "I": "<u4", "f": "<f4", "d": "<f8", "q": "<i8"}
+TYPECODE_FOR = {descr.lstrip("<|"): typecode for typecode, descr in DESCRS.items()}
+
+# Above this many key combinations group_by counts with a sort instead of a dense array
+DENSE_GROUPS_LIMIT = 1 << 22
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class TableBuilder:
+    """Collects the rows of one table column by column while they are read"""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.data = {name: array(TYPECODES[kind]) for name, kind in columns}
+        self.codes = {name: {} for name, kind in columns if kind == "label"}
+        self.rows = 0
+
+    def append(self, rows):
+        if not rows:
+            return
+        for (name, kind), values in zip(self.columns, zip(*rows)):
+            if kind == "label":
+                mapping = self.codes[name]
+                for value in set(values) - mapping.keys():
+                    mapping[value] = len(mapping)
+                self.data[name].extend(map(mapping.__getitem__, values))
+            elif kind == "seconds":
+                self.data[name].extend(math.nan if value is None else value for value in values)
+            else:
+                self.data[name].extend(values)
+        self.rows += len(rows)
+
+    def arrays(self):
+        """name -> (array, labels or None), label codes in the narrowest type"""
+        result = {}
+        for name, kind in self.columns:
+            column = self.data[name]
+            labels = None
+            if kind == "label":
+                labels = list(self.codes[name])
+                typecode = "B" if len(labels) <= 1 << 8 else "H" if len(labels) <= 1 << 16 else "I"
+                if typecode != column.typecode:
+                    column = array(typecode, column)
+            result[name] = (column, labels)
+        return result
+
+
+def _npy(descr, shape, data):
+    """One .npy file: magic, version 1.0, a header padded to 64 bytes, the data"""
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({shape},), }}"
+    header += " " * (63 - (10 + len(header)) % 64) + "\n"
+    return b"\x93NUMPY\x01\x00" + struct.pack("<H", len(header)) + header.encode("latin1") + data
+
+
+def _column_npy(column):
+    if sys.byteorder == "big":
+        column = array(column.typecode, column)
+        column.byteswap()
+    return _npy(DESCRS[column.typecode], len(column), column.tobytes())
+
+
+def _labels_npy(labels):
+    width = max((len(label) for label in labels), default=1) or 1
+    data = "".join(label.ljust(width, "\0") for label in labels).encode("utf-32-le")
+    return _npy(f"<U{width}", len(labels), data)
+
+
+def write_snapshot(path, tables, meta=None):
+    """Write {table: TableBuilder} to `path`, .npz or a .parquet directory"""
+    meta = dict(meta or {}, format=SNAPSHOT_FORMAT, rows={name: table.rows for name, table in tables.items()})
+    if path.endswith(".parquet"):
+        _write_parquet(path, tables, meta)
+        return
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_STORED) as archive:
+        archive.writestr("snapshot.json", json.dumps(meta))
+        for table_name, table in tables.items():
+            for name, (column, labels) in table.arrays().items():
+                archive.writestr(f"{table_name}.{name}.npy", _column_npy(column))
+                if labels is not None:
+                    archive.writestr(f"{table_name}.{name}.labels.npy", _labels_npy(labels))
+
+
+def _write_parquet(path, tables, meta):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    os.makedirs(path, exist_ok=True)
+    for table_name, table in tables.items():
+        fields = {}
+        for name, (column, labels) in table.arrays().items():
+            values = pa.array(column)
+            if labels is not None:
+                values = pa.DictionaryArray.from_arrays(values, pa.array(labels, pa.string()))
+            fields[name] = values
+        pq.write_table(pa.table(fields).replace_schema_metadata({"snapshot": json.dumps(meta)}),
+                       os.path.join(path, f"{table_name}.parquet"))
+
+
+def _read_npy(data):
+    """(descr, values) of a .npy file's bytes"""
+    if data[:6] != b"\x93NUMPY":
+        raise ValueError("not a .npy array")
+    if data[6] == 1:
+        length, start = struct.unpack_from("<H", data, 8)[0], 10
+    else:
+        length, start = struct.unpack_from("<I", data, 8)[0], 12
+    header = ast.literal_eval(data[start:start + length].decode("latin1"))
+    offset = start + length
+    descr = header["descr"]
+    if descr.startswith("<U"):
+        width = int(descr[2:])
+        text = data[offset:].decode("utf-32-le")
+        return descr, [text[i:i + width].rstrip("\0") for i in range(0, len(text), width)]
+    if np is not None:
+        return descr, np.frombuffer(data, dtype=descr, offset=offset)
+    column = array(TYPECODE_FOR[descr.lstrip("<|")])
+    column.frombytes(data[offset:])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return descr, column
+
+
+class Table:
+    """The columns of one snapshot table and the group-by and pivot on them.
+
+    A key is a column name, or a calendar unit (year, month, week, day) of
+    the table's main timestamp, or "column:unit" for another timestamp.
+    `where` maps keys to a value or a list of values to keep. Values are
+    counted ("count") or, with `value` naming a numeric column, summed
+    ("sum") or averaged ("mean"); NaN durations are left out of both.
+    """
+
+    def __init__(self, name, columns, labels):
+        self.name = name
+        self.columns = columns
+        self.labels = labels
+        self.keys = {}
+
+    def __len__(self):
+        return len(next(iter(self.columns.values()), ()))
+
+    def column(self, name):
+        if name not in self.columns:
+            raise KeyError(f"{self.name} has no column {name!r}")
+        return self.columns[name]
+
+    def values(self, name):
+        """A column with label codes turned back into text"""
+        column = self.column(name)
+        if name in self.labels:
+            labels = self.labels[name]
+            return [labels[code] for code in column]
+        return list(column)
+
+    def key(self, name):
+        """(codes, labels): one integer per row and the label of every code"""
+        if name not in self.keys:
+            self.keys[name] = self._key(name)
+        return self.keys[name]
+
+    def _key(self, name):
+        column_name, _, unit = name.rpartition(":")
+        if not column_name and name in TIME_UNITS:
+            column_name, unit = DEFAULT_TIME_COLUMN[self.name], name
+        if unit in TIME_UNITS and column_name:
+            return _calendar_codes(self.column(column_name), unit)
+        column = self.column(name)
+        if name in self.labels:
+            return column, self.labels[name]
+        if np is not None:
+            labels, codes = np.unique(column, return_inverse=True)
+            return codes, labels.tolist()
+        labels = sorted(set(column))
+        index = {value: code for code, value in enumerate(labels)}
+        return [index[value] for value in column], labels
+
+    def _mask(self, where):
+        if not where:
+            return None
+        mask = None
+        for name, wanted in where.items():
+            codes, labels = self.key(name)
+            wanted = {wanted} if isinstance(wanted, (str, int, float)) else set(wanted)
+            keep = [code for code, label in enumerate(labels) if label in wanted or str(label) in wanted]
+            if np is not None:
+                part = np.isin(codes, keep)
+                mask = part if mask is None else mask & part
+            else:
+                keep = set(keep)
+                part = [code in keep for code in codes]
+                mask = part if mask is None else [a and b for a, b in zip(mask, part)]
+        return mask
+
+    def group_by(self, keys, value=None, agg="count", where=None):
+        """{(label, ...): number} for every combination of the keys that occurs"""
+        if isinstance(keys, str):
+            keys = [keys]
+        if agg not in ("count", "sum", "mean"):
+            raise ValueError(f"unknown aggregate {agg!r}")
+        if agg != "count" and value is None:
+            raise ValueError(f"{agg} needs a value column")
+        resolved = [self.key(key) for key in keys]
+        mask = self._mask(where)
+        if np is not None:
+            groups, counts, sums = self._group_numpy(resolved, mask, value)
+        else:
+            groups, counts, sums = self._group_python(resolved, mask, value)
+
+        if agg == "count":
+            numbers = counts
+        elif agg == "sum":
+            numbers = sums
+        else:
+            numbers = [total / count for total, count in zip(sums, counts)]
+        if not resolved:
+            return {(): number for number in numbers}
+        labelled = [[labels[code] for code in codes] for codes, (_, labels) in zip(groups, resolved)]
+        return dict(zip(zip(*labelled), numbers))
+
+    def _group_numpy(self, resolved, mask, value):
+        """Per-key code lists of the groups that occur, their counts and sums.
+
+        The key codes are combined into one index per row, which bincount
+        turns into counts (and sums of `value`) for every combination at once.
+        """
+        dims = tuple(max(len(labels), 1) for codes, labels in resolved)
+        combined = np.zeros(len(self), dtype=np.intp)
+        for (codes, labels), size in zip(resolved, dims):
+            combined *= size
+            combined += codes
+        weights = None
+        if value is not None:
+            weights = np.asarray(self.column(value), dtype=np.float64)
+            present = ~np.isnan(weights)
+            mask = present if mask is None else mask & present
+        if mask is not None:
+            combined = combined[mask]
+            weights = weights[mask] if weights is not None else None
+        size = math.prod(dims)
+        if size <= DENSE_GROUPS_LIMIT:
+            counts = np.bincount(combined, minlength=size)
+            sums = np.bincount(combined, weights, minlength=size) if weights is not None else counts
+            present = np.flatnonzero(counts)
+            counts, sums = counts[present], sums[present]
+        else:
+            present, inverse = np.unique(combined, return_inverse=True)
+            counts = np.bincount(inverse)
+            sums = np.bincount(inverse, weights) if weights is not None else counts
+        groups = np.unravel_index(present, dims) if dims else ()
+        return [group.tolist() for group in groups], counts.tolist(), sums.tolist()
+
+    def _group_python(self, resolved, mask, value):
+        rows = zip(*(codes for codes, labels in resolved)) if resolved else ((),) * len(self)
+        weights = self.column(value) if value is not None else None
+        counts = Counter()
+        sums = Counter()
+        for i, group in enumerate(rows):
+            if mask is not None and not mask[i]:
+                continue
+            if weights is not None:
+                if math.isnan(weights[i]):
+                    continue
+                sums[group] += weights[i]
+            counts[group] += 1
+        groups = list(counts)
+        return ([list(codes) for codes in zip(*groups)], [counts[group] for group in groups],
+                [sums[group] if weights is not None else counts[group] for group in groups])
+
+    def pivot(self, rows, columns, value=None, agg="count", where=None, fill=0):
+        """(row labels, column labels, cells) with cells[i][j] for row i, column j.
+
+        `rows` and `columns` are a key or a list of keys; combined keys are
+        labelled with tuples. Combinations that never occur hold `fill`.
+        """
+        rows = [rows] if isinstance(rows, str) else list(rows)
+        columns = [columns] if isinstance(columns, str) else list(columns)
+        groups = self.group_by(rows + columns, value, agg, where)
+        split = len(rows)
+
+        def label(parts):
+            return parts[0] if len(parts) == 1 else parts
+
+        row_labels = sorted({label(group[:split]) for group in groups}, key=_sort_key)
+        column_labels = sorted({label(group[split:]) for group in groups}, key=_sort_key)
+        row_index = {name: i for i, name in enumerate(row_labels)}
+        column_index = {name: j for j, name in enumerate(column_labels)}
+        cells = [[fill] * len(column_labels) for _ in row_labels]
+        for group, number in groups.items():
+            cells[row_index[label(group[:split])]][column_index[label(group[split:])]] = number
+        return row_labels, column_labels, cells
+
+
+def _sort_key(label):
+    return tuple(map(str, label)) if isinstance(label, tuple) else (str(label),)
+
+
+def _calendar_codes(timestamps, unit):
+    """(codes, labels) of the year, month, Monday-based week or day of each timestamp"""
+    if np is not None:
+        days = np.asarray(timestamps, dtype=np.int64) // 86400
+        if not len(days):
+            return days, []
+        first_day = int(days.min())
+        days -= first_day
+        if unit == "day":
+            periods, first = days, first_day
+        else:
+            # Work out the period of each calendar day once, then look every row's day up
+            calendar = np.arange(first_day, first_day + int(days.max()) + 1)
+            if unit == "week":
+                # Day 4 of the epoch was a Monday
+                calendar = (calendar + 3) // 7
+            else:
+                calendar = calendar.astype("datetime64[D]").astype(DATETIME_UNITS[unit]).astype(np.int64)
+            first = int(calendar[0])
+            periods = (calendar - first)[days]
+        return periods, [_period_label(first + i, unit) for i in range(int(periods.max()) + 1)]
+    by_day = {}
+    periods = []
+    for value in timestamps:
+        day = value // 86400
+        period = by_day.get(day)
+        if period is None:
+            period = by_day[day] = _period(value, unit)
+        periods.append(period)
+    if not periods:
+        return periods, []
+    first = min(periods)
+    return [period - first for period in periods], [_period_label(first + i, unit)
+                                                   for i in range(max(periods) - first + 1)]
+
+
+def _period(seconds, unit):
+    """The same period numbers NumPy's datetime64 units use"""
+    if unit == "day":
+        return seconds // 86400
+    if unit == "week":
+        return (seconds // 86400 + 3) // 7
+    moment = _EPOCH + timedelta(seconds=seconds)
+    if unit == "month":
+        return (moment.year - 1970) * 12 + moment.month - 1
+    return moment.year - 1970
+
+
+def _period_label(period, unit):
+    if unit == "year":
+        return str(1970 + period)
+    if unit == "month":
+        return f"{1970 + period // 12}-{period % 12 + 1:02d}"
+    if unit == "week":
+        period = period * 7 - 3
+    return (_EPOCH + timedelta(days=period)).strftime("%Y-%m-%d")
+
+
+class Snapshot:
+    """A loaded snapshot: .complaints and .transitions tables, and .meta"""
+
+    def __init__(self, tables, meta):
+        self.tables = tables
+        self.meta = meta
+        for name, table in tables.items():
+            setattr(self, name, table)
+
+    @classmethod
+    def load(cls, path):
+        if path.endswith(".parquet"):
+            return cls._load_parquet(path)
+        columns = {name: {} for name in SNAPSHOT_TABLES}
+        labels = {name: {} for name in SNAPSHOT_TABLES}
+        with zipfile.ZipFile(path) as archive:
+            meta = json.loads(archive.read("snapshot.json"))
+            if meta.get("format") != SNAPSHOT_FORMAT:
+                raise ValueError(f"{path} is snapshot format {meta.get('format')}, expected {SNAPSHOT_FORMAT}")
+            for member in archive.namelist():
+                if not member.endswith(".npy"):
+                    continue
+                table, _, name = member[:-len(".npy")].partition(".")
+                descr, values = _read_npy(archive.read(member))
+                if name.endswith(".labels"):
+                    labels[table][name[:-len(".labels")]] = values
+                else:
+                    columns[table][name] = values
+        return cls({name: Table(name, columns[name], labels[name]) for name in SNAPSHOT_TABLES}, meta)
+
+    @classmethod
+    def _load_parquet(cls, path):
+        import pyarrow.parquet as pq
+        tables = {}
+        meta = {}
+        for name in SNAPSHOT_TABLES:
+            arrow = pq.read_table(os.path.join(path, f"{name}.parquet"))
+            meta = json.loads((arrow.schema.metadata or {}).get(b"snapshot", b"{}"))
+            columns = {}
+            labels = {}
+            for field in arrow.schema:
+                values = arrow.column(field.name).combine_chunks()
+                if hasattr(values, "dictionary"):
+                    labels[field.name] = values.dictionary.to_pylist()
+                    values = values.indices
+                columns[field.name] = values.to_numpy(zero_copy_only=False)
+            tables[name] = Table(name, columns, labels)
+        return cls(tables, meta)
+
+
+def io_size(path):
+    """Bytes a snapshot takes on disk"""
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
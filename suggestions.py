@@ -0,0 +1,136 @@
+# suggestions.py
+# Category and priority suggestions from complaint text: multinomial Naive
+# Bayes over hashed word and word-pair features.
+#
+# A complaint becomes a list of feature ids, the crc32 of each word and of
+# each pair of neighbouring words modulo FEATURE_BUCKETS, so no vocabulary
+# is kept and a word nobody has used yet costs nothing. A model is nothing
+# but counts (complaints per label, and how often each feature occurred
+# under each label), so learning one more complaint is a few additions and
+# the database can keep the counts up to date as teachers handle complaints.
+import math
+import zlib
+from collections import Counter
+
+from duplicates import WORDS
+
+FEATURE_BUCKETS = 1 << 20
+
+# Added to every feature count, so a feature never seen with a label does
+# not rule the label out
+SMOOTHING = 0.5
+
+# Probability from which a suggestion is offered to the student
+SUGGESTION_CONFIDENCE = 0.5
+
+# Complaint column each model predicts, and labels it does not learn from:
+# "Other" is what students pick when unsure, not a category to suggest
+SUGGESTION_MODELS = {"category": ("Other",), "priority": ()}
+
+
+def features(text):
+    """Feature ids of `text`, repeated as often as they occur"""
+    words = WORDS.findall(text.lower())
+    tokens = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    return [zlib.crc32(token.encode("utf-8")) % FEATURE_BUCKETS for token in tokens]
+
+
+class NaiveBayes:
+    """Counts behind one model, and predictions from them"""
+
+    def __init__(self):
+        self.documents = {}
+        self.tokens = {}
+        self.counts = {}
+        self.vocabulary = set()
+        # Leave-one-out accuracy from the last full training, and that of
+        # always answering the most common label; None until measured
+        self.accuracy = None
+        self.baseline = None
+
+    def __len__(self):
+        return sum(self.documents.values())
+
+    def add(self, label, documents, tokens, counts):
+        """Add complaint and feature counts for `label`; counts maps feature id to occurrences"""
+        self.documents[label] = self.documents.get(label, 0) + documents
+        self.tokens[label] = self.tokens.get(label, 0) + tokens
+        label_counts = self.counts.setdefault(label, {})
+        for feature, count in counts.items():
+            label_counts[feature] = label_counts.get(feature, 0) + count
+        self.vocabulary.update(counts)
+
+    @property
+    def useful(self):
+        """False once measured to do no better than the most common label"""
+        return self.accuracy is None or self.accuracy > self.baseline
+
+    def predict(self, feature_ids, labels=None):
+        """(label, probability) pairs, most likely first. `labels` limits
+        the answer to those labels."""
+        candidates = [label for label in self.documents
+                      if self.documents[label] > 0 and (labels is None or label in labels)]
+        if not candidates or not feature_ids:
+            return []
+        total = sum(self.documents[label] for label in candidates)
+        smoothed = SMOOTHING * max(len(self.vocabulary), 1)
+        log = math.log
+        scores = []
+        for label in candidates:
+            counts = self.counts[label]
+            score = log(self.documents[label] / total) - len(feature_ids) * log(self.tokens[label] + smoothed)
+            for feature in feature_ids:
+                score += log(counts.get(feature, 0) + SMOOTHING)
+            scores.append(score)
+        # Softmax over the log scores, shifted so the largest is 0
+        top = max(scores)
+        weights = [math.exp(score - top) for score in scores]
+        norm = sum(weights)
+        return sorted(((label, weight / norm) for label, weight in zip(candidates, weights)),
+                      key=lambda pair: pair[1], reverse=True)
+
+
+def new_models():
+    """An empty NaiveBayes for each of SUGGESTION_MODELS"""
+    return {model: NaiveBayes() for model in SUGGESTION_MODELS}
+
+
+def learn_examples(models, rows):
+    """Teach new_models()-style `models` from (id, complaint, category, priority) rows"""
+    for row in rows:
+        feature_ids = features(row[1])
+        if not feature_ids:
+            continue
+        counts = Counter(feature_ids)
+        for model, label in (("category", row[2]), ("priority", row[3])):
+            if label is not None and label not in SUGGESTION_MODELS[model]:
+                models[model].add(label, 1, len(feature_ids), counts)
+
+
+def evaluate(models, rows):
+    """Leave-one-out accuracy of trained `models` on some of the rows they
+    learned from: each row is taken out of the counts, predicted and put
+    back. Sets accuracy and baseline on every model with examples."""
+    results = {model: [0, 0, 0] for model in models}
+    for row in rows:
+        feature_ids = features(row[1])
+        if not feature_ids:
+            continue
+        counts = Counter(feature_ids)
+        removed = {feature: -count for feature, count in counts.items()}
+        for model, label in (("category", row[2]), ("priority", row[3])):
+            bayes = models[model]
+            if label is None or label in SUGGESTION_MODELS[model]:
+                continue
+            bayes.add(label, -1, -len(feature_ids), removed)
+            prediction = bayes.predict(feature_ids)
+            common = max(bayes.documents, key=bayes.documents.get)
+            bayes.add(label, 1, len(feature_ids), counts)
+            result = results[model]
+            result[0] += bool(prediction) and prediction[0][0] == label
+            result[1] += common == label
+            result[2] += 1
+    for model, (correct, common, examples) in results.items():
+        if examples:
+            models[model].accuracy = correct / examples
+            models[model].baseline = common / examples
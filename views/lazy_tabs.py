@@ -0,0 +1,34 @@
+# views/lazy_tabs.py
+import customtkinter as ctk
+
+class LazyTabview(ctk.CTkTabview):
+    """CTkTabview whose tabs are filled in the first time they are shown.
+    
+    Tabs are registered with add_lazy(name, build); build(tab) runs when the
+    tab is first selected, so a view only pays for the tab the user is
+    looking at. The first tab is built by show_first().
+    """
+    
+    def __init__(self, master, **kwargs):
+        super().__init__(master, command=self._on_select, **kwargs)
+        self.builders = {}
+        self.built = set()
+    
+    def add_lazy(self, name, build):
+        self.add(name)
+        self.builders[name] = build
+    
+    def is_built(self, name):
+        return name in self.built
+    
+    def show_first(self):
+        self.build(self.get())
+    
+    def build(self, name):
+        build = self.builders.pop(name, None)
+        if build is not None:
+            self.built.add(name)
+            build()
+    
+    def _on_select(self):
+        self.build(self.get())
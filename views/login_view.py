@@ -63,10 +63,10 @@ class LoginView(ctk.CTkFrame):
         btn_frame = ctk.CTkFrame(center_frame, fg_color="transparent")
         btn_frame.grid(row=5, column=0, columnspan=2, pady=20)
         
-        login_btn = ctk.CTkButton(btn_frame, text="Login", width=140, height=40,
-                                 command=self.login, font=("Helvetica", 14, "bold"),
-                                 fg_color="#00d9ff", hover_color="#00b8d4")
-        login_btn.pack(side="left", padx=10)
+        self.login_btn = ctk.CTkButton(btn_frame, text="Login", width=140, height=40,
+                                      command=self.login, font=("Helvetica", 14, "bold"),
+                                      fg_color="#00d9ff", hover_color="#00b8d4")
+        self.login_btn.pack(side="left", padx=10)
         
         register_btn = ctk.CTkButton(btn_frame, text="Register", width=140, height=40,
                                     command=self.show_register, font=("Helvetica", 14, "bold"),
@@ -87,14 +87,24 @@ class LoginView(ctk.CTkFrame):
             tkmb.showerror("Error", "Please enter both username and password!")
             return
         
-        user = self.db.authenticate_user(username, password, role)
+        self.login_btn.configure(state="disabled", text="Signing in...")
+        self.db.submit("authenticate_user", username, password, role,
+                       callback=lambda user: self.finish_login(user, role),
+                       errback=self.login_failed, key="login", owner=self)
+    
+    def finish_login(self, user, role):
+        self.login_btn.configure(state="normal", text="Login")
         
         if user:
-            tkmb.showinfo("Success", f"Welcome, {user[4]}!")
+            tkmb.showinfo("Success", f"Welcome, {user.full_name}!")
             self.on_success_callback(user, role)
         else:
             tkmb.showerror("Error", "Invalid credentials or role!")
     
+    def login_failed(self, error):
+        self.login_btn.configure(state="normal", text="Login")
+        tkmb.showerror("Error", f"Login failed: {error}")
+    
     def show_register(self):
         RegisterWindow(self, self.db, self.role_var.get())
 
@@ -176,9 +186,10 @@ class RegisterWindow(ctk.CTkToplevel):
         button_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
         button_frame.pack(fill="x", padx=30, pady=20)
         
-        ctk.CTkButton(button_frame, text="Register Account", command=self.register,
-                     height=40, width=200, font=("Helvetica", 14, "bold"),
-                     fg_color="#00d9ff", hover_color="#00b8d4").pack(side="left", expand=True, padx=5)
+        self.register_btn = ctk.CTkButton(button_frame, text="Register Account", command=self.register,
+                                          height=40, width=200, font=("Helvetica", 14, "bold"),
+                                          fg_color="#00d9ff", hover_color="#00b8d4")
+        self.register_btn.pack(side="left", expand=True, padx=5)
         
         ctk.CTkButton(button_frame, text="Cancel", command=self.destroy,
                      height=40, width=100, font=("Helvetica", 14, "bold"),
@@ -223,11 +234,20 @@ class RegisterWindow(ctk.CTkToplevel):
             tkmb.showerror("Error", "Please enter a valid email!")
             return
         
-        # Register user
-        success, message = self.db.register_user(username, password, role, full_name, email, department, roll_no)
-        
+        # Register user; hashing the password takes a moment, so off the Tk thread
+        self.register_btn.configure(state="disabled", text="Creating account...")
+        self.db.submit("register_user", username, password, role, full_name, email, department, roll_no,
+                       callback=self.finish_register, errback=self.register_failed, key="register", owner=self)
+    
+    def finish_register(self, result):
+        success, message = result
+        self.register_btn.configure(state="normal", text="Register Account")
         if success:
             tkmb.showinfo("Success", message)
             self.destroy()
         else:
             tkmb.showerror("Error", message)
+    
+    def register_failed(self, error):
+        self.register_btn.configure(state="normal", text="Register Account")
+        tkmb.showerror("Error", f"Registration failed: {error}")
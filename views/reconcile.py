@@ -0,0 +1,42 @@
+# views/reconcile.py
+
+def row_key(row):
+    """Complaint rows are keyed by their id"""
+    return row.id
+
+
+def reconcile(widgets, rows, create, update, remove, key=row_key):
+    """Bring a keyed set of row widgets in line with fresh query results.
+
+    `widgets` maps key -> (row, widget) as last rendered. Widgets whose row is
+    unchanged are left alone, changed rows go to update(widget, row), new rows
+    to create(row, before) where `before` is the widget that should follow it
+    (None for the end), and widgets whose key disappeared to remove(widget).
+    Returns the new mapping in display order. Existing widgets keep their
+    place: the listings using this are sorted newest first, so rows only
+    ever appear or disappear, they never move relative to each other.
+
+    The work done on widgets is proportional to the number of rows that
+    changed, not to the number of rows shown.
+    """
+    fresh = {key(row): row for row in rows}
+
+    for k in list(widgets):
+        if k not in fresh:
+            remove(widgets.pop(k)[1])
+
+    result = {}
+    before = None
+    # Walk backwards so every new widget knows which widget comes after it
+    for row in reversed(rows):
+        k = key(row)
+        if k in widgets:
+            old_row, widget = widgets[k]
+            if old_row != row:
+                update(widget, row)
+        else:
+            widget = create(row, before)
+        result[k] = (row, widget)
+        before = widget
+
+    return dict(reversed(list(result.items())))
@@ -2,9 +2,20 @@
 import customtkinter as ctk
 import tkinter.messagebox as tkmb
 from datetime import datetime
+from suggestions import SUGGESTION_CONFIDENCE
+from views.lazy_tabs import LazyTabview
+from views.reconcile import reconcile
+
+# Quiet time after the last keystroke before a category and priority are suggested
+SUGGEST_DEBOUNCE_MS = 250
+# Description length from which suggestions are worth asking for
+SUGGEST_MIN_LENGTH = 15
+
+PRIORITY_COLORS = {"Low": "#10b981", "Medium": "#f59e0b", "High": "#ef4444", "Critical": "#7c2d12"}
+STATUS_COLORS = {"Open": "#ef4444", "In Progress": "#f59e0b", "Resolved": "#10b981", "Closed": "#6b7280"}
 
 class StudentView(ctk.CTkFrame):
-    def __init__(self, parent, db, user, logout_callback):
+    def __init__(self, parent, db, user, logout_callback, changes=None):
         super().__init__(parent)
         self.db = db
         self.user = user
@@ -16,28 +27,28 @@ class StudentView(ctk.CTkFrame):
         self.create_header()
         
         # Tabview
-        self.tabview = ctk.CTkTabview(self, corner_radius=10)
+        self.tabview = LazyTabview(self, corner_radius=10)
         self.tabview.pack(fill="both", expand=True, padx=20, pady=(0, 20))
         
-        # Tabs
-        self.tabview.add("Submit Complaint")
-        self.tabview.add("My Complaints")
-        self.tabview.add("Profile")
+        # Tabs, each built when first opened
+        self.tabview.add_lazy("Submit Complaint", self.build_submit_tab)
+        self.tabview.add_lazy("My Complaints", self.build_complaints_tab)
+        self.tabview.add_lazy("Profile", self.build_profile_tab)
+        self.tabview.show_first()
         
-        # Build tabs
-        self.build_submit_tab()
-        self.build_complaints_tab()
-        self.build_profile_tab()
+        # Pick up status changes and responses without pressing Refresh
+        if changes is not None:
+            changes.subscribe(self.apply_changes, owner=self)
     
     def create_header(self):
         header = ctk.CTkFrame(self, height=70, corner_radius=0, fg_color="#1e3a8a")
         header.pack(fill="x", padx=0, pady=0)
         header.pack_propagate(False)
         
-        ctk.CTkLabel(header, text=f"Welcome, {self.user[4]} 👨‍🎓", 
+        ctk.CTkLabel(header, text=f"Welcome, {self.user.full_name} 👨‍🎓", 
                     font=("Helvetica", 22, "bold"), text_color="white").pack(side="left", padx=30)
         
-        ctk.CTkLabel(header, text=f"Roll No: {self.user[7]}", 
+        ctk.CTkLabel(header, text=f"Roll No: {self.user.roll_no}", 
                     font=("Helvetica", 14), text_color="#a8dadc").pack(side="left", padx=10)
         
         ctk.CTkButton(header, text="Logout", command=self.logout_callback,
@@ -61,13 +72,13 @@ class StudentView(ctk.CTkFrame):
         # Name
         ctk.CTkLabel(form, text="Full Name*", anchor="w", font=("Helvetica", 12, "bold")).pack(fill="x", padx=20, pady=(20, 5))
         self.name_entry = ctk.CTkEntry(form, placeholder_text="Enter your full name", height=35)
-        self.name_entry.insert(0, self.user[4])
+        self.name_entry.insert(0, self.user.full_name)
         self.name_entry.pack(fill="x", padx=20, pady=(0, 15))
         
         # Roll No
         ctk.CTkLabel(form, text="Roll Number*", anchor="w", font=("Helvetica", 12, "bold")).pack(fill="x", padx=20, pady=(0, 5))
         self.rollno_entry = ctk.CTkEntry(form, placeholder_text="Enter roll number", height=35)
-        self.rollno_entry.insert(0, self.user[7] if self.user[7] else "")
+        self.rollno_entry.insert(0, self.user.roll_no if self.user.roll_no else "")
         self.rollno_entry.pack(fill="x", padx=20, pady=(0, 15))
         
         # Department
@@ -75,7 +86,7 @@ class StudentView(ctk.CTkFrame):
         departments = ["Computer Science", "Electronics", "Mechanical", "Civil", "Electrical", 
                       "Information Technology", "Chemical", "Biotechnology"]
         self.dept_combo = ctk.CTkComboBox(form, values=departments, height=35)
-        self.dept_combo.set(self.user[6] if self.user[6] else departments[0])
+        self.dept_combo.set(self.user.department if self.user.department else departments[0])
         self.dept_combo.pack(fill="x", padx=20, pady=(0, 15))
         
         # Course
@@ -96,28 +107,41 @@ class StudentView(ctk.CTkFrame):
         
         # Category
         ctk.CTkLabel(form, text="Complaint Category*", anchor="w", font=("Helvetica", 12, "bold")).pack(fill="x", padx=20, pady=(0, 5))
-        categories = self.db.get_categories()
-        self.category_combo = ctk.CTkComboBox(form, values=categories, height=35)
+        # Filled in once the categories have been read
+        self.category_combo = ctk.CTkComboBox(form, values=[], height=35,
+                                              command=lambda value: self.labels_chosen.add("category"))
+        self.category_combo.set("")
         self.category_combo.pack(fill="x", padx=20, pady=(0, 15))
+        self.db.submit("get_categories", callback=self.show_categories, owner=self)
         
         # Priority
         ctk.CTkLabel(form, text="Priority Level*", anchor="w", font=("Helvetica", 12, "bold")).pack(fill="x", padx=20, pady=(0, 5))
-        self.priority_combo = ctk.CTkComboBox(form, values=["Low", "Medium", "High", "Critical"], height=35)
+        self.priority_combo = ctk.CTkComboBox(form, values=["Low", "Medium", "High", "Critical"], height=35,
+                                              command=lambda value: self.labels_chosen.add("priority"))
         self.priority_combo.set("Medium")
         self.priority_combo.pack(fill="x", padx=20, pady=(0, 15))
         
         # Complaint
         ctk.CTkLabel(form, text="Complaint Description*", anchor="w", font=("Helvetica", 12, "bold")).pack(fill="x", padx=20, pady=(0, 5))
         self.complaint_text = ctk.CTkTextbox(form, height=150)
-        self.complaint_text.pack(fill="x", padx=20, pady=(0, 15))
+        self.complaint_text.pack(fill="x", padx=20, pady=(0, 5))
+        
+        # Category and priority suggested from the description while it is typed;
+        # they fill in the boxes the student has not set by hand
+        self.labels_chosen = set()
+        self.suggest_after_id = None
+        self.complaint_text.bind("<KeyRelease>", lambda event: self.schedule_suggestion())
+        self.suggestion_label = ctk.CTkLabel(form, text="", font=("Helvetica", 11), text_color="gray", anchor="w")
+        self.suggestion_label.pack(fill="x", padx=20, pady=(0, 10))
         
         # Buttons
         btn_frame = ctk.CTkFrame(form, fg_color="transparent")
         btn_frame.pack(fill="x", padx=20, pady=(10, 20))
         
-        ctk.CTkButton(btn_frame, text="Submit Complaint", command=self.submit_complaint,
-                     height=40, font=("Helvetica", 14, "bold"),
-                     fg_color="#10b981", hover_color="#059669").pack(side="left", padx=5)
+        self.submit_btn = ctk.CTkButton(btn_frame, text="Submit Complaint", command=self.submit_complaint,
+                                       height=40, font=("Helvetica", 14, "bold"),
+                                       fg_color="#10b981", hover_color="#059669")
+        self.submit_btn.pack(side="left", padx=5)
         
         ctk.CTkButton(btn_frame, text="Clear Form", command=self.clear_form,
                      height=40, font=("Helvetica", 14, "bold"),
@@ -136,10 +160,18 @@ class StudentView(ctk.CTkFrame):
         ctk.CTkButton(header_frame, text="🔄 Refresh", command=self.load_complaints,
                      width=100).pack(side="right", padx=5)
         
+        self.loading_label = ctk.CTkLabel(header_frame, text="", font=("Helvetica", 12), text_color="gray")
+        self.loading_label.pack(side="right", padx=10)
+        
         # Complaints list
         self.complaints_frame = ctk.CTkScrollableFrame(tab)
         self.complaints_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
         
+        self.empty_label = ctk.CTkLabel(self.complaints_frame, text="No complaints yet", 
+                                       font=("Helvetica", 16))
+        
+        # complaint id -> (row, card) for every card on screen
+        self.complaint_cards = {}
         self.load_complaints()
     
     def build_profile_tab(self):
@@ -152,12 +184,12 @@ class StudentView(ctk.CTkFrame):
                     font=("Helvetica", 24, "bold")).pack(pady=30)
         
         info = [
-            ("Username", self.user[1]),
-            ("Full Name", self.user[4]),
-            ("Email", self.user[5]),
-            ("Department", self.user[6]),
-            ("Roll Number", self.user[7]),
-            ("Account Created", str(self.user[8])[:16] if len(self.user) > 8 else "N/A")
+            ("Username", self.user.username),
+            ("Full Name", self.user.full_name),
+            ("Email", self.user.email),
+            ("Department", self.user.department),
+            ("Roll Number", self.user.roll_no),
+            ("Account Created", str(self.user.created_at)[:16] if self.user.created_at else "N/A")
         ]
         
         for label, value in info:
@@ -169,6 +201,12 @@ class StudentView(ctk.CTkFrame):
             ctk.CTkLabel(row, text=str(value), font=("Helvetica", 14), 
                         anchor="w").pack(side="left", padx=20)
     
+    def show_categories(self, categories):
+        self.category_combo.configure(values=categories)
+        # A suggestion or the student may have set one already
+        if categories and not self.category_combo.get():
+            self.category_combo.set(categories[0])
+    
     def submit_complaint(self):
         name = self.name_entry.get().strip()
         roll_no = self.rollno_entry.get().strip()
@@ -180,7 +218,7 @@ class StudentView(ctk.CTkFrame):
         priority = self.priority_combo.get()
         
         # Validation
-        if not all([name, roll_no, department, course, complaint]):
+        if not all([name, roll_no, department, course, complaint, category]):
             tkmb.showerror("Error", "Please fill all required fields!")
             return
         
@@ -188,77 +226,213 @@ class StudentView(ctk.CTkFrame):
             tkmb.showerror("Error", "Complaint must be at least 20 characters!")
             return
         
-        # Submit
-        self.db.add_complaint(self.user[0], name, roll_no, department, course, gender, complaint, category, priority)
-        tkmb.showinfo("Success", "Complaint submitted successfully!")
+        # Look for the same complaint already open before filing a new one
+        form = (name, roll_no, department, course, gender, complaint, category, priority)
+        self.submit_btn.configure(state="disabled", text="Checking...")
+        self.db.submit("find_duplicates", complaint, callback=lambda matches: self.offer_duplicates(form, matches),
+                       errback=lambda error: self.send_complaint(form), owner=self)
+    
+    def offer_duplicates(self, form, matches):
+        if not matches:
+            self.send_complaint(form)
+            return
+        DuplicateDialog(self, matches, on_choice=lambda duplicate_of: self.send_complaint(form, duplicate_of),
+                        on_cancel=self.reset_submit_button)
+    
+    def send_complaint(self, form, duplicate_of=None):
+        self.submit_btn.configure(state="disabled", text="Submitting...")
+        self.db.submit("add_complaint", self.user.id, *form, duplicate_of=duplicate_of,
+                       callback=lambda complaint_id: self.complaint_submitted(complaint_id, duplicate_of),
+                       errback=self.submit_failed, owner=self)
+    
+    def reset_submit_button(self):
+        self.submit_btn.configure(state="normal", text="Submit Complaint")
+    
+    def complaint_submitted(self, complaint_id, duplicate_of=None):
+        self.reset_submit_button()
+        if duplicate_of is not None:
+            tkmb.showinfo("Success", f"Your complaint was added to complaint #{duplicate_of}. "
+                                     "Staff will handle them together; follow it under My Complaints.")
+        else:
+            tkmb.showinfo("Success", "Complaint submitted successfully!")
         self.clear_form()
         self.load_complaints()
     
+    def submit_failed(self, error):
+        self.reset_submit_button()
+        tkmb.showerror("Error", f"Failed to submit complaint: {error}")
+    
+    def schedule_suggestion(self):
+        if self.suggest_after_id is not None:
+            self.after_cancel(self.suggest_after_id)
+        self.suggest_after_id = self.after(SUGGEST_DEBOUNCE_MS, self.request_suggestion)
+    
+    def request_suggestion(self):
+        self.suggest_after_id = None
+        text = self.complaint_text.get("1.0", "end").strip()
+        if len(text) < SUGGEST_MIN_LENGTH:
+            self.suggestion_label.configure(text="")
+            return
+        self.db.submit("suggest_labels", text, callback=self.show_suggestion,
+                       errback=lambda error: self.suggestion_label.configure(text=""),
+                       key="label-suggestion", owner=self)
+    
+    def show_suggestion(self, suggestion):
+        suggested = []
+        if suggestion is not None:
+            for name, label, confidence, combo in (
+                    ("category", suggestion.category, suggestion.category_confidence, self.category_combo),
+                    ("priority", suggestion.priority, suggestion.priority_confidence, self.priority_combo)):
+                if label is None or confidence < SUGGESTION_CONFIDENCE:
+                    continue
+                suggested.append(label)
+                if name not in self.labels_chosen:
+                    combo.set(label)
+        if suggested:
+            self.suggestion_label.configure(text=f"💡 Suggested from your description: {' · '.join(suggested)} "
+                                                 "(change it if it does not fit)")
+        else:
+            self.suggestion_label.configure(text="")
+    
     def clear_form(self):
         self.complaint_text.delete("1.0", "end")
         self.priority_combo.set("Medium")
+        self.labels_chosen = set()
+        self.suggestion_label.configure(text="")
     
     def load_complaints(self):
-        for widget in self.complaints_frame.winfo_children():
-            widget.destroy()
-        
-        complaints = self.db.get_user_complaints(self.user[0])
-        
-        if not complaints:
-            ctk.CTkLabel(self.complaints_frame, text="No complaints yet", 
-                        font=("Helvetica", 16)).pack(pady=50)
+        if not self.tabview.is_built("My Complaints"):
+            # Loaded when the tab is first opened
             return
+        self.loading_label.configure(text="⏳ Loading...")
+        self.db.submit("get_user_complaints", self.user.id, include_archive=True, callback=self.show_complaints,
+                       errback=self.load_failed, key="my-complaints", owner=self)
+    
+    def apply_changes(self, changes):
+        if any(change.user_id == self.user.id or change.op == "reload" for change in changes):
+            self.load_complaints()
+    
+    def load_failed(self, error):
+        self.loading_label.configure(text="")
+        tkmb.showerror("Error", f"Failed to load complaints: {error}")
+    
+    def show_complaints(self, complaints):
+        self.loading_label.configure(text="")
+        self.complaint_cards = reconcile(self.complaint_cards, complaints, self.create_complaint_card,
+                                         self.update_complaint_card, lambda card: card.destroy())
         
-        for comp in complaints:
-            self.create_complaint_card(comp)
+        if complaints:
+            self.empty_label.pack_forget()
+        else:
+            self.empty_label.pack(pady=50)
     
-    def create_complaint_card(self, comp):
+    def create_complaint_card(self, comp, before=None):
         card = ctk.CTkFrame(self.complaints_frame, corner_radius=10)
-        card.pack(fill="x", pady=10, padx=10)
+        if before is not None:
+            card.pack(fill="x", pady=10, padx=10, before=before)
+        else:
+            card.pack(fill="x", pady=10, padx=10)
         
         # Header
         header = ctk.CTkFrame(card, fg_color="transparent")
         header.pack(fill="x", padx=15, pady=(15, 5))
         
-        ctk.CTkLabel(header, text=f"Complaint #{comp[0]}", 
+        ctk.CTkLabel(header, text=f"Complaint #{comp.id}", 
                     font=("Helvetica", 16, "bold")).pack(side="left")
         
         # Status badge
-        status_colors = {"Open": "#ef4444", "In Progress": "#f59e0b", "Resolved": "#10b981", "Closed": "#6b7280"}
-        status_label = ctk.CTkLabel(header, text=comp[9], 
-                                   font=("Helvetica", 12, "bold"),
-                                   fg_color=status_colors.get(comp[9], "#6b7280"),
-                                   corner_radius=5, text_color="white")
-        status_label.pack(side="right", padx=5)
+        card.status_label = ctk.CTkLabel(header, text="", font=("Helvetica", 12, "bold"),
+                                        corner_radius=5, text_color="white")
+        card.status_label.pack(side="right", padx=5)
         
         # Priority badge
-        priority_colors = {"Low": "#10b981", "Medium": "#f59e0b", "High": "#ef4444", "Critical": "#7c2d12"}
-        priority_label = ctk.CTkLabel(header, text=comp[8], 
-                                     font=("Helvetica", 12, "bold"),
-                                     fg_color=priority_colors.get(comp[8], "#6b7280"),
-                                     corner_radius=5, text_color="white")
-        priority_label.pack(side="right", padx=5)
+        card.priority_label = ctk.CTkLabel(header, text="", font=("Helvetica", 12, "bold"),
+                                          corner_radius=5, text_color="white")
+        card.priority_label.pack(side="right", padx=5)
         
         # Details
         details = ctk.CTkFrame(card, fg_color="transparent")
         details.pack(fill="x", padx=15, pady=5)
         
-        ctk.CTkLabel(details, text=f"Category: {comp[7]} | Course: {comp[4]} | Submitted: {comp[10][:16]}", 
-                    font=("Helvetica", 11), text_color="gray").pack(anchor="w")
+        card.details_label = ctk.CTkLabel(details, text="", font=("Helvetica", 11), text_color="gray")
+        card.details_label.pack(anchor="w")
         
         # Complaint text
-        complaint_label = ctk.CTkLabel(card, text=comp[6], font=("Helvetica", 12),
-                                      anchor="w", justify="left", wraplength=800)
-        complaint_label.pack(fill="x", padx=15, pady=(5, 15))
+        card.complaint_label = ctk.CTkLabel(card, text="", font=("Helvetica", 12),
+                                           anchor="w", justify="left", wraplength=800)
+        card.complaint_label.pack(fill="x", padx=15, pady=(5, 15))
         
         # View details button
-        ctk.CTkButton(card, text="View Details", command=lambda: self.view_complaint_details(comp[0]),
+        ctk.CTkButton(card, text="View Details", command=lambda: self.view_complaint_details(comp.id),
                      width=120, height=30).pack(anchor="e", padx=15, pady=(0, 15))
+        
+        self.update_complaint_card(card, comp)
+        return card
+    
+    def update_complaint_card(self, card, comp):
+        card.status_label.configure(text=comp.status, fg_color=STATUS_COLORS.get(comp.status, "#6b7280"))
+        card.priority_label.configure(text=comp.priority, fg_color=PRIORITY_COLORS.get(comp.priority, "#6b7280"))
+        card.details_label.configure(text=f"Category: {comp.category} | Course: {comp.course} | Submitted: {str(comp.submitted_at)[:16]}")
+        card.complaint_label.configure(text=comp.complaint)
     
     def view_complaint_details(self, complaint_id):
         ComplaintDetailWindow(self, self.db, complaint_id, self.user)
 
 
+class DuplicateDialog(ctk.CTkToplevel):
+    """Offers to add a new complaint to a similar one that is already open.
+    Only the category, status and size of the existing complaints are shown,
+    not what other students wrote."""
+    
+    def __init__(self, parent, matches, on_choice, on_cancel):
+        super().__init__(parent)
+        self.on_choice = on_choice
+        self.on_cancel = on_cancel
+        
+        self.title("Similar Complaints Found")
+        self.geometry("560x420")
+        self.transient(parent)
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+        
+        ctk.CTkLabel(self, text="This looks like a complaint that is already open",
+                    font=("Helvetica", 16, "bold")).pack(padx=20, pady=(20, 5))
+        ctk.CTkLabel(self, text="Adding yours to it lets staff deal with them together. It still appears "
+                               "under My Complaints and you are kept up to date.",
+                    font=("Helvetica", 12), wraplength=500, justify="left").pack(padx=20, pady=(0, 10))
+        
+        self.choice = ctk.IntVar(value=matches[0].id)
+        options = ctk.CTkScrollableFrame(self, height=180)
+        options.pack(fill="both", expand=True, padx=20, pady=5)
+        for match in matches:
+            reports = match.duplicates + 1
+            text = (f"#{match.id} · {match.category} · {match.status} · since {str(match.submitted_at)[:16]} · "
+                    f"{reports} report{'s' if reports > 1 else ''} · {match.similarity:.0%} similar")
+            ctk.CTkRadioButton(options, text=text, variable=self.choice, value=match.id).pack(anchor="w", pady=5)
+        
+        buttons = ctk.CTkFrame(self, fg_color="transparent")
+        buttons.pack(fill="x", padx=20, pady=(10, 20))
+        ctk.CTkButton(buttons, text="Add to selected complaint", command=self.add_to_existing,
+                     fg_color="#10b981", hover_color="#059669").pack(side="left", padx=5)
+        ctk.CTkButton(buttons, text="Submit as new", command=self.submit_new).pack(side="left", padx=5)
+        ctk.CTkButton(buttons, text="Cancel", command=self.cancel, width=80,
+                     fg_color="#6b7280", hover_color="#4b5563").pack(side="right", padx=5)
+        
+        self.grab_set()
+    
+    def add_to_existing(self):
+        duplicate_of = self.choice.get()
+        self.destroy()
+        self.on_choice(duplicate_of)
+    
+    def submit_new(self):
+        self.destroy()
+        self.on_choice(None)
+    
+    def cancel(self):
+        self.destroy()
+        self.on_cancel()
+
+
 class ComplaintDetailWindow(ctk.CTkToplevel):
     def __init__(self, parent, db, complaint_id, user):
         super().__init__(parent)
@@ -270,19 +444,31 @@ class ComplaintDetailWindow(ctk.CTkToplevel):
         self.title(f"Complaint #{complaint_id} Details")
         self.geometry("700x600")
         
-        # Load complaint
-        complaint = db.get_complaint_by_id(complaint_id)
+        self.loading_label = ctk.CTkLabel(self, text="⏳ Loading...", font=("Helvetica", 14), text_color="gray")
+        self.loading_label.pack(pady=50)
         
-        if not complaint:
+        # Load complaint and responses (students keep seeing their archived ones)
+        db.submit("load_complaint_bundle", complaint_id, callback=self.show_bundle, errback=self.load_failed,
+                  owner=self)
+    
+    def load_failed(self, error):
+        self.destroy()
+        tkmb.showerror("Error", f"Failed to load complaint: {error}")
+    
+    def show_bundle(self, bundle):
+        if not bundle:
             self.destroy()
             return
+        self.loading_label.destroy()
+        
+        complaint = bundle.complaint
         
         # Main frame
         main = ctk.CTkScrollableFrame(self)
         main.pack(fill="both", expand=True, padx=20, pady=20)
         
         # Title
-        ctk.CTkLabel(main, text=f"Complaint #{complaint[0]}", 
+        ctk.CTkLabel(main, text=f"Complaint #{complaint.id}", 
                     font=("Helvetica", 22, "bold")).pack(pady=(0, 20))
         
         # Info grid
@@ -290,14 +476,14 @@ class ComplaintDetailWindow(ctk.CTkToplevel):
         info_frame.pack(fill="x", pady=10)
         
         info = [
-            ("Name", complaint[2]),
-            ("Roll No", complaint[3]),
-            ("Department", complaint[4]),
-            ("Course", complaint[5]),
-            ("Category", complaint[8]),
-            ("Priority", complaint[9]),
-            ("Status", complaint[10]),
-            ("Submitted", str(complaint[11])[:16])
+            ("Name", complaint.name),
+            ("Roll No", complaint.roll_no),
+            ("Department", complaint.department),
+            ("Course", complaint.course),
+            ("Category", complaint.category),
+            ("Priority", complaint.priority),
+            ("Status", complaint.status),
+            ("Submitted", str(complaint.submitted_at)[:16])
         ]
         
         for i, (label, value) in enumerate(info):
@@ -315,7 +501,7 @@ class ComplaintDetailWindow(ctk.CTkToplevel):
                     font=("Helvetica", 14, "bold"), anchor="w").pack(fill="x", pady=(20, 5))
         
         complaint_box = ctk.CTkTextbox(main, height=100, wrap="word")
-        complaint_box.insert("1.0", complaint[7])
+        complaint_box.insert("1.0", complaint.complaint)
         complaint_box.configure(state="disabled")
         complaint_box.pack(fill="x", pady=(0, 20))
         
@@ -323,7 +509,7 @@ class ComplaintDetailWindow(ctk.CTkToplevel):
         ctk.CTkLabel(main, text="Responses:", font=("Helvetica", 14, "bold"), 
                     anchor="w").pack(fill="x", pady=(10, 5))
         
-        responses = db.get_responses(complaint_id)
+        responses = bundle.responses
         
         if responses:
             for resp in responses:
@@ -339,10 +525,10 @@ class ComplaintDetailWindow(ctk.CTkToplevel):
         header = ctk.CTkFrame(card, fg_color="transparent")
         header.pack(fill="x", padx=10, pady=(10, 5))
         
-        ctk.CTkLabel(header, text=f"{response[4]} ({response[5]})", 
+        ctk.CTkLabel(header, text=f"{response.responder_name} ({response.responder_role})", 
                     font=("Helvetica", 12, "bold")).pack(side="left")
-        ctk.CTkLabel(header, text=str(response[3])[:16], 
+        ctk.CTkLabel(header, text=str(response.responded_at)[:16], 
                     font=("Helvetica", 10), text_color="gray").pack(side="right")
         
-        ctk.CTkLabel(card, text=response[2], font=("Helvetica", 11),
+        ctk.CTkLabel(card, text=response.response, font=("Helvetica", 11),
                     anchor="w", justify="left", wraplength=600).pack(fill="x", padx=10, pady=(0, 10))
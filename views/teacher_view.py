@@ -1,16 +1,75 @@
 # views/teacher_view.py
 import customtkinter as ctk
 import tkinter.messagebox as tkmb
-from tkinter import filedialog
-import csv
+import threading
 from datetime import datetime
+from database import ExportCancelled
+from sla import SLA_MIN_SECONDS
+from views.lazy_tabs import LazyTabview
+from views.virtual_list import VirtualList
+
+# Complaints fetched per page as the teacher scrolls the list
+PAGE_SIZE = 100
+ROW_HEIGHT = 52
+# Quiet time after the last keystroke before the list is re-queried
+SEARCH_DEBOUNCE_MS = 300
+# Methods and statements listed on the Diagnostics tab, by total time
+DIAGNOSTICS_TOP = 15
+
+PRIORITY_COLORS = {"Low": "#10b981", "Medium": "#f59e0b", "High": "#ef4444", "Critical": "#7c2d12"}
+STATUS_COLORS = {"Open": "#ef4444", "In Progress": "#f59e0b", "Resolved": "#10b981", "Closed": "#6b7280"}
+
+def format_duration(seconds):
+    if seconds is None:
+        return "-"
+    if seconds <= SLA_MIN_SECONDS:
+        # The sketches cannot tell durations in their first bucket apart
+        return "<1 min"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    if seconds < 48 * 3600:
+        return f"{seconds / 3600:.1f} h"
+    return f"{seconds / 86400:.1f} days"
+
+def format_percentiles(summary):
+    if not summary or not summary["count"]:
+        return "-"
+    return f"{format_duration(summary['median'])} / {format_duration(summary['p90'])}"
+
+def format_diagnostics(snapshot):
+    """Plain-text report of an instrumentation snapshot for the Diagnostics tab"""
+    if snapshot is None:
+        return ("Instrumentation is off. Start the app with --diagnostics, or the server with --instrument, "
+                "to time database methods and statements.")
+    lines = [f"Recording since {snapshot['started_at']} (as of {snapshot['taken_at']}); "
+             f"statements taking {snapshot['slow_query_ms']:g} ms or more are logged with their plan.", ""]
+    for heading, metrics in (("Methods", snapshot["methods"]), ("Statements", snapshot["statements"])):
+        top = sorted(metrics.items(), key=lambda item: item[1]["total_ms"], reverse=True)[:DIAGNOSTICS_TOP]
+        lines.append(f"{heading} by total time ({len(metrics)} seen)")
+        lines.append(f"{'calls':>8} {'total ms':>10} {'mean ms':>9} {'p99 ms':>9} {'max ms':>9} {'rows':>9}  name")
+        for name, m in top:
+            lines.append(f"{m['calls']:>8} {m['total_ms']:>10.1f} {m['mean_ms'] or 0:>9.3f} {m['p99_ms'] or 0:>9.3f} "
+                         f"{m['max_ms']:>9.3f} {m['rows']:>9}  {name if len(name) <= 160 else name[:157] + '...'}")
+        lines.append("")
+    slow = snapshot["slow_queries"]
+    lines.append(f"Slow queries ({len(slow)} logged, newest first)")
+    for entry in reversed(slow):
+        lines.append(f"{entry['at']}  {entry['elapsed_ms']:.1f} ms, {entry['rows']} rows")
+        lines.append(f"    {entry['sql']}")
+        if entry["params"]:
+            lines.append(f"    params: {entry['params']}")
+        for step in entry["plan"] or ():
+            lines.append(f"    plan: {step}")
+    return "\n".join(lines)
 
 class TeacherView(ctk.CTkFrame):
-    def __init__(self, parent, db, user, logout_callback):
+    def __init__(self, parent, db, user, logout_callback, changes=None, diagnostics=False):
         super().__init__(parent)
         self.db = db
         self.user = user
         self.logout_callback = logout_callback
+        self.shown_stats = None
+        self.shown_sla = None
         
         self.configure(fg_color="#f0f0f0")
         
@@ -18,28 +77,30 @@ class TeacherView(ctk.CTkFrame):
         self.create_header()
         
         # Tabview
-        self.tabview = ctk.CTkTabview(self, corner_radius=10)
+        self.tabview = LazyTabview(self, corner_radius=10)
         self.tabview.pack(fill="both", expand=True, padx=20, pady=(0, 20))
         
-        # Tabs
-        self.tabview.add("All Complaints")
-        self.tabview.add("Dashboard")
-        self.tabview.add("Profile")
-        
-        # Build tabs
-        self.build_complaints_tab()
-        self.build_dashboard_tab()
-        self.build_profile_tab()
+        # Tabs, each built when first opened; the dashboard queries on demand
+        self.tabview.add_lazy("All Complaints", self.build_complaints_tab)
+        self.tabview.add_lazy("Dashboard", self.build_dashboard_tab)
+        self.tabview.add_lazy("Profile", self.build_profile_tab)
+        if diagnostics:
+            self.tabview.add_lazy("Diagnostics", self.build_diagnostics_tab)
+        self.tabview.show_first()
+        
+        # Follow other clients' changes without pressing Refresh
+        if changes is not None:
+            changes.subscribe(self.apply_changes, owner=self)
     
     def create_header(self):
         header = ctk.CTkFrame(self, height=70, corner_radius=0, fg_color="#7c2d12")
         header.pack(fill="x", padx=0, pady=0)
         header.pack_propagate(False)
         
-        ctk.CTkLabel(header, text=f"Welcome, {self.user[4]} 👨‍🏫", 
+        ctk.CTkLabel(header, text=f"Welcome, {self.user.full_name} 👨‍🏫", 
                     font=("Helvetica", 22, "bold"), text_color="white").pack(side="left", padx=30)
         
-        ctk.CTkLabel(header, text=f"Department: {self.user[6]}", 
+        ctk.CTkLabel(header, text=f"Department: {self.user.department}", 
                     font=("Helvetica", 14), text_color="#fcd34d").pack(side="left", padx=10)
         
         ctk.CTkButton(header, text="Logout", command=self.logout_callback,
@@ -57,51 +118,106 @@ class TeacherView(ctk.CTkFrame):
         self.search_var = ctk.StringVar()
         self.search_entry = ctk.CTkEntry(filter_frame, textvariable=self.search_var, width=200)
         self.search_entry.grid(row=0, column=1, padx=5)
+        self.search_entry.bind("<Return>", lambda event: self.load_complaints())
+        self.search_after_id = None
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
         
         # Status filter
         ctk.CTkLabel(filter_frame, text="Status:", font=("Helvetica", 12, "bold")).grid(row=0, column=2, padx=5)
-        self.status_filter = ctk.CTkComboBox(filter_frame, values=["All", "Open", "In Progress", "Resolved", "Closed"], width=120)
+        self.status_filter = ctk.CTkComboBox(filter_frame, values=["All", "Open", "In Progress", "Resolved", "Closed"], width=120,
+                                             command=lambda value: self.schedule_search(0))
         self.status_filter.set("All")
         self.status_filter.grid(row=0, column=3, padx=5)
         
         # Category filter
         ctk.CTkLabel(filter_frame, text="Category:", font=("Helvetica", 12, "bold")).grid(row=0, column=4, padx=5)
-        categories = ["All"] + self.db.get_categories()
-        self.category_filter = ctk.CTkComboBox(filter_frame, values=categories, width=150)
+        self.category_filter = ctk.CTkComboBox(filter_frame, values=["All"], width=150,
+                                               command=lambda value: self.schedule_search(0))
         self.category_filter.set("All")
         self.category_filter.grid(row=0, column=5, padx=5)
+        self.db.submit("get_categories", owner=self,
+                       callback=lambda categories: self.category_filter.configure(values=["All"] + categories))
         
         # Priority filter
         ctk.CTkLabel(filter_frame, text="Priority:", font=("Helvetica", 12, "bold")).grid(row=1, column=0, padx=5, pady=10)
-        self.priority_filter = ctk.CTkComboBox(filter_frame, values=["All", "Low", "Medium", "High", "Critical"], width=120)
+        self.priority_filter = ctk.CTkComboBox(filter_frame, values=["All", "Low", "Medium", "High", "Critical"], width=120,
+                                               command=lambda value: self.schedule_search(0))
         self.priority_filter.set("All")
         self.priority_filter.grid(row=1, column=1, padx=5, pady=10)
         
         # Buttons
         ctk.CTkButton(filter_frame, text="🔍 Search", command=self.load_complaints, width=100).grid(row=1, column=2, padx=5)
-        ctk.CTkButton(filter_frame, text="🔄 Refresh", command=self.load_complaints, width=100).grid(row=1, column=3, padx=5)
+        ctk.CTkButton(filter_frame, text="🔄 Refresh", command=self.refresh_complaints, width=100).grid(row=1, column=3, padx=5)
         ctk.CTkButton(filter_frame, text="📊 Export CSV", command=self.export_to_csv, 
                      fg_color="#10b981", hover_color="#059669", width=120).grid(row=1, column=4, padx=5)
         
-        # Complaints list
-        self.complaints_frame = ctk.CTkScrollableFrame(tab)
-        self.complaints_frame.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+        self.include_archive = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(filter_frame, text="Include archived", variable=self.include_archive,
+                       command=self.load_complaints).grid(row=1, column=5, padx=5)
+        
+        # Complaints linked as duplicates are folded into the one they were linked to
+        self.group_duplicates = ctk.BooleanVar(value=True)
+        ctk.CTkCheckBox(filter_frame, text="Group duplicates", variable=self.group_duplicates,
+                       command=self.regroup_complaints).grid(row=1, column=6, padx=5)
+        self.duplicate_links = {}
+        
+        self.loading_label = ctk.CTkLabel(filter_frame, text="", font=("Helvetica", 12), text_color="gray")
+        self.loading_label.grid(row=1, column=7, padx=5)
+        
+        # Bulk actions on the ticked rows
+        self.selected = set()
+        self.create_bulk_bar(tab)
+        
+        # Complaints list: fixed header plus a virtualized body
+        self.create_list_header(tab)
+        
+        self.complaint_list = VirtualList(tab, ROW_HEIGHT, self.create_complaint_row,
+                                          self.update_complaint_row, fetch_more=self.load_more_complaints,
+                                          empty_text="No complaints found")
+        self.complaint_list.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+        self.complaint_pages = iter(())
+        self.loaded_filters = None
         
         self.load_complaints()
     
     def build_dashboard_tab(self):
-        tab = self.tabview.tab("Dashboard")
+        # Scrolls, as the service level tables make it taller than the window
+        body = ctk.CTkScrollableFrame(self.tabview.tab("Dashboard"), fg_color="transparent")
+        body.pack(fill="both", expand=True)
         
         # Title
-        ctk.CTkLabel(tab, text="Analytics Dashboard", 
+        ctk.CTkLabel(body, text="Analytics Dashboard", 
                     font=("Helvetica", 28, "bold")).pack(pady=20)
         
         # Stats container
-        stats_container = ctk.CTkFrame(tab, fg_color="transparent")
-        stats_container.pack(fill="both", expand=True, padx=40, pady=20)
+        self.stats_container = ctk.CTkFrame(body, fg_color="transparent")
+        self.stats_container.pack(fill="both", expand=True, padx=40, pady=20)
+        
+        # Service levels, filled in by their own query
+        self.sla_container = ctk.CTkFrame(body, corner_radius=15)
+        self.sla_container.pack(fill="both", expand=True, padx=40, pady=(0, 20))
         
-        # Get statistics
-        stats = self.db.get_statistics()
+        self.stats_loading = ctk.CTkLabel(self.stats_container, text="⏳ Loading statistics...",
+                                         font=("Helvetica", 16), text_color="gray")
+        self.stats_loading.pack(pady=50)
+        
+        self.refresh_statistics()
+    
+    def refresh_statistics(self):
+        if not self.tabview.is_built("Dashboard"):
+            return
+        self.db.submit("get_statistics", include_archive=True, callback=self.show_statistics,
+                       key="statistics", owner=self)
+        self.db.submit("get_sla_statistics", callback=self.show_sla_statistics, key="sla-statistics", owner=self)
+    
+    def show_statistics(self, stats):
+        if stats == self.shown_stats:
+            return
+        self.shown_stats = stats
+        
+        stats_container = self.stats_container
+        for child in stats_container.winfo_children():
+            child.destroy()
         
         # Stats cards
         cards_frame = ctk.CTkFrame(stats_container, fg_color="transparent")
@@ -152,6 +268,38 @@ class TeacherView(ctk.CTkFrame):
             ctk.CTkLabel(row, text=str(count), font=("Helvetica", 14, "bold"), 
                         fg_color="#7c2d12", corner_radius=5, width=60, text_color="white").pack(side="right")
     
+    def show_sla_statistics(self, sla):
+        if sla == self.shown_sla:
+            return
+        self.shown_sla = sla
+        
+        for child in self.sla_container.winfo_children():
+            child.destroy()
+        
+        ctk.CTkLabel(self.sla_container, text="Service Levels", 
+                    font=("Helvetica", 20, "bold")).pack(pady=(15, 0))
+        ctk.CTkLabel(self.sla_container, text="Time from submission to the first response and to resolution "
+                    "(median / 90th percentile)", font=("Helvetica", 12), text_color="gray").pack(pady=(0, 10))
+        
+        first_response = sla["first_response"]
+        resolution = sla["resolution"]
+        for heading, key in (("Category", "by_category"), ("Department", "by_department")):
+            table = ctk.CTkFrame(self.sla_container, fg_color="transparent")
+            table.pack(fill="x", padx=30, pady=(0, 15))
+            for column, text in enumerate((heading, "Resolved", "First Response", "Resolution")):
+                ctk.CTkLabel(table, text=text, font=("Helvetica", 13, "bold"), 
+                            anchor="w" if column == 0 else "center").grid(row=0, column=column, sticky="ew", padx=5)
+                table.columnconfigure(column, weight=1)
+            
+            groups = sorted(resolution[key], key=lambda name: resolution[key][name]["count"], reverse=True)
+            rows = [("All complaints", first_response["all"], resolution["all"])]
+            rows += [(name, first_response[key].get(name), resolution[key][name]) for name in groups]
+            for row, (name, first, resolved) in enumerate(rows, 1):
+                cells = (name, str(resolved["count"]), format_percentiles(first), format_percentiles(resolved))
+                for column, text in enumerate(cells):
+                    ctk.CTkLabel(table, text=text, font=("Helvetica", 13, "bold" if row == 1 else "normal"), 
+                                anchor="w" if column == 0 else "center").grid(row=row, column=column, sticky="ew", padx=5)
+    
     def create_stat_card(self, parent, title, value, color, column):
         card = ctk.CTkFrame(parent, corner_radius=15, fg_color=color)
         card.grid(row=0, column=column, padx=10, sticky="ew")
@@ -172,12 +320,12 @@ class TeacherView(ctk.CTkFrame):
                     font=("Helvetica", 24, "bold")).pack(pady=30)
         
         info = [
-            ("Username", self.user[1]),
-            ("Full Name", self.user[4]),
-            ("Email", self.user[5]),
-            ("Department", self.user[6]),
-            ("Role", self.user[3]),
-            ("Account Created", str(self.user[8])[:16] if len(self.user) > 8 else "N/A")
+            ("Username", self.user.username),
+            ("Full Name", self.user.full_name),
+            ("Email", self.user.email),
+            ("Department", self.user.department),
+            ("Role", self.user.role),
+            ("Account Created", str(self.user.created_at)[:16] if self.user.created_at else "N/A")
         ]
         
         for label, value in info:
@@ -189,106 +337,543 @@ class TeacherView(ctk.CTkFrame):
             ctk.CTkLabel(row, text=str(value), font=("Helvetica", 14), 
                         anchor="w").pack(side="left", padx=20)
     
-    def load_complaints(self):
-        for widget in self.complaints_frame.winfo_children():
-            widget.destroy()
+    def build_diagnostics_tab(self):
+        tab = self.tabview.tab("Diagnostics")
+        self.diagnostics_snapshot = None
+        
+        toolbar = ctk.CTkFrame(tab, fg_color="transparent")
+        toolbar.pack(fill="x", padx=20, pady=(15, 5))
+        
+        ctk.CTkLabel(toolbar, text="Database Diagnostics", font=("Helvetica", 20, "bold")).pack(side="left")
+        ctk.CTkButton(toolbar, text="Reset", width=90, fg_color="#ef4444",
+                     command=self.reset_diagnostics).pack(side="right", padx=5)
+        ctk.CTkButton(toolbar, text="Save JSON", width=100, command=self.save_diagnostics).pack(side="right", padx=5)
+        ctk.CTkButton(toolbar, text="🔄 Refresh", width=100, command=self.refresh_diagnostics).pack(side="right", padx=5)
+        
+        self.diagnostics_text = ctk.CTkTextbox(tab, font=("Courier", 12), wrap="none")
+        self.diagnostics_text.pack(fill="both", expand=True, padx=20, pady=(5, 20))
+        
+        self.refresh_diagnostics()
+    
+    def refresh_diagnostics(self):
+        self.db.submit("instrumentation_snapshot", callback=self.show_diagnostics, key="diagnostics", owner=self)
+    
+    def show_diagnostics(self, snapshot):
+        self.diagnostics_snapshot = snapshot
+        self.diagnostics_text.configure(state="normal")
+        self.diagnostics_text.delete("1.0", "end")
+        self.diagnostics_text.insert("1.0", format_diagnostics(snapshot))
+        self.diagnostics_text.configure(state="disabled")
+    
+    def reset_diagnostics(self):
+        self.db.submit("reset_instrumentation", callback=lambda _: self.refresh_diagnostics(), owner=self)
+    
+    def save_diagnostics(self):
+        import json
+        from tkinter import filedialog
+        
+        if self.diagnostics_snapshot is None:
+            tkmb.showinfo("Diagnostics", "There is nothing to save while instrumentation is off.")
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
+            initialfile=f"diagnostics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        )
+        if not file_path:
+            return
+        try:
+            with open(file_path, "w", encoding="utf-8") as f:
+                json.dump(self.diagnostics_snapshot, f, indent=2)
+        except OSError as e:
+            tkmb.showerror("Error", f"Failed to save: {str(e)}")
+    
+    def current_filters(self):
+        return (self.search_var.get().strip(), self.status_filter.get(),
+                self.category_filter.get(), self.priority_filter.get(), self.include_archive.get())
+    
+    def schedule_search(self, delay=SEARCH_DEBOUNCE_MS):
+        """Re-query once the filters have stopped changing for `delay` ms"""
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+        self.search_after_id = self.after(delay, self.run_scheduled_search)
+    
+    def run_scheduled_search(self):
+        self.search_after_id = None
+        if self.winfo_exists() and self.current_filters() != self.loaded_filters:
+            self.load_complaints()
+    
+    def open_pages(self, db, filters):
+        # Listing ids are cached until the next write, so filters the teacher
+        # has used before only cost the primary key reads in id_pages
+        ids, complete = db.get_complaint_ids(*filters)
+        yield from self.id_pages(db, ids, filters[4])
+        if not complete:
+            # Scrolled past the cached ids: carry on with the uncached paging
+            yield from self.uncached_pages(db, filters, ids)
+    
+    def id_pages(self, db, ids, include_archive):
+        for start in range(0, len(ids), PAGE_SIZE):
+            chunk = ids[start:start + PAGE_SIZE]
+            found = {row.id: row for row in db.get_complaint_rows(chunk, include_archive=include_archive)}
+            page = [found[complaint_id] for complaint_id in chunk if complaint_id in found]
+            if page:
+                yield page
+    
+    def uncached_pages(self, db, filters, seen):
+        search, status, category, priority, include_archive = filters
+        if search:
+            # Full-text search, best matches first
+            return self.search_pages(db, search, status, category, priority, include_archive, offset=len(seen))
+        last = db.get_complaint_rows(seen[-1:], include_archive=include_archive)
+        if not last:
+            # Gone since the ids were read; the change feed reloads the list
+            return iter(())
+        return db.iter_complaints_page(after=(last[0].submitted_at, last[0].id), limit=PAGE_SIZE, status_filter=status, category_filter=category,
+                                       priority_filter=priority, include_archive=include_archive)
+    
+    def search_pages(self, db, search, status, category, priority, include_archive, offset=0):
+        while True:
+            page = db.search_complaints(search, status, category, priority,
+                                        limit=PAGE_SIZE, offset=offset, include_archive=include_archive)
+            if page:
+                yield page
+            if len(page) < PAGE_SIZE:
+                return
+            offset += PAGE_SIZE
+    
+    # The page generators are only ever advanced on the database thread;
+    # every list query shares the "complaint-list" key so a newer one
+    # supersedes any that are still pending.
+    def read_pages(self, db, filters, wanted):
+        pages = self.open_pages(db, filters)
+        rows = []
+        page = []
+        for page in pages:
+            rows.extend(page)
+            if len(rows) >= wanted:
+                break
+        return pages, rows, len(page) == PAGE_SIZE, db.get_duplicate_links(row.id for row in rows)
+    
+    def read_page(self, db, pages):
+        page = next(pages, [])
+        return page, db.get_duplicate_links(row.id for row in page)
+    
+    def read_rows(self, db, ids, filters):
+        """Rows and duplicate links for `ids`, plus the complaints they are
+        duplicates of, whose count of linked complaints may have changed"""
+        rows = db.get_complaint_rows(ids, *filters)
+        links = db.get_duplicate_links(ids)
+        primaries = {link.duplicate_of for link in links if link.duplicate_of is not None} - ids
+        if primaries:
+            rows += db.get_complaint_rows(primaries, *filters)
+            links += db.get_duplicate_links(primaries)
+        return ids | primaries, rows, links
+    
+    def query_list(self, work, *args, callback, on_error=None):
+        self.loading_label.configure(text="⏳ Loading...")
         
-        search = self.search_var.get()
-        status = self.status_filter.get()
-        category = self.category_filter.get()
-        priority = self.priority_filter.get()
+        def done(result):
+            self.loading_label.configure(text="")
+            callback(result)
         
-        complaints = self.db.get_all_complaints(search, status, category, priority)
+        def failed(error):
+            self.loading_label.configure(text="")
+            if on_error is not None:
+                on_error()
+            tkmb.showerror("Error", f"Failed to load complaints: {error}")
         
-        if not complaints:
-            ctk.CTkLabel(self.complaints_frame, text="No complaints found", 
-                        font=("Helvetica", 16)).pack(pady=50)
+        self.db.submit(work, *args, callback=done, errback=failed, key="complaint-list", owner=self)
+    
+    def load_complaints(self):
+        if self.search_after_id is not None:
+            self.after_cancel(self.search_after_id)
+            self.search_after_id = None
+        filters = self.current_filters()
+        if filters == self.loaded_filters:
+            self.refresh_complaints()
             return
         
-        # Header
-        header = ctk.CTkFrame(self.complaints_frame, fg_color="#1e293b", corner_radius=8)
-        header.pack(fill="x", pady=(0, 10), padx=5)
+        self.loaded_filters = filters
+        self.query_list(self.read_pages, filters, 1, callback=self.show_first_page)
+    
+    def show_first_page(self, result):
+        self.complaint_pages, rows, has_more, links = result
+        self.duplicate_links = {link.complaint_id: link for link in links}
+        self.clear_selection()
+        self.complaint_list.set_items(self.visible(rows), has_more=has_more)
+    
+    def refresh_complaints(self):
+        """Re-read as many rows as are loaded and patch only the rows that changed"""
+        if self.loaded_filters is None:
+            self.load_complaints()
+            return
+        
+        wanted = max(len(self.complaint_list.items), 1)
+        self.query_list(self.read_pages, self.loaded_filters, wanted, callback=self.show_refreshed)
+    
+    def show_refreshed(self, result):
+        self.complaint_pages, rows, has_more, links = result
+        self.duplicate_links = {link.complaint_id: link for link in links}
+        self.complaint_list.reconcile(self.visible(rows), has_more=has_more)
+        self.complaint_list.redraw(force=True)
+    
+    def load_more_complaints(self):
+        self.query_list(self.read_page, self.complaint_pages, callback=self.show_more,
+                        on_error=self.complaint_list.fetch_failed)
+    
+    def show_more(self, result):
+        page, links = result
+        self.duplicate_links.update((link.complaint_id, link) for link in links)
+        self.complaint_list.extend(self.visible(page), has_more=len(page) == PAGE_SIZE)
+    
+    def regroup_complaints(self):
+        self.loaded_filters = None
+        self.load_complaints()
+    
+    def is_hidden(self, complaint_id):
+        link = self.duplicate_links.get(complaint_id)
+        return link is not None and link.duplicate_of is not None and self.group_duplicates.get()
+    
+    def visible(self, rows):
+        if not self.group_duplicates.get():
+            return rows
+        return [row for row in rows if not self.is_hidden(row.id)]
+    
+    def refresh_complaint(self, complaint_id):
+        """Update a single listed complaint after it was managed"""
+        if self.loaded_filters is not None:
+            self.fetch_complaint_rows([complaint_id])
+    
+    def fetch_complaint_rows(self, ids):
+        ids = set(ids)
+        # The complaints these were duplicates of, in case they were unlinked
+        links = [self.duplicate_links.get(complaint_id) for complaint_id in ids]
+        ids |= {link.duplicate_of for link in links if link is not None and link.duplicate_of is not None}
+        self.db.submit(self.read_rows, ids, self.loaded_filters,
+                       callback=lambda result: self.apply_complaint_rows(*result), owner=self)
+    
+    def apply_changes(self, changes):
+        """Patch the list and dashboard from change feed entries"""
+        self.refresh_statistics()
+        if self.loaded_filters is None:
+            return
+        if any(change.op == "reload" for change in changes):
+            self.refresh_complaints()
+            return
         
+        self.fetch_complaint_rows(change.complaint_id for change in changes)
+    
+    def apply_complaint_rows(self, ids, rows, links=()):
+        for complaint_id in ids:
+            self.duplicate_links.pop(complaint_id, None)
+        self.duplicate_links.update((link.complaint_id, link) for link in links)
+        found = {row.id: row for row in rows}
+        searching = bool(self.loaded_filters[0])
+        for complaint_id in ids:
+            row = found.get(complaint_id)
+            if row is None or self.is_hidden(complaint_id):
+                self.complaint_list.remove_key(complaint_id)
+            elif not self.complaint_list.update_item(row) and not searching:
+                # New to this listing: it goes where the newest-first order puts it
+                # (search results are ranked, so new matches wait for a refresh)
+                self.insert_complaint_row(row)
+        # Duplicate counts are not part of the rows, so redraw them regardless
+        self.complaint_list.redraw(force=True)
+    
+    def insert_complaint_row(self, row):
+        items = self.complaint_list.items
+        order = (row.submitted_at, row.id)
+        for index, item in enumerate(items):
+            if (item.submitted_at, item.id) < order:
+                self.complaint_list.insert_item(index, row)
+                return
+        if not self.complaint_list.has_more:
+            self.complaint_list.insert_item(len(items), row)
+    
+    def create_list_header(self, parent):
+        header = ctk.CTkFrame(parent, fg_color="#1e293b", corner_radius=8)
+        header.pack(fill="x", pady=(0, 5), padx=25)
+        
+        self.select_all_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(header, text="", width=24, variable=self.select_all_var,
+                       command=self.toggle_select_all).grid(row=0, column=0, padx=(10, 0), pady=10)
         ctk.CTkLabel(header, text="ID", font=("Helvetica", 12, "bold"), 
-                    width=50, text_color="white").grid(row=0, column=0, padx=5, pady=10)
+                    width=50, text_color="white").grid(row=0, column=1, padx=5, pady=10)
         ctk.CTkLabel(header, text="Name", font=("Helvetica", 12, "bold"), 
-                    width=120, text_color="white").grid(row=0, column=1, padx=5, pady=10)
+                    width=120, text_color="white").grid(row=0, column=2, padx=5, pady=10)
         ctk.CTkLabel(header, text="Roll No", font=("Helvetica", 12, "bold"), 
-                    width=100, text_color="white").grid(row=0, column=2, padx=5, pady=10)
+                    width=100, text_color="white").grid(row=0, column=3, padx=5, pady=10)
         ctk.CTkLabel(header, text="Department", font=("Helvetica", 12, "bold"), 
-                    width=150, text_color="white").grid(row=0, column=3, padx=5, pady=10)
+                    width=150, text_color="white").grid(row=0, column=4, padx=5, pady=10)
         ctk.CTkLabel(header, text="Category", font=("Helvetica", 12, "bold"), 
-                    width=120, text_color="white").grid(row=0, column=4, padx=5, pady=10)
+                    width=120, text_color="white").grid(row=0, column=5, padx=5, pady=10)
         ctk.CTkLabel(header, text="Priority", font=("Helvetica", 12, "bold"), 
-                    width=80, text_color="white").grid(row=0, column=5, padx=5, pady=10)
+                    width=80, text_color="white").grid(row=0, column=6, padx=5, pady=10)
         ctk.CTkLabel(header, text="Status", font=("Helvetica", 12, "bold"), 
-                    width=100, text_color="white").grid(row=0, column=6, padx=5, pady=10)
-        ctk.CTkLabel(header, text="Actions", font=("Helvetica", 12, "bold"), 
                     width=100, text_color="white").grid(row=0, column=7, padx=5, pady=10)
-        
-        for comp in complaints:
-            self.create_complaint_row(comp)
+        ctk.CTkLabel(header, text="Actions", font=("Helvetica", 12, "bold"), 
+                    width=100, text_color="white").grid(row=0, column=8, padx=5, pady=10)
     
-    def create_complaint_row(self, comp):
-        row = ctk.CTkFrame(self.complaints_frame, corner_radius=8)
-        row.pack(fill="x", pady=5, padx=5)
-        
-        ctk.CTkLabel(row, text=str(comp[0]), width=50).grid(row=0, column=0, padx=5, pady=10)
-        ctk.CTkLabel(row, text=comp[1][:15], width=120).grid(row=0, column=1, padx=5, pady=10)
-        ctk.CTkLabel(row, text=comp[2] if comp[2] else "N/A", width=100).grid(row=0, column=2, padx=5, pady=10)
-        ctk.CTkLabel(row, text=comp[3][:15], width=150).grid(row=0, column=3, padx=5, pady=10)
-        ctk.CTkLabel(row, text=comp[7], width=120).grid(row=0, column=4, padx=5, pady=10)
+    def create_complaint_row(self, parent):
+        """Build an empty, reusable row; update_complaint_row fills it in"""
+        row = ctk.CTkFrame(parent, corner_radius=8, height=ROW_HEIGHT - 6)
+        row.grid_propagate(False)
+        row.complaint_id = None
+        
+        row.check = ctk.CTkCheckBox(row, text="", width=24, command=lambda: self.toggle_selected(row))
+        row.check.grid(row=0, column=0, padx=(5, 0), pady=8)
+        row.id_label = ctk.CTkLabel(row, text="", width=50)
+        row.id_label.grid(row=0, column=1, padx=5, pady=8)
+        row.name_label = ctk.CTkLabel(row, text="", width=120)
+        row.name_label.grid(row=0, column=2, padx=5, pady=8)
+        row.roll_label = ctk.CTkLabel(row, text="", width=100)
+        row.roll_label.grid(row=0, column=3, padx=5, pady=8)
+        row.dept_label = ctk.CTkLabel(row, text="", width=150)
+        row.dept_label.grid(row=0, column=4, padx=5, pady=8)
+        row.category_label = ctk.CTkLabel(row, text="", width=120)
+        row.category_label.grid(row=0, column=5, padx=5, pady=8)
         
         # Priority badge
-        priority_colors = {"Low": "#10b981", "Medium": "#f59e0b", "High": "#ef4444", "Critical": "#7c2d12"}
-        ctk.CTkLabel(row, text=comp[8], width=80, 
-                    fg_color=priority_colors.get(comp[8], "#6b7280"),
-                    corner_radius=5, text_color="white").grid(row=0, column=5, padx=5, pady=10)
+        row.priority_label = ctk.CTkLabel(row, text="", width=80, corner_radius=5, text_color="white")
+        row.priority_label.grid(row=0, column=6, padx=5, pady=8)
         
         # Status badge
-        status_colors = {"Open": "#ef4444", "In Progress": "#f59e0b", "Resolved": "#10b981", "Closed": "#6b7280"}
-        ctk.CTkLabel(row, text=comp[9], width=100, 
-                    fg_color=status_colors.get(comp[9], "#6b7280"),
-                    corner_radius=5, text_color="white").grid(row=0, column=6, padx=5, pady=10)
+        row.status_label = ctk.CTkLabel(row, text="", width=100, corner_radius=5, text_color="white")
+        row.status_label.grid(row=0, column=7, padx=5, pady=8)
         
         # Actions
-        ctk.CTkButton(row, text="Manage", command=lambda: self.manage_complaint(comp[0]),
-                     width=100, height=30).grid(row=0, column=7, padx=5, pady=10)
+        ctk.CTkButton(row, text="Manage", command=lambda: self.manage_complaint(row.complaint_id),
+                     width=100, height=30).grid(row=0, column=8, padx=5, pady=8)
+        return row
+    
+    def update_complaint_row(self, row, comp):
+        row.complaint_id = comp.id
+        cells = [
+            (row.id_label, {"text": str(comp.id)}),
+            (row.name_label, {"text": self.list_name(comp)}),
+            (row.roll_label, {"text": comp.roll_no if comp.roll_no else "N/A"}),
+            (row.dept_label, {"text": comp.department[:15]}),
+            (row.category_label, {"text": comp.category}),
+            (row.priority_label, {"text": comp.priority, "fg_color": PRIORITY_COLORS.get(comp.priority, "#6b7280")}),
+            (row.status_label, {"text": comp.status, "fg_color": STATUS_COLORS.get(comp.status, "#6b7280")}),
+        ]
+        
+        # Only touch the cells whose content changed
+        for label, options in cells:
+            if getattr(label, "shown", None) != options:
+                label.configure(**options)
+                label.shown = options
+        
+        # Rows are recycled, so the tick follows the complaint, not the widget
+        selected = comp.id in self.selected
+        if selected and not row.check.get():
+            row.check.select()
+        elif not selected and row.check.get():
+            row.check.deselect()
+    
+    def list_name(self, comp):
+        link = self.duplicate_links.get(comp.id)
+        if link is None or not link.duplicates or not self.group_duplicates.get():
+            return comp.name[:15]
+        # A complaint others were linked to shows how many it stands for
+        return f"{comp.name[:10]} (+{len(link.duplicates)})"
+    
+    # Bulk actions
+    def create_bulk_bar(self, parent):
+        bar = ctk.CTkFrame(parent, fg_color="transparent")
+        bar.pack(fill="x", padx=20, pady=(0, 10))
+        
+        self.selection_label = ctk.CTkLabel(bar, text="0 selected", font=("Helvetica", 12, "bold"), width=100)
+        self.selection_label.pack(side="left", padx=5)
+        
+        ctk.CTkLabel(bar, text="Set status to:", font=("Helvetica", 12)).pack(side="left", padx=5)
+        self.bulk_status = ctk.CTkComboBox(bar, values=["Open", "In Progress", "Resolved", "Closed"], width=130)
+        self.bulk_status.set("Closed")
+        self.bulk_status.pack(side="left", padx=5)
+        
+        self.bulk_button = ctk.CTkButton(bar, text="Apply to selected", command=self.apply_bulk_status,
+                                         width=140, state="disabled")
+        self.bulk_button.pack(side="left", padx=5)
+        ctk.CTkButton(bar, text="Clear selection", command=self.clear_selection, width=120,
+                     fg_color="#6b7280", hover_color="#4b5563").pack(side="left", padx=5)
+    
+    def toggle_selected(self, row):
+        if row.complaint_id is None:
+            return
+        if row.check.get():
+            self.selected.add(row.complaint_id)
+        else:
+            self.selected.discard(row.complaint_id)
+        self.show_selection()
+    
+    def toggle_select_all(self):
+        """Tick or untick every loaded row, including those scrolled out of view"""
+        if self.select_all_var.get():
+            self.selected = {item.id for item in self.complaint_list.items}
+        else:
+            self.selected = set()
+        self.complaint_list.redraw(force=True)
+        self.show_selection()
+    
+    def clear_selection(self):
+        self.selected = set()
+        self.select_all_var.set(False)
+        self.complaint_list.redraw(force=True)
+        self.show_selection()
+    
+    def show_selection(self):
+        self.selection_label.configure(text=f"{len(self.selected)} selected")
+        self.bulk_button.configure(state="normal" if self.selected else "disabled")
+    
+    def apply_bulk_status(self):
+        ids = [complaint_id for complaint_id in self.selected if complaint_id in self.complaint_list.positions]
+        new_status = self.bulk_status.get()
+        if not ids:
+            return
+        message = f"Set the status of {len(ids)} complaint(s) to {new_status}?"
+        if self.group_duplicates.get():
+            # A grouped row stands for its duplicates too
+            duplicates = [duplicate for complaint_id in ids if complaint_id in self.duplicate_links
+                          for duplicate in self.duplicate_links[complaint_id].duplicates]
+            if duplicates:
+                message = (f"Set the status of {len(ids)} complaint(s) and the {len(duplicates)} "
+                           f"duplicate(s) grouped under them to {new_status}?")
+                ids += duplicates
+        if not tkmb.askyesno("Confirm", message):
+            return
+        
+        self.bulk_button.configure(state="disabled")
+        self.loading_label.configure(text=f"⏳ Updating {len(ids)}...")
+        self.db.submit("bulk_update_status", ids, new_status, self.user.id,
+                       callback=lambda changed: self.bulk_status_applied(ids, changed, new_status),
+                       errback=self.bulk_status_failed, owner=self)
+    
+    def bulk_status_applied(self, ids, changed, new_status):
+        self.loading_label.configure(text=f"✔ {len(changed)} set to {new_status}")
+        self.clear_selection()
+        # One incremental refresh for the whole batch: rows that no longer
+        # match the filters drop out, the rest are patched in place
+        if changed and self.loaded_filters is not None:
+            self.fetch_complaint_rows(changed)
+    
+    def bulk_status_failed(self, error):
+        self.loading_label.configure(text="")
+        self.show_selection()
+        tkmb.showerror("Error", f"Failed to update complaints: {error}")
     
     def manage_complaint(self, complaint_id):
-        ManageComplaintWindow(self, self.db, complaint_id, self.user, self.load_complaints)
+        ManageComplaintWindow(self, self.db, complaint_id, self.user, self.refresh_complaint)
     
     def export_to_csv(self):
+        from tkinter import filedialog
+        
         try:
             file_path = filedialog.asksaveasfilename(
                 defaultextension=".csv",
-                filetypes=[("CSV files", "*.csv"), ("All files", "*.*")],
+                filetypes=[("CSV files", "*.csv"), ("Gzipped CSV files", "*.csv.gz"), ("All files", "*.*")],
                 initialfile=f"complaints_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
             )
             
             if not file_path:
                 return
             
-            search = self.search_var.get()
-            status = self.status_filter.get()
-            category = self.category_filter.get()
-            priority = self.priority_filter.get()
-            
-            complaints = self.db.get_all_complaints(search, status, category, priority)
-            
-            with open(file_path, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(['ID', 'Name', 'Roll No', 'Department', 'Course', 'Gender', 
-                               'Complaint', 'Category', 'Priority', 'Status', 'Submitted At'])
-                
-                for comp in complaints:
-                    writer.writerow(comp[:11])
-            
-            tkmb.showinfo("Success", f"Exported {len(complaints)} complaints to CSV successfully!")
+            search, status, category, priority, include_archive = self.current_filters()
+            filters = {"search": search, "status_filter": status, "category_filter": category,
+                       "priority_filter": priority, "include_archive": include_archive}
+            ExportProgressWindow(self, self.db, file_path, filters)
         except Exception as e:
             tkmb.showerror("Error", f"Failed to export: {str(e)}")
 
 
+class ExportProgressWindow(ctk.CTkToplevel):
+    """Runs Database.export_complaints in the background and shows its progress.
+    
+    The export gets a thread of its own, reading through its own pooled
+    connection, so list paging, the change feed and everything else queued
+    on the database thread keep going while it runs. The thread only sets
+    attributes; the after() poll loop below shows them on the Tk thread.
+    """
+    
+    def __init__(self, parent, db, file_path, filters):
+        super().__init__(parent)
+        
+        self.db = db
+        self.file_path = file_path
+        self.cancel_event = threading.Event()
+        # Written by the export thread, read by the poll loop below
+        self.total = None
+        self.progress = (0, 0.0)
+        self.outcome = None
+        
+        self.title("Exporting Complaints")
+        self.geometry("420x190")
+        self.resizable(False, False)
+        
+        ctk.CTkLabel(self, text="Exporting complaints to CSV...", 
+                    font=("Helvetica", 16, "bold")).pack(pady=(20, 10))
+        
+        self.progress_bar = ctk.CTkProgressBar(self, width=360)
+        self.progress_bar.set(0)
+        self.progress_bar.pack(pady=10)
+        
+        self.status_label = ctk.CTkLabel(self, text="Counting rows...", font=("Helvetica", 12))
+        self.status_label.pack(pady=5)
+        
+        self.cancel_btn = ctk.CTkButton(self, text="Cancel", command=self.cancel, width=100,
+                                       fg_color="#dc2626", hover_color="#991b1b")
+        self.cancel_btn.pack(pady=10)
+        
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+        
+        # The Database itself, not the AsyncDatabase queue in front of it
+        threading.Thread(target=self.run_export, args=(db.db, filters), name="export", daemon=True).start()
+        self.after(100, self.poll_progress)
+    
+    def run_export(self, db, filters):
+        # Runs on the export thread
+        try:
+            self.total = db.count_complaints(**filters)
+            count = db.export_complaints(self.file_path, filters, progress=self.report_progress,
+                                         cancel=self.cancel_event)
+            self.outcome = (self.finished, count)
+        except Exception as e:
+            self.outcome = (self.failed, e)
+    
+    def report_progress(self, rows, rows_per_sec):
+        self.progress = (rows, rows_per_sec)
+    
+    def poll_progress(self):
+        if not self.winfo_exists():
+            # Closed without Cancel (e.g. the teacher logged out): stop the export too
+            self.cancel_event.set()
+            return
+        if self.outcome is not None:
+            done, result = self.outcome
+            done(result)
+            return
+        rows, rate = self.progress
+        if self.total:
+            self.progress_bar.set(rows / self.total)
+            self.status_label.configure(text=f"{rows:,} / {self.total:,} rows  ·  {rate:,.0f} rows/s")
+        self.after(100, self.poll_progress)
+    
+    def cancel(self):
+        self.cancel_event.set()
+        self.cancel_btn.configure(state="disabled", text="Cancelling...")
+    
+    def finished(self, count):
+        self.destroy()
+        tkmb.showinfo("Success", f"Exported {count} complaints to CSV successfully!")
+    
+    def failed(self, error):
+        self.destroy()
+        if isinstance(error, ExportCancelled):
+            tkmb.showinfo("Cancelled", "Export cancelled.")
+        else:
+            tkmb.showerror("Error", f"Failed to export: {str(error)}")
+
+
 class ManageComplaintWindow(ctk.CTkToplevel):
     def __init__(self, parent, db, complaint_id, user, refresh_callback):
         super().__init__(parent)
@@ -301,14 +886,25 @@ class ManageComplaintWindow(ctk.CTkToplevel):
         self.title(f"Manage Complaint #{complaint_id}")
         self.geometry("800x700")
         
-        # Load complaint
-        complaint = db.get_complaint_by_id(complaint_id)
+        self.loading_label = ctk.CTkLabel(self, text="⏳ Loading...", font=("Helvetica", 14), text_color="gray")
+        self.loading_label.pack(pady=50)
         
-        if not complaint:
+        # Load complaint with its responses; archived complaints are shown read-only
+        db.submit("load_complaint_bundle", complaint_id, callback=self.show_bundle, errback=self.load_failed,
+                  owner=self)
+    
+    def load_failed(self, error):
+        self.destroy()
+        tkmb.showerror("Error", f"Failed to load complaint: {error}")
+    
+    def show_bundle(self, bundle):
+        if not bundle:
             self.destroy()
             return
+        self.loading_label.destroy()
         
-        self.complaint = complaint
+        self.complaint = complaint = bundle.complaint
+        self.archived = bundle.archived
         
         # Main frame
         main = ctk.CTkScrollableFrame(self)
@@ -318,39 +914,43 @@ class ManageComplaintWindow(ctk.CTkToplevel):
         title_frame = ctk.CTkFrame(main, fg_color="transparent")
         title_frame.pack(fill="x", pady=(0, 20))
         
-        ctk.CTkLabel(title_frame, text=f"Complaint #{complaint[0]}", 
+        ctk.CTkLabel(title_frame, text=f"Complaint #{complaint.id}", 
                     font=("Helvetica", 24, "bold")).pack(side="left")
         
         # Status change
         status_frame = ctk.CTkFrame(title_frame, fg_color="transparent")
         status_frame.pack(side="right")
         
-        ctk.CTkLabel(status_frame, text="Change Status:", 
-                    font=("Helvetica", 12, "bold")).pack(side="left", padx=5)
-        
-        self.status_var = ctk.StringVar(value=complaint[10])
-        status_combo = ctk.CTkComboBox(status_frame, values=["Open", "In Progress", "Resolved", "Closed"],
-                                      variable=self.status_var, width=120)
-        status_combo.pack(side="left", padx=5)
-        
-        ctk.CTkButton(status_frame, text="Update", command=self.update_status,
-                     width=80, fg_color="#10b981", hover_color="#059669").pack(side="left", padx=5)
+        if self.archived:
+            ctk.CTkLabel(status_frame, text="🗄️ Archived (read-only)", 
+                        font=("Helvetica", 12, "bold"), text_color="gray").pack(side="left", padx=5)
+        else:
+            ctk.CTkLabel(status_frame, text="Change Status:", 
+                        font=("Helvetica", 12, "bold")).pack(side="left", padx=5)
+            
+            self.status_var = ctk.StringVar(value=complaint.status)
+            status_combo = ctk.CTkComboBox(status_frame, values=["Open", "In Progress", "Resolved", "Closed"],
+                                          variable=self.status_var, width=120)
+            status_combo.pack(side="left", padx=5)
+            
+            ctk.CTkButton(status_frame, text="Update", command=self.update_status,
+                         width=80, fg_color="#10b981", hover_color="#059669").pack(side="left", padx=5)
         
         # Info
         info_frame = ctk.CTkFrame(main, corner_radius=10)
         info_frame.pack(fill="x", pady=10)
         
         info = [
-            ("Name", complaint[2]),
-            ("Roll No", complaint[3]),
-            ("Department", complaint[4]),
-            ("Course", complaint[5]),
-            ("Gender", complaint[6]),
-            ("Category", complaint[8]),
-            ("Priority", complaint[9]),
-            ("Status", complaint[10]),
-            ("Submitted", str(complaint[11])[:16]),
-            ("Submitter Email", complaint[14] if len(complaint) > 14 else "N/A")
+            ("Name", complaint.name),
+            ("Roll No", complaint.roll_no),
+            ("Department", complaint.department),
+            ("Course", complaint.course),
+            ("Gender", complaint.gender),
+            ("Category", complaint.category),
+            ("Priority", complaint.priority),
+            ("Status", complaint.status),
+            ("Submitted", str(complaint.submitted_at)[:16]),
+            ("Submitter Email", complaint.submitter_email or "N/A")
         ]
         
         for i, (label, value) in enumerate(info):
@@ -370,28 +970,37 @@ class ManageComplaintWindow(ctk.CTkToplevel):
                     font=("Helvetica", 14, "bold"), anchor="w").pack(fill="x", pady=(20, 5))
         
         complaint_box = ctk.CTkTextbox(main, height=120, wrap="word")
-        complaint_box.insert("1.0", complaint[7])
+        complaint_box.insert("1.0", complaint.complaint)
         complaint_box.configure(state="disabled")
         complaint_box.pack(fill="x", pady=(0, 20))
         
-        # Add response section
-        response_section = ctk.CTkFrame(main, corner_radius=10, fg_color="#f0f9ff")
-        response_section.pack(fill="x", pady=10)
-        
-        ctk.CTkLabel(response_section, text="Add Response:", 
-                    font=("Helvetica", 14, "bold"), anchor="w").pack(fill="x", padx=15, pady=(15, 5))
+        # Duplicates: filled in once the similar open complaints have been looked up
+        if not self.archived:
+            self.duplicates_frame = ctk.CTkFrame(main, corner_radius=10, fg_color="#fef3c7")
+            self.duplicates_frame.pack(fill="x", pady=10)
+            ctk.CTkLabel(self.duplicates_frame, text="Looking for similar open complaints...",
+                        font=("Helvetica", 12), text_color="gray").pack(padx=15, pady=10)
+            self.db.submit(self.read_duplicates, callback=self.show_duplicates, owner=self)
         
-        self.response_text = ctk.CTkTextbox(response_section, height=100)
-        self.response_text.pack(fill="x", padx=15, pady=(0, 10))
-        
-        ctk.CTkButton(response_section, text="Submit Response", command=self.add_response,
-                     height=35, fg_color="#3b82f6", hover_color="#2563eb").pack(padx=15, pady=(0, 15))
+        # Add response section
+        if not self.archived:
+            response_section = ctk.CTkFrame(main, corner_radius=10, fg_color="#f0f9ff")
+            response_section.pack(fill="x", pady=10)
+            
+            ctk.CTkLabel(response_section, text="Add Response:", 
+                        font=("Helvetica", 14, "bold"), anchor="w").pack(fill="x", padx=15, pady=(15, 5))
+            
+            self.response_text = ctk.CTkTextbox(response_section, height=100)
+            self.response_text.pack(fill="x", padx=15, pady=(0, 10))
+            
+            ctk.CTkButton(response_section, text="Submit Response", command=self.add_response,
+                         height=35, fg_color="#3b82f6", hover_color="#2563eb").pack(padx=15, pady=(0, 15))
         
         # Previous responses
         ctk.CTkLabel(main, text="Response History:", font=("Helvetica", 14, "bold"), 
                     anchor="w").pack(fill="x", pady=(20, 10))
         
-        responses = db.get_responses(complaint_id)
+        responses = bundle.responses
         
         if responses:
             for resp in responses:
@@ -401,19 +1010,87 @@ class ManageComplaintWindow(ctk.CTkToplevel):
                         font=("Helvetica", 12), text_color="gray").pack(pady=10)
         
         # Delete button
-        ctk.CTkButton(main, text="🗑️ Delete Complaint", command=self.delete_complaint,
-                     fg_color="#dc2626", hover_color="#991b1b", height=40).pack(pady=20)
+        if not self.archived:
+            ctk.CTkButton(main, text="🗑️ Delete Complaint", command=self.delete_complaint,
+                         fg_color="#dc2626", hover_color="#991b1b", height=40).pack(pady=20)
+    
+    def read_duplicates(self, db):
+        matches = db.find_duplicates(self.complaint.complaint, limit=10, exclude=self.complaint_id)
+        links = db.get_duplicate_links([self.complaint_id])
+        return matches, links[0] if links else None
+    
+    def show_duplicates(self, result):
+        matches, link = result
+        frame = self.duplicates_frame
+        for child in frame.winfo_children():
+            child.destroy()
+        
+        ctk.CTkLabel(frame, text="Duplicates:", font=("Helvetica", 14, "bold"),
+                    anchor="w").pack(fill="x", padx=15, pady=(15, 5))
+        if link is not None and link.duplicate_of is not None:
+            line = ctk.CTkFrame(frame, fg_color="transparent")
+            line.pack(fill="x", padx=15, pady=5)
+            ctk.CTkLabel(line, text=f"Linked as a duplicate of complaint #{link.duplicate_of}",
+                        font=("Helvetica", 12)).pack(side="left")
+            ctk.CTkButton(line, text="Unlink", command=self.unlink_duplicate, width=80,
+                         fg_color="#6b7280", hover_color="#4b5563").pack(side="right")
+        elif link is not None:
+            ids = ", ".join(f"#{complaint_id}" for complaint_id in sorted(link.duplicates))
+            ctk.CTkLabel(frame, text=f"{len(link.duplicates)} complaint(s) linked to this one: {ids}",
+                        font=("Helvetica", 12), anchor="w", justify="left",
+                        wraplength=700).pack(fill="x", padx=15, pady=5)
+        
+        if not matches:
+            ctk.CTkLabel(frame, text="No similar open complaints", font=("Helvetica", 12),
+                        text_color="gray", anchor="w").pack(fill="x", padx=15, pady=(0, 15))
+            return
+        
+        ctk.CTkLabel(frame, text="Similar open complaints:", font=("Helvetica", 12, "bold"),
+                    anchor="w").pack(fill="x", padx=15, pady=(5, 0))
+        self.duplicate_vars = {}
+        for match in matches:
+            var = ctk.BooleanVar(value=False)
+            others = f" (+{match.duplicates})" if match.duplicates else ""
+            text = (f"#{match.id}{others} · {match.category} · {match.status} · {match.similarity:.0%} · "
+                    f"{' '.join(match.complaint.split())[:80]}")
+            ctk.CTkCheckBox(frame, text=text, variable=var).pack(anchor="w", padx=15, pady=3)
+            self.duplicate_vars[match.id] = var
+        ctk.CTkButton(frame, text="Link selected as duplicates of this complaint", command=self.link_duplicates,
+                     fg_color="#d97706", hover_color="#b45309").pack(padx=15, pady=(10, 15))
+    
+    # Changes run on the database thread; the window reacts once they are written
+    def action_failed(self, error):
+        tkmb.showerror("Error", str(error))
+    
+    def link_duplicates(self):
+        ids = [complaint_id for complaint_id, var in self.duplicate_vars.items() if var.get()]
+        if not ids:
+            return
+        self.db.submit("link_duplicates", ids, self.complaint_id, callback=lambda _: self.duplicates_changed(ids),
+                       errback=self.action_failed, owner=self)
+    
+    def unlink_duplicate(self):
+        self.db.submit("unlink_duplicates", [self.complaint_id], callback=lambda _: self.duplicates_changed([]),
+                       errback=self.action_failed, owner=self)
+    
+    def duplicates_changed(self, ids):
+        for complaint_id in ids + [self.complaint_id]:
+            self.refresh_callback(complaint_id)
+        self.db.submit(self.read_duplicates, callback=self.show_duplicates, owner=self)
     
     def update_status(self):
         new_status = self.status_var.get()
         
-        if new_status == self.complaint[10]:
+        if new_status == self.complaint.status:
             tkmb.showinfo("Info", "Status is already set to this value")
             return
         
-        self.db.update_complaint_status(self.complaint_id, new_status, self.user[0])
+        self.db.submit("update_complaint_status", self.complaint_id, new_status, self.user.id,
+                       callback=lambda _: self.status_updated(new_status), errback=self.action_failed, owner=self)
+    
+    def status_updated(self, new_status):
         tkmb.showinfo("Success", f"Status updated to: {new_status}")
-        self.refresh_callback()
+        self.refresh_callback(self.complaint_id)
         self.destroy()
     
     def add_response(self):
@@ -423,17 +1100,23 @@ class ManageComplaintWindow(ctk.CTkToplevel):
             tkmb.showerror("Error", "Response must be at least 10 characters!")
             return
         
-        self.db.add_response(self.complaint_id, self.user[0], response)
+        self.db.submit("add_response", self.complaint_id, self.user.id, response,
+                       callback=self.response_added, errback=self.action_failed, owner=self)
+    
+    def response_added(self, result):
         tkmb.showinfo("Success", "Response added successfully!")
         self.destroy()
-        self.refresh_callback()
+        self.refresh_callback(self.complaint_id)
     
     def delete_complaint(self):
         if tkmb.askyesno("Confirm Delete", "Are you sure you want to delete this complaint? This action cannot be undone!"):
-            self.db.delete_complaint(self.complaint_id)
-            tkmb.showinfo("Success", "Complaint deleted successfully!")
-            self.refresh_callback()
-            self.destroy()
+            self.db.submit("delete_complaint", self.complaint_id, callback=self.complaint_deleted,
+                           errback=self.action_failed, owner=self)
+    
+    def complaint_deleted(self, result):
+        tkmb.showinfo("Success", "Complaint deleted successfully!")
+        self.refresh_callback(self.complaint_id)
+        self.destroy()
     
     def create_response_card(self, parent, response):
         card = ctk.CTkFrame(parent, corner_radius=8, fg_color="#e0f2fe")
@@ -442,10 +1125,10 @@ class ManageComplaintWindow(ctk.CTkToplevel):
         header = ctk.CTkFrame(card, fg_color="transparent")
         header.pack(fill="x", padx=10, pady=(10, 5))
         
-        ctk.CTkLabel(header, text=f"{response[4]} ({response[5]})", 
+        ctk.CTkLabel(header, text=f"{response.responder_name} ({response.responder_role})", 
                     font=("Helvetica", 12, "bold")).pack(side="left")
-        ctk.CTkLabel(header, text=str(response[3])[:16], 
+        ctk.CTkLabel(header, text=str(response.responded_at)[:16], 
                     font=("Helvetica", 10), text_color="gray").pack(side="right")
         
-        ctk.CTkLabel(card, text=response[2], font=("Helvetica", 11),
+        ctk.CTkLabel(card, text=response.response, font=("Helvetica", 11),
                     anchor="w", justify="left", wraplength=700).pack(fill="x", padx=10, pady=(0, 10))
@@ -0,0 +1,229 @@
+# views/virtual_list.py
+import math
+import sys
+import customtkinter as ctk
+from views.reconcile import row_key
+
+class VirtualList(ctk.CTkFrame):
+    """Scrollable list that only creates widgets for the rows on screen.
+
+    A small pool of row widgets is placed over the visible window and
+    re-filled with different items as the list scrolls, so the widget count
+    depends on the window height, not on the number of items. When the user
+    scrolls close to the end of the loaded items, `fetch_more` is called to
+    load the next page.
+
+    create_row(parent) builds one empty row widget and update_row(row, item)
+    fills it in; both are supplied by the owning view. Items are keyed by
+    `key` so single items can be replaced or removed in place.
+    """
+
+    def __init__(self, parent, row_height, create_row, update_row, fetch_more=None,
+                 empty_text="Nothing to show", prefetch_rows=20, key=row_key, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.row_height = row_height
+        self.create_row = create_row
+        self.update_row = update_row
+        self.fetch_more = fetch_more
+        self.prefetch_rows = prefetch_rows
+        self.key = key
+
+        self.items = []
+        self.positions = {}
+        self.has_more = False
+        self.offset = 0
+        self.slots = []
+        self._fetching = False
+
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.pack(side="left", fill="both", expand=True)
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.empty_label = ctk.CTkLabel(self.body, text=empty_text, font=("Helvetica", 16))
+
+        self.body.bind("<Configure>", lambda e: self.redraw())
+
+        # Same approach as CTkScrollableFrame: listen globally and only react
+        # when the pointer is over this list
+        sequences = ("<Button-4>", "<Button-5>") if sys.platform.startswith("linux") else ("<MouseWheel>",)
+        self._wheel_bindings = [(sequence, self.bind_all(sequence, self._on_wheel, add=True))
+                                for sequence in sequences]
+
+    def destroy(self):
+        # unbind_all would drop other widgets' wheel handlers too, so take
+        # only this list's command out of the "all" bindings
+        for sequence, funcid in self._wheel_bindings:
+            script = self.tk.call("bind", "all", sequence)
+            kept = "\n".join(line for line in script.split("\n") if funcid not in line)
+            self.tk.call("bind", "all", sequence, kept)
+            self.deletecommand(funcid)
+        self._wheel_bindings = []
+        super().destroy()
+
+    # Data
+    def set_items(self, items, has_more=False):
+        """Replace the whole list and scroll back to the top"""
+        self.items = list(items)
+        self.has_more = has_more
+        self.offset = 0
+        self._fetching = False
+        self._reindex()
+        self.redraw(force=True)
+
+    def extend(self, items, has_more):
+        for item in items:
+            self.positions[self.key(item)] = len(self.items)
+            self.items.append(item)
+        self.has_more = has_more
+        self._fetching = False
+        self.redraw()
+
+    def reconcile(self, items, has_more):
+        """Swap in a fresh copy of the list without losing the scroll position.
+
+        Unchanged items keep their old object, so redraw() only touches the
+        on-screen rows whose data actually changed.
+        """
+        current = {self.key(item): item for item in self.items}
+        merged = []
+        for item in items:
+            old = current.get(self.key(item))
+            merged.append(old if old == item else item)
+        self.items = merged
+        self.has_more = has_more
+        self._fetching = False
+        self._reindex()
+        self.redraw()
+
+    def fetch_failed(self):
+        """The fetch_more query failed; scrolling again will retry it"""
+        self._fetching = False
+
+    def update_item(self, item):
+        """Replace the item with the same key; returns False if it is not listed"""
+        position = self.positions.get(self.key(item))
+        if position is None:
+            return False
+        if self.items[position] != item:
+            self.items[position] = item
+            self.redraw()
+        return True
+
+    def insert_item(self, index, item):
+        self.items.insert(index, item)
+        self._reindex()
+        # Keep the rows on screen in place when something lands above them
+        if index * self.row_height < self.offset:
+            self.offset += self.row_height
+        self.redraw()
+    
+    def remove_key(self, key):
+        position = self.positions.get(key)
+        if position is None:
+            return False
+        del self.items[position]
+        self._reindex()
+        self.redraw()
+        return True
+
+    def _reindex(self):
+        self.positions = {self.key(item): i for i, item in enumerate(self.items)}
+
+    # Geometry
+    def _view_height(self):
+        # winfo_height is in screen pixels, row_height in unscaled CTk units
+        return max(self.body.winfo_height() / self._get_widget_scaling(), 1)
+
+    def _total_height(self):
+        return len(self.items) * self.row_height
+
+    def _max_offset(self):
+        return max(self._total_height() - self._view_height(), 0)
+
+    def scroll_to(self, offset):
+        self.offset = min(max(int(offset), 0), self._max_offset())
+        self.redraw()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * self._total_height())
+        elif action == "scroll":
+            step = self._view_height() if unit == "pages" else self.row_height
+            self.scroll_to(self.offset + float(amount) * step)
+
+    def _on_wheel(self, event):
+        if not self._contains(event.widget):
+            return
+        if event.num == 4:
+            steps = -1
+        elif event.num == 5:
+            steps = 1
+        else:
+            steps = -1 if event.delta > 0 else 1
+        self.scroll_to(self.offset + steps * self.row_height * 3)
+
+    def _contains(self, widget):
+        if isinstance(widget, ctk.CTkScrollbar):
+            return False
+        while widget is not None:
+            if widget is self:
+                return True
+            widget = getattr(widget, "master", None)
+        return False
+
+    # Rendering
+    def _ensure_pool(self):
+        needed = math.ceil(self._view_height() / self.row_height) + 1
+        while len(self.slots) < needed:
+            row = self.create_row(self.body)
+            self.slots.append([row, None])
+
+    def redraw(self, force=False):
+        """Re-fill the row pool for the current scroll position.
+
+        Rows whose item has not changed since the last redraw are left alone,
+        so scrolling by a few pixels or refreshing one item touches only the
+        widgets that need it.
+        """
+        self._ensure_pool()
+        self.offset = min(self.offset, self._max_offset())
+
+        if not self.items:
+            for slot in self.slots:
+                slot[0].place_forget()
+                slot[1] = None
+            self.empty_label.place(relx=0.5, y=50, anchor="n")
+        else:
+            self.empty_label.place_forget()
+
+        first = int(self.offset // self.row_height)
+        shift = self.offset % self.row_height
+
+        for i, slot in enumerate(self.slots):
+            index = first + i
+            row = slot[0]
+            if not self.items or index >= len(self.items):
+                row.place_forget()
+                slot[1] = None
+                continue
+
+            item = self.items[index]
+            if force or slot[1] is not item:
+                self.update_row(row, item)
+                slot[1] = item
+            row.place(x=0, y=i * self.row_height - shift, relwidth=1)
+
+        total = self._total_height()
+        if total:
+            self.scrollbar.set(self.offset / total, min((self.offset + self._view_height()) / total, 1.0))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+        # Load the next page before the user reaches the end
+        last_visible = first + len(self.slots)
+        if (self.has_more and self.fetch_more and not self._fetching
+                and last_visible + self.prefetch_rows >= len(self.items)):
+            self._fetching = True
+            self.after_idle(self.fetch_more)